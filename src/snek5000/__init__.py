@@ -27,18 +27,71 @@ API reference
    params
    config
 
+.. note::
+
+   To keep ``import snek5000`` fast (it is executed by every console script and
+   Snakemake rule file), the sub-packages, modules and the attributes ``mpi``,
+   ``load_params``, ``get_status``, ``load_for_restart``, ``ensure_env`` and
+   ``append_debug_flags`` are imported lazily on first access (:pep:`562`).
+
 """
 
+from importlib import import_module as _import_module
 from importlib import resources as _resources
 import os
 import weakref
 from pathlib import Path
 
-from fluiddyn.util import mpi  # noqa: F401
-
 from ._version import __version__  # noqa: F401
 from .log import logger  # noqa: F401
-from .params import load_params
+
+#: Attributes imported on first access: name -> (module, attribute). Modules
+#: themselves are denoted by ``attribute = None``.
+_lazy_attributes = {
+    "mpi": ("fluiddyn.util.mpi", None),
+    "load_params": ("snek5000.params", "load_params"),
+    "ensure_env": ("snek5000.util.smake", "ensure_env"),
+    "append_debug_flags": ("snek5000.util.smake", "append_debug_flags"),
+    "restart": ("snek5000.util.restart", None),
+    "get_status": ("snek5000.util.restart", "get_status"),
+    "load_for_restart": ("snek5000.util.restart", "load_for_restart"),
+}
+
+#: Sub-packages and modules imported on first access
+_lazy_submodules = {
+    "clusters",
+    "config",
+    "const",
+    "info",
+    "magic",
+    "make",
+    "operators",
+    "output",
+    "params",
+    "resources",
+    "solvers",
+    "util",
+}
+
+
+def __getattr__(name):
+    """Import sub-modules and heavy attributes on first access (:pep:`562`)."""
+    if name in _lazy_attributes:
+        module_name, attr_name = _lazy_attributes[name]
+        value = _import_module(module_name)
+        if attr_name is not None:
+            value = getattr(value, attr_name)
+    elif name in _lazy_submodules:
+        value = _import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | _lazy_submodules)
 
 
 def get_nek_source_root():
@@ -169,15 +222,6 @@ def load_simul(path_dir=".", session_id=None, reader=True):
 load = weakref.proxy(load_simul)  #: Alias for :func:`load_simul`
 
 
-from .util.smake import append_debug_flags, ensure_env  # noqa: F401, E402
-from .util import restart  # noqa: F401, E402
-
-get_status = restart.get_status  #: Alias for :func:`snek5000.util.restart.get_status`
-load_for_restart = (
-    restart.load_for_restart
-)  #: Alias for :func:`snek5000.util.restart.load_for_restart`
-
-
 __all__ = [
     "get_nek_source_root",
     "get_snek_resource",
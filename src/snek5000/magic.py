@@ -15,11 +15,27 @@ Usage example in an IPython console:
 
 """
 
+from unittest.mock import patch
+
 from IPython.core.magic import line_magic, magics_class
 from IPython.core.magic_arguments import argument, magic_arguments
 
+import fluidsim_core.magic
 from fluidsim_core.magic import MagicsCore
 
+from . import solvers
+
+
+def _patch_registry():
+    """Make :class:`fluidsim_core.magic.MagicsCore` look up the solvers in the
+    cached registry of :mod:`snek5000.solvers` instead of scanning the entry
+    points."""
+    return patch.multiple(
+        fluidsim_core.magic,
+        available_solvers=lambda entrypoint_grp: solvers.available_solvers(),
+        import_cls_simul=lambda key, entrypoint_grp: solvers.import_cls_simul(key),
+    )
+
 
 @magics_class
 class SnekMagics(MagicsCore):
@@ -83,7 +99,8 @@ class SnekMagics(MagicsCore):
     @argument("-f", "--force-overwrite", action="store_true")
     @line_magic
     def snek(self, line):
-        super().fluidsim(line)
+        with _patch_registry():
+            super().fluidsim(line)
 
 
 def load_ipython_extension(ipython):
@@ -4,8 +4,15 @@
 """
 
 import argparse
+import hashlib
+import os
+import shlex
+import shutil
 import subprocess
 import sys
+import tempfile
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 from warnings import warn
@@ -16,6 +23,58 @@ from snakemake import snakemake
 from snakemake.executors import change_working_directory as change_dir
 
 import snek5000
+from snek5000.clusters import nproc_available
+from snek5000.log import logger
+
+#: Keys of the Snakemake configuration which affect the build of Nek5000
+_compiler_config_keys = ("CC", "FC", "MPICC", "MPIFC", "CFLAGS", "FFLAGS")
+
+
+def _normalize_flags(flags):
+    """Normalize compiler flags (or a compiler command) into a list of
+    arguments, so that whitespaces do not matter. The order of the flags is
+    kept since it can matter (for example ``-O0 -O3`` or the order of the
+    include directories).
+
+    """
+    return shlex.split(str(flags))
+
+
+@lru_cache(maxsize=None)
+def _get_compiler_version(compiler):
+    """First line of the output of ``<compiler> --version``. Returns an empty
+    string if the version cannot be detected."""
+    if not compiler.strip():
+        return ""
+    try:
+        process = subprocess.run(
+            [*shlex.split(compiler), "--version"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        logger.debug(f"Cannot detect the version of the compiler {compiler}")
+        return ""
+    return process.stdout.strip().partition("\n")[0]
+
+
+def _hash_stats(path_dir):
+    """Hash the modification times and the sizes of the files of a directory
+    tree (without following symbolic links)."""
+    digest = hashlib.sha256()
+    for root, dirs, names in os.walk(path_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            stat = os.lstat(path)
+            digest.update(f"{path} {stat.st_mtime_ns} {stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _hash_inputs(inputs):
+    """Hash a dictionary describing the inputs of a build target."""
+    return hashlib.sha256(yaml.safe_dump(inputs, sort_keys=True).encode()).hexdigest()
 
 
 def unlock(path_dir):
@@ -202,9 +261,23 @@ class _Nek5000Make(Make):
     This class would prevent unnecessary rebuild of Nek5000 if there is no
     change in the compiler configuration.
 
+    The inputs of every target (normalized compiler flags, compiler versions
+    and git revision of the sources) are hashed and recorded in a manifest
+    file. Only the targets whose inputs have changed are rebuilt.
+
+    Parameters
+    ----------
+    cache_core: bool (None)
+        If ``True``, the Nek5000 core objects compiled by the ``compile`` rule
+        of a simulation are cached under ``NEK_SOURCE_ROOT`` per ``SIZE`` file,
+        compiler configuration and revision of the core sources. New
+        simulations sharing the same ``SIZE`` file then only compile the user
+        code. If ``None`` (default), the value is obtained from the
+        environment variable ``SNEK_CACHE_CORE``.
+
     """
 
-    def __init__(self):
+    def __init__(self, cache_core=None):
         #: ``NEK_SOURCE_ROOT`` is the working directory
         self.path_run = Path(snek5000.get_nek_source_root())
 
@@ -214,47 +287,215 @@ class _Nek5000Make(Make):
         #: A file lock ``nek5000_make_config.yml.lock`` used to prevent race conditions
         self.lock = FileLock(self.path_run / "nek5000_make_config.yml.lock")
 
-        #: A YAML file ``nek5000_make_config.yml`` to record compiler configuration
-        self.config_cache = self.path_run / "nek5000_make_config.yml"
+        #: Directory ``nek5000_make_locks`` containing one file lock per target
+        self.path_locks = self.path_run / "nek5000_make_locks"
+
+        #: A YAML file ``nek5000_make_manifest.yml`` to record the hashed inputs of
+        #: every target
+        self.manifest = self.path_run / "nek5000_make_manifest.yml"
+
+        keys_tools = ("CC", "FC", "CFLAGS", "FFLAGS")
+        keys_third_party = ("MPICC", "MPIFC", "CFLAGS", "FFLAGS")
+        #: Compiler configuration keys and source directory of every target
+        self.targets_inputs = {
+            "bin/genbox": (keys_tools, "tools/genbox"),
+            "bin/genmap": (keys_tools, "tools/genmap"),
+            "3rd_party/gslib/lib/libgs.a": (keys_third_party, "3rd_party"),
+            "3rd_party/blasLapack/libblasLapack.a": (keys_third_party, "3rd_party"),
+        }
 
         #: List of files to build
-        self.targets = [
-            "bin/genbox",
-            "bin/genmap",
-            "3rd_party/gslib/lib/libgs.a",
-            "3rd_party/blasLapack/libblasLapack.a",
-        ]
+        self.targets = list(self.targets_inputs)
+
+        #: Cache compiled Nek5000 core objects for reuse by other simulations.
+        #: Defaults to the value of the environment variable ``SNEK_CACHE_CORE``
+        if cache_core is None:
+            cache_core = bool(os.getenv("SNEK_CACHE_CORE"))
+        self.cache_core = cache_core
+
+        #: Directory ``snek5000_core_cache`` where core objects are cached
+        self.path_core_cache = self.path_run / "snek5000_core_cache"
+
+        self._source_revisions = {}
 
         # TODO: replace with Snek5000 log handler?
         self.log_handler = []
 
-    def has_to_build(self, compiler_config):
-        compiler_config_str = yaml.safe_dump(compiler_config)
-        compiler_config_cache = (
-            self.config_cache.read_text() if self.config_cache.exists() else ""
-        )
+    def get_lock(self, target):
+        """Get the file lock which prevents simultaneous builds of a target.
+        Targets built from the same sources (and by the same rule) share the
+        same lock.
 
-        if (
-            # One or more of the targets do not exist
-            any(not (self.path_run / target).exists() for target in self.targets)
-            or compiler_config_str != compiler_config_cache
-            # New compiler configuration
-        ):
-            # Save new configuration first
-            self.config_cache.write_text(compiler_config_str)
+        Parameters
+        ----------
+        target: str
+            A file to build, relative to ``NEK_SOURCE_ROOT``
 
-            return True
-        else:
-            return False
+        Returns
+        -------
+        filelock.FileLock
+
+        """
+        _, path_source = self.targets_inputs[target]
+        self.path_locks.mkdir(exist_ok=True)
+        return FileLock(self.path_locks / f"{path_source.replace('/', '_')}.lock")
+
+    def _git(self, *args):
+        """Output of a git command run in ``NEK_SOURCE_ROOT`` (``None`` if it
+        fails)."""
+        try:
+            process = subprocess.run(
+                ["git", *args],
+                cwd=self.path_run,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return process.stdout
+
+    def get_source_revision(self, path_source):
+        """Git revision of a source directory, relative to ``NEK_SOURCE_ROOT``.
+        Returns an empty string if Nek5000 is not a git repository.
+
+        Local modifications of tracked files are taken into account with the
+        modification times and the sizes of the modified files. Revisions are
+        computed once per instance (and once per :meth:`build`).
+
+        """
+        try:
+            return self._source_revisions[path_source]
+        except KeyError:
+            pass
+
+        revision = (self._git("rev-parse", f"HEAD:{path_source}") or "").strip()
+        status = self._git("status", "--porcelain", "-uno", "--", path_source)
+        if revision and status:
+            digest = hashlib.sha256()
+            for line in sorted(status.splitlines()):
+                # "XY path" or "XY old_path -> path"
+                path = self.path_run / line[3:].split(" -> ")[-1].strip('"')
+                try:
+                    stat = path.stat()
+                except OSError:
+                    info = f"{path} deleted"
+                else:
+                    info = f"{path} {stat.st_mtime_ns} {stat.st_size}"
+                digest.update(info.encode())
+            revision += "+" + digest.hexdigest()[:16]
+
+        self._source_revisions[path_source] = revision
+        return revision
+
+    def get_target_inputs(self, target, compiler_config):
+        """Normalized inputs of a target which would require a rebuild if
+        modified.
+
+        Parameters
+        ----------
+        target: str
+            A file to build, relative to ``NEK_SOURCE_ROOT``
+        compiler_config: dict
+            Compiler configuration
+
+        Returns
+        -------
+        dict
+
+        """
+        keys, path_source = self.targets_inputs[target]
+        return {
+            "flags": {
+                key: _normalize_flags(compiler_config[key])
+                for key in keys
+                if key.endswith("FLAGS")
+            },
+            "compilers": {
+                key: {
+                    "command": " ".join(shlex.split(compiler_config[key])),
+                    "version": _get_compiler_version(compiler_config[key]),
+                }
+                for key in keys
+                if not key.endswith("FLAGS")
+            },
+            "source": self.get_source_revision(path_source),
+        }
+
+    def load_manifest(self):
+        """Load the manifest recording the inputs of the built targets.
+
+        Returns
+        -------
+        dict
+
+        """
+        if not self.manifest.exists():
+            return {}
+        return yaml.safe_load(self.manifest.read_text()) or {}
+
+    def update_manifest(self, targets_inputs):
+        """Record the inputs of freshly built targets in the manifest.
+
+        Parameters
+        ----------
+        targets_inputs: dict
+            Inputs of the targets, as returned by :meth:`get_outdated_targets`
+
+        """
+        with self.lock:
+            manifest = self.load_manifest()
+            manifest.update(
+                {
+                    target: {"hash": _hash_inputs(inputs), "inputs": inputs}
+                    for target, inputs in targets_inputs.items()
+                }
+            )
+            # Atomic write, so that other processes can read without the lock
+            path_tmp = self.manifest.with_name(f"{self.manifest.name}.{os.getpid()}")
+            path_tmp.write_text(yaml.safe_dump(manifest))
+            os.replace(path_tmp, self.manifest)
+
+    def get_outdated_targets(self, compiler_config):
+        """Get the targets which are missing or whose inputs changed since the
+        last build.
 
-    def build(self, config):
+        Parameters
+        ----------
+        compiler_config: dict
+            Compiler configuration
+
+        Returns
+        -------
+        dict
+            Mapping of outdated targets to their current inputs
+
+        """
+        manifest = self.load_manifest()
+        outdated = {}
+        for target in self.targets:
+            inputs = self.get_target_inputs(target, compiler_config)
+            missing = not (self.path_run / target).exists()
+            if missing or manifest.get(target, {}).get("hash") != _hash_inputs(inputs):
+                outdated[target] = inputs
+        return outdated
+
+    def has_to_build(self, compiler_config):
+        """Check if one or more targets have to be (re)built."""
+        return bool(self.get_outdated_targets(compiler_config))
+
+    def build(self, config, cores=None):
         """Build Nek5000 tools and third party libraries essential for a
-        simulation.
+        simulation. Only outdated targets (see :meth:`get_outdated_targets`)
+        are built and independent targets are built in parallel.
 
         Parameters
         ----------
         config: dict
             Snakemake configuration
+        cores: Optional[int]
+            Number of cores used by Snakemake. By default, the number of
+            targets or the number of processors available, whichever is lower.
 
         Returns
         -------
@@ -262,25 +503,167 @@ class _Nek5000Make(Make):
             ``True`` if workflow execution was successful.
 
         """
+        compiler_config = {key: config[key] for key in _compiler_config_keys}
+
+        # sources may have been modified since the previous build
+        self._source_revisions.clear()
+        outdated = self.get_outdated_targets(compiler_config)
+        if not outdated:
+            return True
 
-        compiler_config = {
-            key: config[key]
-            for key in (
-                "CC",
-                "FC",
-                "MPICC",
-                "MPIFC",
-                "CFLAGS",
-                "FFLAGS",
+        if cores is None:
+            cores = min(len(outdated), nproc_available())
+
+        with ExitStack() as stack:
+            # Locks are always acquired in the same order to avoid deadlocks
+            paths_lock = []
+            for target in outdated:
+                lock = self.get_lock(target)
+                if lock.lock_file not in paths_lock:
+                    paths_lock.append(lock.lock_file)
+                    stack.enter_context(lock)
+
+            # Targets may have been built by another process meanwhile (only
+            # the manifest is read again)
+            outdated = self.get_outdated_targets(compiler_config)
+            if not outdated:
+                return True
+
+            logger.info(f"Building Nek5000 targets: {', '.join(outdated)}")
+            success = self.exec(
+                *outdated,
+                config=config,
+                force_incomplete=True,
+                forcetargets=True,
+                cores=cores,
             )
+            if success:
+                self.update_manifest(outdated)
+            return success
+
+    def get_path_core_cache(self, path_size, config):
+        """Get the directory where Nek5000 core objects compiled with a
+        specific ``SIZE`` file and compiler configuration are cached.
+
+        Parameters
+        ----------
+        path_size: str or path-like
+            Path to the ``SIZE`` file of a simulation
+        config: dict
+            Snakemake configuration
+
+        Returns
+        -------
+        Path
+
+        """
+        inputs = {key: _normalize_flags(config[key]) for key in _compiler_config_keys}
+        # Include flags are appended to FFLAGS while generating the makefile
+        inputs["includes"] = _normalize_flags(config.get("includes", ""))
+        inputs["versions"] = [
+            _get_compiler_version(config[key]) for key in ("MPICC", "MPIFC")
+        ]
+        # updated or locally modified Nek5000 sources
+        inputs["source"] = self.get_source_revision("core")
+        if not inputs["source"]:
+            # not a git repository
+            inputs["source"] = _hash_stats(self.path_run / "core")
+
+        digest = hashlib.sha256(Path(path_size).read_bytes())
+        digest.update(_hash_inputs(inputs).encode())
+        return self.path_core_cache / digest.hexdigest()[:16]
+
+    def _get_core_objects(self, config):
+        """Names of object files compiled from Nek5000 core sources, excluding
+        the user objects of the case."""
+        names = {
+            f"{path.stem}.o"
+            for path in (self.path_run / "core").rglob("*")
+            if path.suffix in (".f", ".c")
         }
+        user_objects = {f"{config['CASE']}.o"}
+        user_objects.update(Path(obj).name for obj in config.get("objects", "").split())
+        return names - user_objects
 
-        with self.lock:
-            # Only one process can inspect at a time. No timeout
-            if self.has_to_build(compiler_config):
-                return self.exec(*self.targets, config=config, force_incomplete=True)
-            else:
-                return True
+    def restore_core_objects(self, path_run, config):
+        """Copy cached Nek5000 core objects into the ``obj`` directory of a
+        simulation, so that ``make`` only compiles the user code.
+
+        Parameters
+        ----------
+        path_run: str or path-like
+            Path to the simulation directory containing the ``SIZE`` file
+        config: dict
+            Snakemake configuration
+
+        Returns
+        -------
+        int
+            Number of restored objects
+
+        """
+        path_run = Path(path_run)
+        path_cache = self.get_path_core_cache(path_run / "SIZE", config)
+        if not path_cache.exists():
+            logger.info(f"No cached Nek5000 core objects in {path_cache}")
+            return 0
+
+        path_obj = path_run / "obj"
+        path_obj.mkdir(exist_ok=True)
+
+        nb_restored = 0
+        for path_src in path_cache.glob("*.o"):
+            path_dest = path_obj / path_src.name
+            if not path_dest.exists():
+                # copyfile sets a new modification time, which is newer than
+                # any source file of the simulation
+                shutil.copyfile(path_src, path_dest)
+                nb_restored += 1
+
+        logger.info(f"Restored {nb_restored} Nek5000 core objects from {path_cache}")
+        return nb_restored
+
+    def cache_core_objects(self, path_run, config):
+        """Save compiled Nek5000 core objects of a simulation into the cache.
+        Nothing is done if a cache already exists for the same ``SIZE`` file
+        and compiler configuration.
+
+        Parameters
+        ----------
+        path_run: str or path-like
+            Path to the simulation directory containing the ``SIZE`` file and
+            the ``obj`` directory
+        config: dict
+            Snakemake configuration
+
+        Returns
+        -------
+        Path
+            Path to the cache directory
+
+        """
+        path_run = Path(path_run)
+        path_cache = self.get_path_core_cache(path_run / "SIZE", config)
+        if path_cache.exists():
+            return path_cache
+
+        self.path_core_cache.mkdir(exist_ok=True)
+        with FileLock(path_cache.with_suffix(".lock")):
+            # Another process may have populated the cache meanwhile
+            if path_cache.exists():
+                return path_cache
+
+            path_tmp = Path(tempfile.mkdtemp(dir=self.path_core_cache))
+            for name in self._get_core_objects(config):
+                path_src = path_run / "obj" / name
+                if path_src.exists():
+                    shutil.copy2(path_src, path_tmp / name)
+
+            path_tmp.chmod(0o755)
+            os.replace(path_tmp, path_cache)
+
+        logger.info(f"Cached Nek5000 core objects in {path_cache}")
+        return path_cache
 
 
 def snek_make():
@@ -367,6 +750,13 @@ def snek_make_nek():
         action="store_true",
         help="Apply git-clean on Nek5000 repository before building.",
     )
+    parser.add_argument(
+        "-j",
+        "--cores",
+        type=int,
+        default=None,
+        help="Number of cores used to build targets in parallel.",
+    )
 
     args = parser.parse_args()
 
@@ -390,6 +780,12 @@ def snek_make_nek():
             subprocess.run(["git", "clean", "-xdf"])
 
     if args.rule is None:
-        make.build(config)
+        make.build(config, cores=args.cores)
+    elif args.rule in make.targets:
+        compiler_config = {key: config[key] for key in _compiler_config_keys}
+        inputs = make.get_target_inputs(args.rule, compiler_config)
+        with make.get_lock(args.rule):
+            if make.exec(args.rule, nproc=4, config=config, cores=args.cores or 1):
+                make.update_manifest({args.rule: inputs})
     else:
-        make.exec(args.rule, nproc=4, config=config)
+        make.exec(args.rule, nproc=4, config=config, cores=args.cores or 1)
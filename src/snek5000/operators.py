@@ -11,6 +11,7 @@ import math
 import sys
 from collections import OrderedDict
 from math import pi
+from typing import NamedTuple, Optional, Tuple
 
 from .log import logger
 from .util import docstring_params
@@ -44,6 +45,66 @@ def next_power(value, base=2):
     return base**exponent
 
 
+def round_size(value, rounding="power2"):
+    """Round up a dimension of the SIZE file following a rounding policy.
+
+    Parameters
+    ----------
+    value: int
+        Value to round up (for example the number of elements)
+    rounding: str
+        Rounding policy:
+
+        - ``"power2"``: next power of 2 (see :func:`next_power`), so that
+          similar meshes share the same SIZE file (and the same compiled
+          objects) at the cost of up to twice the memory needed.
+        - ``"exact"``: no rounding, the tightest SIZE file.
+        - ``"multiple_<n>"``: next multiple of ``n`` (for example
+          ``"multiple_8"``), a compromise between both.
+
+    Returns
+    -------
+    int
+
+    """
+    value = int(value)
+    if rounding == "power2":
+        return next_power(value)
+    elif rounding == "exact":
+        return value
+    elif rounding.startswith("multiple_"):
+        try:
+            multiple = int(rounding[len("multiple_") :])
+        except ValueError:
+            multiple = 0
+        if multiple > 0:
+            return multiple * math.ceil(value / multiple)
+
+    raise ValueError(
+        f"Unknown rounding policy {rounding!r}. Expected 'power2', 'exact' or "
+        "'multiple_<n>' with n a positive integer."
+    )
+
+
+class NprocRecommendation(NamedTuple):
+    """Result of :meth:`Operators.recommend_nproc`."""
+
+    #: recommended number of MPI ranks for the run, compatible with
+    #: ``params.oper.nproc_min`` and ``params.oper.nproc_max``
+    nproc: int
+    #: minimum number of MPI ranks (``lpmin``) for which the memory per rank fits
+    nproc_min: int
+    #: maximum number of MPI ranks with an efficient strong scaling
+    nproc_max: int
+    #: numbers of MPI ranks between ``nproc_min`` and ``nproc_max`` with a good
+    #: load balance
+    candidates: Tuple[int, ...]
+    #: number of grid points per rank for ``nproc``
+    points_per_rank: float
+    #: memory per rank (bytes) of a SIZE file with ``lpmin = nproc_min``
+    memory_per_rank: Optional[int] = None
+
+
 class Operators:
     """Container for parameters and writing :ref:`box <nek:tools_genbox>` and
     :ref:`SIZE <nek:case_files_size>` files.
@@ -54,7 +115,9 @@ class Operators:
     ==============  ======================== ==================================
     SIZE            `properties`             Comment
     ==============  ======================== ==================================
-    ``lelg``        :any:`max_n_seq`         Max. number of elements globally
+    ``lelg``        :any:`max_n_seq`         | Max. number of elements globally,
+                                               rounded up following
+                                             | :any:`size_rounding`.
     ``lelt``        :any:`max_n_loc`         | Max. number of elements per
                                                processor (should be not smaller
                                              | than ``lelg/lpmin``, i.e.
@@ -232,7 +295,7 @@ SIZE            params.oper.elem      Comment
 
 """
         )
-        attribs = {"fast_diag": False}
+        attribs = {"fast_diag": False, "size_rounding": "power2"}
         params.oper._set_child("misc", attribs=attribs)
         params.oper.misc._set_doc(
             r"""
@@ -247,6 +310,11 @@ SIZE            params.oper.misc      Comment
                                         otherwise.
 ==========      ===================   =========================================
 
+- ``size_rounding``: str
+    Rounding policy of the number of elements in the SIZE file (``lelg``,
+    ``lelt``, ``lelx``, ``lely`` and ``lelz``): ``"power2"`` (default),
+    ``"exact"`` or ``"multiple_<n>"``. See :func:`snek5000.operators.round_size`.
+
 """
         )
 
@@ -254,14 +322,67 @@ SIZE            params.oper.misc      Comment
         self.params = sim.params if sim else params
         self.axes = ("x", "y", "z")
 
+    @property
+    def size_rounding(self):
+        """Rounding policy of the SIZE file (``params.oper.misc.size_rounding``,
+        ``"power2"`` if the parameter is missing as for old simulations)."""
+        return getattr(self.params.oper.misc, "size_rounding", "power2")
+
+    @property
+    def nb_elements(self):
+        """Number of elements of the mesh."""
+        oper = self.params.oper
+        if oper.dim == 2:
+            return oper.nx * oper.ny
+        else:
+            return oper.nx * oper.ny * oper.nz
+
+    def optimize_size(self, nproc=None, rounding="exact"):
+        """Compute the element dimensions of the SIZE file for the actual mesh
+        and a number of MPI ranks.
+
+        Parameters
+        ----------
+        nproc: int
+            Minimum number of MPI ranks of the runs, by default
+            ``params.oper.nproc_min``.
+        rounding: str
+            Rounding policy (see :func:`round_size`), by default ``"exact"``
+            for the tightest values.
+
+        Returns
+        -------
+        dict
+            Values of ``lelg``, ``lelt``, ``lelx``, ``lely`` and ``lelz``
+
+        Examples
+        --------
+        >>> params.oper.misc.size_rounding = "exact"  # to write the SIZE file
+        >>> sim.oper.optimize_size(nproc=16)
+        {'lelg': 1728, 'lelt': 108, 'lelx': 12, 'lely': 12, 'lelz': 12}
+
+        """
+        oper = self.params.oper
+        if nproc is None:
+            nproc = oper.nproc_min
+        if nproc < 1:
+            raise ValueError(f"nproc should be a positive integer, not {nproc}")
+
+        lelg = round_size(self.nb_elements, rounding)
+        return {
+            "lelg": lelg,
+            # Nek5000 distributes the elements evenly (nelgt/np elements per
+            # rank, plus one for the first nelgt % np ranks)
+            "lelt": math.ceil(lelg / nproc),
+            "lelx": round_size(oper.nx, rounding),
+            "lely": round_size(oper.ny, rounding),
+            "lelz": round_size(oper.nz, rounding),
+        }
+
     @property
     def max_n_seq(self):
         """Equivalent to ``lelg``."""
-        params = self.params
-        if params.oper.dim == 2:
-            return next_power(params.oper.nx * params.oper.ny)
-        else:
-            return next_power(params.oper.nx * params.oper.ny * params.oper.nz)
+        return round_size(self.nb_elements, self.size_rounding)
 
     @property
     def max_n_loc(self):
@@ -273,17 +394,17 @@ SIZE            params.oper.misc      Comment
     @property
     def max_nx(self):
         """Equivalent to ``lelx``."""
-        return next_power(self.params.oper.nx)
+        return round_size(self.params.oper.nx, self.size_rounding)
 
     @property
     def max_ny(self):
         """Equivalent to ``lely``."""
-        return next_power(self.params.oper.ny)
+        return round_size(self.params.oper.ny, self.size_rounding)
 
     @property
     def max_nz(self):
         """Equivalent to ``lelz``."""
-        return next_power(self.params.oper.nz)
+        return round_size(self.params.oper.nz, self.size_rounding)
 
     @property
     def max_order_time(self):
@@ -424,7 +545,113 @@ SIZE            params.oper.misc      Comment
         """Equivalent to ``lcvelt``."""
         return self.max_n_loc if self.params.nek.cvode._enabled else 1
 
-    def memory_required(self):
+    def memory_breakdown(self, nproc=None, rounding=None):
+        """Detailed model of the memory used per MPI rank by the large static
+        arrays of Nek5000, computed from the SIZE parameters.
+
+        The arrays are counted per group of common blocks (mostly in the
+        include files ``SOLN``, ``GEOM``, ``MASS`` and ``TOPOL`` of Nek5000).
+        This is an estimate: small arrays and the memory used by MPI and
+        external libraries are not included.
+
+        Parameters
+        ----------
+        nproc: int
+            Minimum number of MPI ranks (``lpmin``) for which the SIZE file
+            would be written, by default ``params.oper.nproc_min``. Since the
+            arrays are static, ``lelt`` (and therefore the memory per rank)
+            depends on this value and not on the actual number of ranks.
+        rounding: str
+            Rounding policy of the SIZE file (see :func:`round_size`), by
+            default :any:`size_rounding`.
+
+        Returns
+        -------
+        dict
+            Memory in bytes per group of arrays, and the ``"total"``
+
+        """
+        params = self.params
+        oper = params.oper
+        if rounding is None:
+            rounding = self.size_rounding
+        size = self.optimize_size(nproc, rounding)
+        lelt = size["lelt"]
+        lelg = size["lelg"]
+
+        ldim = oper.dim
+        equation = params.nek.problemtype.equation.lower()
+
+        def nb_points(order):
+            return order**ldim
+
+        n1 = nb_points(self.order)
+        n2 = nb_points(self.order_pressure)
+        nd = nb_points(self.order_dealiasing)
+        nm = nb_points(self.order_mesh_solver)
+        # points on the faces of an element
+        nf = 2 * ldim * self.order ** (ldim - 1)
+
+        lorder = self.max_order_time
+        lorder2 = max(1, lorder - 2)
+        ldimt = max(1, oper.scalars)
+        mxprev = oper.max.dim_proj
+        lgmres = oper.max.dim_krylov
+        # element dimensions of the optional arrays (1 if not used)
+        lbelt = lelt if "mhd" in equation else 1
+        lpelt = lelt if "lin" in equation else 1
+        lcvelt = lelt if params.nek.cvode._enabled else 1
+
+        # number of double precision values per group
+        nb_reals = {
+            # vx, vy, vz, lagged values, extrapolated terms and forcing
+            "velocity": ldim * n1 * lelt * (1 + (lorder - 1) + 2 + 1),
+            # pr, prlag, qtl, usrdiv
+            "pressure": n2 * lelt * (1 + lorder2 + 2),
+            # t, tlag, extrapolated terms and source term
+            "scalars": ldimt * n1 * lelt * (1 + (lorder - 1) + 2 + 1),
+            # vdiff and vtrans
+            "properties": 2 * (ldimt + 1) * n1 * lelt,
+            # coordinates, metrics, Jacobians, geometric factors, mass
+            # matrices and surface normals, tangents and areas
+            "geometry": (
+                n1 * lelt * (3 + 9 + 2 + 6 + 4 + (lorder - 1))
+                + n2 * lelt * (3 + 9 + 1 + 2)
+                + nf * lelt * 10
+            ),
+            # convecting field on the fine (dealiasing) mesh for all
+            # time levels
+            "dealiasing": ldim * nd * lelt * (1 + lorder + 1),
+            # residual projection for pressure and scalars
+            "projection": 2 * mxprev * (n2 * lelt + oper.max.scalars_proj * n1 * lelt),
+            # Krylov vectors of GMRES for the pressure
+            "gmres": (2 * lgmres + 4) * n2 * lelt + lgmres * (lgmres + 4),
+            # mesh velocity
+            "mesh_solver": ldim * nm * lelt * (1 + lorder),
+            # magnetic field and magnetic pressure
+            "mhd": (
+                ldim * n1 * lbelt * (1 + (lorder - 1) + 2 + 1)
+                + n2 * lbelt * (1 + lorder2)
+            ),
+            # perturbation fields
+            "linear": oper.max.perturb
+            * (
+                (ldim + ldimt) * n1 * lpelt * (1 + (lorder - 1) + 2)
+                + n2 * lpelt * (1 + lorder2)
+            ),
+            # state and work vectors of CVODE
+            "cvode": 10 * ldimt * n1 * lcvelt,
+            # work arrays of the scratch common blocks (SCRNS, SCRVH, ...)
+            "scratch": 40 * n1 * lelt,
+        }
+
+        breakdown = {name: 8 * value for name, value in nb_reals.items()}
+        # global element maps (gllel, gllnid, ...)
+        breakdown["global"] = 12 * lelg
+        breakdown["total"] = sum(breakdown.values())
+        return breakdown
+
+    def memory_required(self, rounding=None, report=False, detailed=False):
         """According to Nek5000 :ref:`nek:faq` the following estimate is made
 
         ::
@@ -432,6 +659,18 @@ SIZE            params.oper.misc      Comment
               lx1*ly1*lz1*lelt * 3000byte + lelg * 12byte + MPI + optional libraries
               (e.g. CVODE)
 
+        Parameters
+        ----------
+        rounding: str
+            Rounding policy of the SIZE file (see :func:`round_size`), by
+            default :any:`size_rounding`.
+        report: bool
+            Log the memory required and the savings compared to the
+            ``"power2"`` rounding policy.
+        detailed: bool
+            Use the detailed model of :meth:`memory_breakdown` instead of the
+            estimate of the FAQ.
+
         Returns
         -------
         memory_required: int
@@ -440,15 +679,169 @@ SIZE            params.oper.misc      Comment
         """
         params = self.params
         elem = params.oper.elem
+        if rounding is None:
+            rounding = self.size_rounding
 
         lx1 = elem.order
         ldim = params.oper.dim
         ly1 = lx1
         lz1 = 1 + (ldim - 2) * (lx1 - 1)
-        lelt = self.max_n_loc
-        lelg = self.max_n_seq
+        size = self.optimize_size(rounding=rounding)
+        lelt = size["lelt"]
+        lelg = size["lelg"]
+
+        if detailed:
+            memory = self.memory_breakdown(rounding=rounding)["total"]
+        else:
+            memory = lx1 * ly1 * lz1 * lelt * 3000 + lelg * 12
+
+        if report:
+            memory_power2 = self.memory_required(rounding="power2", detailed=detailed)
+            saved = memory_power2 - memory
+            logger.info(
+                f"Memory required per MPI rank with {rounding = }: "
+                f"{memory / 1024**2:.1f} MiB (lelg = {lelg}, lelt = {lelt}). "
+                f"Saved compared to rounding = 'power2': {saved / 1024**2:.1f} MiB "
+                f"({100 * saved / memory_power2:.1f} %)"
+            )
+
+        return memory
+
+    def _get_nproc_min_memory(self, memory_per_rank):
+        """Smallest ``lpmin`` for which the memory per rank fits (bisection,
+        the memory per rank decreasing with ``lpmin``)."""
+
+        def memory(nproc):
+            return self.memory_breakdown(nproc=nproc)["total"]
+
+        low, high = 1, self.nb_elements
+        if memory(high) > memory_per_rank:
+            raise ValueError(
+                f"The simulation does not fit in {memory_per_rank} bytes per rank, "
+                f"even with one element per rank ({memory(high)} bytes)."
+            )
+        while low < high:
+            middle = (low + high) // 2
+            if memory(middle) <= memory_per_rank:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def recommend_nproc(
+        self,
+        nproc_available=None,
+        memory_per_rank=None,
+        min_points_per_rank=20_000,
+        min_elements_per_rank=1,
+        max_imbalance=1.05,
+    ):
+        """Recommend numbers of MPI ranks from the element load balance, the
+        memory model (:meth:`memory_breakdown`) and a simple strong scaling
+        model: Nek5000 scales efficiently down to about ``min_points_per_rank``
+        grid points per rank.
+
+        Parameters
+        ----------
+        nproc_available: int
+            Number of processors available (see
+            :func:`snek5000.clusters.nproc_available`).
+        memory_per_rank: int
+            Memory available per rank in bytes (for example the memory of a
+            node divided by its number of cores).
+        min_points_per_rank: int
+            Minimum number of grid points per rank for an efficient run.
+        min_elements_per_rank: int
+            Minimum number of elements per rank.
+        max_imbalance: float
+            Maximum ratio between the largest number of elements per rank and
+            the mean number of elements per rank for the candidates.
+
+        Returns
+        -------
+        NprocRecommendation
+
+        Raises
+        ------
+        ValueError
+            If the memory requires more ranks than ``nproc_available`` or
+            ``params.oper.nproc_max``.
+
+        Examples
+        --------
+        >>> recommendation = sim.oper.recommend_nproc(
+        ...     nproc_available(), memory_per_rank=2 * 1024**3
+        ... )
+        >>> sim.make.exec("run", nproc=recommendation.nproc)
 
-        return lx1 * ly1 * lz1 * lelt * 3000 + lelg * 12
+        """
+        oper = self.params.oper
+        nb_elements = self.nb_elements
+        nb_points = nb_elements * self.order**oper.dim
+
+        if memory_per_rank is None:
+            nproc_min = 1
+        else:
+            nproc_min = self._get_nproc_min_memory(memory_per_rank)
+
+        # the memory requirement cannot be traded against efficiency
+        for nproc_limit, name in (
+            (nproc_available, "ranks available"),
+            (oper.nproc_max, "params.oper.nproc_max"),
+        ):
+            if nproc_limit is not None and nproc_min > nproc_limit:
+                raise ValueError(
+                    f"The memory requires at least {nproc_min} MPI ranks, more "
+                    f"than the {nproc_limit} {name}."
+                )
+
+        nproc_max = max(
+            1,
+            min(
+                nb_elements // min_elements_per_rank,
+                nb_points // min_points_per_rank,
+            ),
+        )
+        if nproc_available is not None:
+            nproc_max = min(nproc_max, nproc_available)
+        if nproc_max < nproc_min:
+            logger.warning(
+                f"The memory requires at least {nproc_min} MPI ranks, more than "
+                f"the {nproc_max} ranks for an efficient run."
+            )
+            nproc_max = nproc_min
+
+        def imbalance(nproc):
+            return math.ceil(nb_elements / nproc) * nproc / nb_elements
+
+        candidates = tuple(
+            nproc
+            for nproc in range(nproc_min, nproc_max + 1)
+            if imbalance(nproc) <= max_imbalance
+        )
+
+        # the run has to be compatible with lpmin and lpmax of the SIZE file
+        low = max(nproc_min, oper.nproc_min)
+        high = min(nproc_max, oper.nproc_max)
+        compatible = [nproc for nproc in candidates if low <= nproc <= high]
+        if compatible:
+            nproc = compatible[-1]
+        else:
+            nproc = min(max(nproc_max, oper.nproc_min), oper.nproc_max)
+            logger.warning(
+                f"No well balanced number of MPI ranks between {low} and {high}: "
+                f"using {nproc}. Consider modifying params.oper.nproc_min "
+                "and params.oper.nproc_max."
+            )
+
+        if memory_per_rank is None:
+            memory = None
+        else:
+            memory = self.memory_breakdown(nproc=nproc_min)["total"]
+
+        return NprocRecommendation(
+            nproc, nproc_min, nproc_max, candidates, nb_points / nproc, memory
+        )
 
     def _str_Ln(self):
         params = self.params.oper
@@ -3,12 +3,10 @@
 import inspect
 import logging
 import os
-import pkgutil
 import shutil
 import stat
 import textwrap
 import warnings
-from importlib import resources
 from itertools import chain
 from pathlib import Path
 from socket import gethostname
@@ -23,10 +21,12 @@ from fluidsim_core.params import iter_complete_params
 from snek5000 import __version__, get_snek_resource, logger
 from snek5000.make import _Nek5000Make
 from snek5000.params import _save_par_file
-from snek5000.solvers import get_solver_package, is_package
-from snek5000.util import docstring_params
-from snek5000.util.files import bisect_nek_files_by_time
+from snek5000.solvers import get_solver_package
+from snek5000.util import docstring_params, scan_dir
+from snek5000.util.compress import suffix_compressed
+from snek5000.util.files import bisect_nek_files_by_time, copy_file, list_field_files
 from snek5000.util.smake import append_debug_flags, set_compiler_verbosity
+from snek5000.util.timings import Timings
 
 from . import _make_path_session
 
@@ -88,6 +88,11 @@ class Output(OutputCore):
 
     _config_filename = "config_simul.yml"
 
+    #: Suffixes of the case files which can be hard linked (see :meth:`copy`).
+    #: Other files (par, box, SIZE, makefile_usr.inc, ...) are rewritten in
+    #: place and would modify the solver package.
+    suffixes_hardlink = (".re2", ".ma2", ".co2", ".map")
+
     @property
     def excludes(self):
         """Prefixes and suffixes of files which should be excluded from being
@@ -178,6 +183,7 @@ class Output(OutputCore):
             "HAS_TO_SAVE": True,
             "sub_directory": "",
             "session_id": 0,
+            "link_case_files": "reflink",
         }
         params._set_child("output", attribs=attribs)
         params.output._set_doc(
@@ -191,6 +197,12 @@ class Output(OutputCore):
     - ``session_id``: int (default: 0) Determines the sub-directory,
       ``path_session`` in which the field files would be generated during
       runtime. The session directory takes the form `session_{session_id}`.
+    - ``link_case_files``: str (default: "reflink") How the large case files
+      are created in the directory of the simulation: ``"copy"``,
+      ``"reflink"`` (clone with copy-on-write if the filesystem supports it,
+      copy otherwise) or ``"hardlink"``. Hard links are only used for the
+      files with a suffix in ``Output.suffixes_hardlink`` (mesh files), which
+      snek5000 never modifies in place.
 
     .. note::
 
@@ -428,50 +440,68 @@ class Output(OutputCore):
 
         return sim_repr_maker
 
-    def _get_resources(self, package=None):
-        """Get a generator of resources (files) in a package, excluding
-        directories (subpackages).
+    def _get_case_files(self):
+        """Discover the case files in the solver package and its subpackages
+        (directories containing an ``__init__.py`` file) in a single walk of
+        the filesystem, without importing the subpackages.
 
-        :returns: generator
+        :returns: dict: relative path of the (sub)package as a tuple of
+                  directory names -> names of the case files
 
         """
         excludes = self.excludes
-        if not package:
-            package = self.package
+        prefixes = tuple(excludes["prefix"])
+        suffixes = tuple(excludes["suffix"])
 
-        try:
-            contents_pkg = resources.contents(package)
-        except ImportError:
+        case_files = {}
+        root = self.path_solver_package
+        if not root.is_dir():
             raise FileNotFoundError(
-                f"Cannot resolve subpackage name_solver={package} "
-                f"at path_solver_package={self.path_solver_package}"
+                f"Cannot resolve package={self.package} "
+                f"at path_solver_package={root}"
             )
 
-        return (
-            f
-            for f in contents_pkg
-            if (
-                resources.is_resource(package, f)
-                and not any(f.startswith(ext) for ext in excludes["prefix"])
-                and not any(f.endswith(ext) for ext in excludes["suffix"])
-            )
-        )
+        to_visit = [()]
+        while to_visit:
+            parts = to_visit.pop()
+            names = []
+            for name, entry in scan_dir(root.joinpath(*parts)).items():
+                if entry.is_dir():
+                    if "." not in name and os.path.isfile(
+                        os.path.join(entry.path, "__init__.py")
+                    ):
+                        to_visit.append((*parts, name))
+                elif not name.startswith(prefixes) and not name.endswith(suffixes):
+                    names.append(name)
+            case_files[parts] = sorted(names)
+
+        return case_files
 
     def _get_subpackages(self):
-        """Get a dictionary of subpackages with values generated by
-        :meth:`_get_resources`.
+        """Get a dictionary of subpackages with values listing their case
+        files.
 
         :returns: dict
 
         """
-        root = self.path_solver_package
-        subpackages = {
-            subpkg.name.replace(f"{root.name}.", ""): self._get_resources(subpkg.name)
-            for subpkg in pkgutil.walk_packages([str(root)], prefix=f"{self.package}.")
-            if is_package(subpkg)
+        return {
+            ".".join(parts): names
+            for parts, names in self._get_case_files().items()
+            if parts
         }
 
-        return subpackages
+    def get_relative_paths(self):
+        """Get the set of the paths of all case files, relative to
+        :meth:`get_path_solver_package`.
+
+        :returns: set
+
+        """
+        return {
+            Path(*parts, name)
+            for parts, names in self._get_case_files().items()
+            for name in names
+        }
 
     def get_paths(self):
         """Get a list of paths to all case files.
@@ -479,75 +509,52 @@ class Output(OutputCore):
         :returns: list
 
         """
-        paths = []
-
+        root = self.path_solver_package
         # abl.usr -> /path/to/abl/abl.usr
-        paths += [
-            self.path_solver_package / resource for resource in self._get_resources()
-        ]
+        # toolbox/main.f -> /path/to/abl/toolbox/main.f
+        return sorted(root / path for path in self.get_relative_paths())
 
-        for subpkg, res in self._get_subpackages().items():
-            # toolbox -> /path/to/abl/toolbox
-            subpkg_root = self.path_solver_package / subpkg.replace(".", os.sep)
-            # main.f -> /path/to/abl/toolbox/main.f
-            paths += [subpkg_root / resource for resource in res]
-        return paths
-
-    def copy(self, new_dir, force=False):
+    def copy(self, new_dir, force=False, link=None, link_min_size=2**20):
         """Copy case files to a new directory. The directory does not have to be present.
 
         :param new_dir: A str or Path-like instance pointing to the new directory.
         :param force: Force copy would overwrite if files already exist.
+        :param link: ``"hardlink"`` or ``"reflink"`` to link large case files
+                     instead of copying them (see
+                     :func:`snek5000.util.files.copy_file`). Only the files
+                     with a suffix in :attr:`suffixes_hardlink` are hard
+                     linked, the other ones are reflinked.
+        :param link_min_size: Minimum size (in bytes) of the files to link.
 
         """
         # Avoid race conditions! Should be only executed by rank 0.
         if mpi.rank != 0:
             return
 
-        abs_paths = self.get_paths()
-        subpackages = self._get_subpackages()
+        if link == "copy":
+            link = None
 
         path_solver_package = self.path_solver_package
-
-        def conditional_ignore(src, names):
-            """Ignore if not found in ``abs_paths``."""
-            src = Path(src)
-            include = abs_paths + [
-                path_solver_package / subpkg for subpkg in subpackages
-            ]
-            exclude = tuple(
-                name
-                for name in names
-                if not any((src / name) == path for path in include)
-            )
-
-            logger.debug(
-                "".join(
-                    (
-                        f"- src: {src}",
-                        "\n- include:",
-                        " ".join(Path(i).name for i in include),
-                        "\n- exclude:",
-                        " ".join(Path(i).name for i in exclude),
-                    )
-                )
-            )
-            return exclude
-
         new_root = Path(new_dir)
-        # `dirs_exist_ok`` new in Python 3.8
-        shutil.copytree(
-            src=path_solver_package,
-            dst=new_root,
-            symlinks=False,
-            ignore=conditional_ignore,
-            dirs_exist_ok=True,
-        )
+
+        for parts, names in self._get_case_files().items():
+            src_dir = path_solver_package.joinpath(*parts)
+            dst_dir = new_root.joinpath(*parts)
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            entries = scan_dir(src_dir)
+            for name in names:
+                if link and entries[name].stat().st_size >= link_min_size:
+                    link_file = link
+                    if link == "hardlink" and not name.endswith(self.suffixes_hardlink):
+                        link_file = "reflink"
+                    how = copy_file(src_dir / name, dst_dir / name, link_file)
+                else:
+                    how = copy_file(src_dir / name, dst_dir / name)
+                logger.debug(f"{how}: {src_dir / name} -> {dst_dir / name}")
 
         # special case for .usr.f: copy to .usr
-        paths_usr_f = list(path_solver_package.glob("*.usr.f"))
-        for path_usr_f in paths_usr_f:
-            shutil.copyfile(path_usr_f, new_root / path_usr_f.stem)
+        for name in scan_dir(path_solver_package, "*.usr.f"):
+            shutil.copyfile(path_solver_package / name, new_root / name[:-2])
 
     def write_box(self, template):
         """Write <case name>.box file from box.j2 template.
@@ -650,10 +657,18 @@ class Output(OutputCore):
         return config
 
     @staticmethod
-    def build_nek5000(config):
+    def build_nek5000(config, cores=None):
         """Build Nek5000, if needed. This method is automatically invoked
         during :meth:`post_init`.
 
+        Parameters
+        ----------
+        config: dict
+            Snakemake configuration
+        cores: Optional[int]
+            Number of cores used to build Nek5000 tools and libraries in
+            parallel. See :meth:`snek5000.make._Nek5000Make.build`.
+
         Examples
         --------
         If compiler configuration is changed via a script after Simulation
@@ -666,7 +681,7 @@ class Output(OutputCore):
 
         """
         nek5000 = _Nek5000Make()
-        if not nek5000.build(config):
+        if not nek5000.build(config, cores=cores):
             raise RuntimeError("Nek5000 build failed.")
 
     @staticmethod
@@ -704,7 +719,9 @@ class Output(OutputCore):
             os.chmod(path, stat.S_IRWXU | stat.S_IRGRP | stat.S_IWGRP | stat.S_IROTH)
 
     def get_field_file(self, prefix="", index=-1, t_approx=None):
-        """Get a field file from ``path_session``.
+        """Get a field file from ``path_session``. Compressed field files
+        (see :mod:`snek5000.util.compress`) are returned only if the
+        corresponding uncompressed field files do not exist.
 
         Parameters
         ----------
@@ -731,20 +748,26 @@ class Output(OutputCore):
             raise ValueError("Specify either index or t_approx at a time, not both.")
         elif index > 0:
             pattern = f"{prefix}{case}0.f{index:05d}"
-            file = path_session / pattern
-            if file.exists():
-                return file
-            else:
-                logger.warning(
-                    f"{file} not found. Attempting to index a file from a "
-                    "sorted list of field files"
-                )
+            for file in (
+                path_session / pattern,
+                path_session / (pattern + suffix_compressed),
+            ):
+                if file.exists():
+                    return file
+            logger.warning(
+                f"{path_session / pattern} not found. Attempting to index a "
+                "file from a sorted list of field files"
+            )
         elif t_approx:
             index = slice(None)
 
         pattern = f"{prefix}{case}0.f?????"
+        # compressed field files (see snek5000.util.compress) are used only if
+        # the corresponding uncompressed files do not exist
+        # (single listing of the session, headers cached by
+        # snek5000.util.files.get_field_file_header)
         try:
-            result = sorted(path_session.glob(pattern))[index]
+            result = list_field_files(path_session, case, prefix)[index]
             if t_approx:
                 result = bisect_nek_files_by_time(result, t_approx)
 
@@ -765,8 +788,10 @@ class Output(OutputCore):
             print(f"path_run: {self.path_run}")
             logger.info(f"session_id: {self.params.session_id}")
 
+        timings = self._get_timings()
+
         # This also calls _save_info_solver_params_xml
-        with stdout_redirected():
+        with stdout_redirected(), timings.phase("save_params"):
             # We gather objects to print within Snek5000
             super().post_init()
 
@@ -774,13 +799,29 @@ class Output(OutputCore):
 
         # Write source files to compile the simulation
         if mpi.rank == 0 and self._has_to_save and self.sim.params.NEW_DIR_RESULTS:
-            self.copy(self.path_run)
-            config = self.write_snakemake_config()
-            self.build_nek5000(config)
-            self.post_init_create_additional_source_files()
+            with timings.phase("copy"):
+                link = getattr(self.sim.params.output, "link_case_files", "reflink")
+                self.copy(self.path_run, link=link)
+            with timings.phase("write_snakemake_config"):
+                config = self.write_snakemake_config()
+            with timings.phase("build_nek5000"):
+                self.build_nek5000(config)
+            with timings.phase("render_templates"):
+                self.post_init_create_additional_source_files()
+
+    def _get_timings(self):
+        """Timings of the simulation (see :mod:`snek5000.util.timings`), or a
+        new :class:`snek5000.util.timings.Timings` if the simulation has none.
+
+        """
+        timings = getattr(self.sim, "timings", None)
+        if timings is None:
+            timings = Timings()
+        return timings
 
     def post_init_create_additional_source_files(self):
         """Create the .box, SIZE and makefile_usr files from their template"""
+        timings = self._get_timings()
         for name in ("box", "size", "makefile_usr"):
             try:
                 template = getattr(self, f"template_{name}")
@@ -788,7 +829,8 @@ class Output(OutputCore):
                 pass
             else:
                 if template is not None:
-                    getattr(self, f"write_{name}")(template)
+                    with timings.phase(name):
+                        getattr(self, f"write_{name}")(template)
 
     def _save_info_solver_params_xml(self, replace=False):
         """Saves the par file, along with ``params_simul.xml`` and
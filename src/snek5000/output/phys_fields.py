@@ -41,6 +41,7 @@ class PhysFields(PhysFields4Snek5000):
             #  pv.ReaderParaviewStats,
             pm.ReaderPymech,
             pm.ReaderPymechStats,
+            pm.ReaderPymechArchive,
         ]
         if classes is not None:
             avail_classes.extend(classes)
@@ -13,6 +13,84 @@ from snek5000 import mpi
 # %load_ext iawk
 
 
+def _make_regex(pressure_solver="gmres"):
+    """Compile the regular expression matching the lines of the log parsed by
+    :class:`PrintStdOut` and :class:`StdOutParser`.
+
+    Returns
+    -------
+    expr: re.Pattern
+        Alternation of groups named ``_step``, ``_pressure`` and ``_fluid``
+    keys: dict
+        Names of the groups of each kind of line
+
+    """
+    # Parse text starting with Step
+    # https://regex101.com/r/enFOAg/1
+    pattern_step = r"""^Step          # For all lines starting with Step
+            \s*            # Followed by some whitespaces
+            (?P<it>\d+)    # 0: Capture timestep which are integers
+            .*             # Followed by some characters until
+            t=\s*          # t=spaces
+            (?P<t>\S+)     # 1: Capture t: any non-whitespace char
+            ,\s*           # comma and spaces
+            DT=\s*         # DT=spaces
+            (?P<dt>\S+)    # 2: Capture DT: any non-whitespace char
+            ,\s*           # comma and spaces
+            C=\s*          # C=spaces
+            (?P<CFL>\S+)   # 3: Capture C: any non-whitespace char
+            (?:            # Optionally (not in old logs) on the same line
+            [\ \t]+
+            (?P<elapsed>\S+)       # 4: Capture the elapsed wall time
+            [\ \t]+
+            (?P<elapsed_step>\S+)  # 5: Capture the wall time of the step
+            )?
+        """
+    # TODO: add undocumented params.nek.pressure.solver parameter
+    # See Line 445 in Nek5000/core/reader_par.f
+    pattern_pressure = rf"""^\ +
+            (?P<it2>\d+)
+            .*
+            PRES\ {pressure_solver}    # For all lines containing a string like PRES gmres
+            \s+
+            (?P<pres_it>\d+)
+            \s+
+            (?P<pres_div>\S+)
+            \s+
+            (?P<pres_div0>\S+)
+            \s+
+            (?P<pres_tol>\S+)
+            \s+
+            (?P<pres_etime>\S+)
+            \s+
+            (?P<pres_etime1>\S+)
+        """
+    pattern_fluid = r"""^\ +
+            (?P<it3>\d+)
+            \s+
+            Fluid\ done    # For all lines like "2  Fluid done  1.4E-01  2.3E-01"
+            \s+
+            \S+
+            \s+
+            (?P<fluid_etime>\S+)  # Capture the wall time of the fluid solver
+        """
+    patterns = {
+        "step": pattern_step,
+        "pressure": pattern_pressure,
+        "fluid": pattern_fluid,
+    }
+    expr = re.compile(
+        "|".join(f"(?P<_{kind}>{pattern})" for kind, pattern in patterns.items()),
+        re.VERBOSE | re.MULTILINE,
+    )
+    # groups of each pattern, the first one being the time step index
+    keys = {
+        kind: tuple(re.compile(pattern, re.VERBOSE).groupindex)
+        for kind, pattern in patterns.items()
+    }
+    return expr, keys
+
+
 class PrintStdOut:
     """Parse standard output log files."""
 
@@ -55,77 +133,116 @@ class PrintStdOut:
 
     def load(self, pressure_solver="gmres"):
         """Load time data from the log file"""
-        # Parse text starting with Step
-        # https://regex101.com/r/enFOAg/1
-
         path_file_time = modification_date(self.path_file)
         if self.data is not None and path_file_time <= self._data_modif_time:
             return self.data
 
-        pattern_step = r"""^Step          # For all lines starting with Step
-                \s*            # Followed by some whitespaces
-                (?P<it>\d+)    # 0: Capture timestep which are integers
-                .*             # Followed by some characters until
-                t=\s*          # t=spaces
-                (?P<t>\S+)     # 1: Capture t: any non-whitespace char
-                ,\s*           # comma and spaces
-                DT=\s*         # DT=spaces
-                (?P<dt>\S+)    # 2: Capture DT: any non-whitespace char
-                ,\s*           # comma and spaces
-                C=\s*          # C=spaces
-                (?P<CFL>\S+)   # 3: Capture C: any non-whitespace char
-            """
-        # TODO: add undocumented params.nek.pressure.solver parameter
-        # See Line 445 in Nek5000/core/reader_par.f
-        pattern_pressure = rf"""^\ +
-                (?P<it2>\d+)
-                .*
-                PRES\ {pressure_solver}    # For all lines containing a string like PRES gmres
-                \s+
-                (?P<pres_it>\d+)
-                \s+
-                (?P<pres_div>\S+)
-                \s+
-                (?P<pres_div0>\S+)
-                \s+
-                (?P<pres_tol>\S+)
-                \s+
-                (?P<pres_etime>\S+)
-                \s+
-                (?P<pres_etime1>\S+)
-            """
-
-        expr = re.compile(
-            f"({pattern_step})|({pattern_pressure})",
-            re.VERBOSE | re.MULTILINE,
-        )
-
-        keys_all = tuple(expr.groupindex)
-        # Divide into two tuples at "it2"
-        idx = keys_all.index("it2")
-        keys_step, keys_pressure = keys_all[:idx], keys_all[idx:]
-
-        matches = tuple(expr.finditer(self.text))
-
-        def make_dict(keys):
-            return {key: [m[key] for m in matches] for key in keys}
+        expr, keys = _make_regex(pressure_solver)
+        rows = {kind: [] for kind in keys}
+        for match in expr.finditer(self.text):
+            kind = match.lastgroup[1:]
+            rows[kind].append(match.group(*keys[kind]))
 
-        def make_df(keys):
+        def make_df(kind):
+            columns = ("it",) + keys[kind][1:]
             return (
-                pd.DataFrame.from_dict(make_dict(keys))
-                .dropna()
-                .astype({key: int if key == "it" else float for key in keys})
+                pd.DataFrame(rows[kind], columns=columns)
+                .dropna(subset=["it"])
+                .astype({key: int if key == "it" else float for key in columns})
+                .set_index("it")
             )
 
-        df_step = make_df(keys_step).set_index("it")
-        df_pressure = (
-            make_df(keys_pressure).rename(columns={"it2": "it"}).set_index("it")
-        )
-
-        self.data = df_step.join(df_pressure)
+        df_step = make_df("step")
+        self.data = df_step.join(make_df("pressure")).join(make_df("fluid"))
         self._data_modif_time = path_file_time
         return self.data
 
+    def load_timers(self):
+        """Load the runtime statistics printed by Nek5000 at the end of a run.
+
+        Two kinds of lines are parsed: timers such as ``dssum time  120
+        1.2E-01  4.5E-02`` (name, number of calls, time and fraction of the
+        total time) and summary lines such as ``time/timestep : 8.9E-02 sec``.
+
+        Returns
+        -------
+        timers: pandas.DataFrame
+            Columns ``calls``, ``time`` and ``fraction`` indexed by the names
+            of the timers. Empty if the run has not ended.
+        summary: dict
+            Values of the summary lines (in seconds for times).
+
+        """
+        text = self.text
+        # statistics of the last run
+        for marker in ("end of time-step loop", "untime statistics"):
+            index = text.rfind(marker)
+            if index != -1:
+                break
+        else:
+            return pd.DataFrame(columns=["calls", "time", "fraction"]), {}
+        text = text[index:]
+
+        expr_timer = re.compile(
+            r"^\s*(?P<name>\w+(?:\ \w+)?)\s+time\s+(?P<calls>\d+)"
+            r"\s+(?P<time>\S+)(?:\s+(?P<fraction>\S+))?",
+            re.MULTILINE,
+        )
+        expr_summary = re.compile(
+            r"^\s*(?P<name>[^:\n]*\S)\s*:\s*(?P<value>[-+.\dEe]+)", re.MULTILINE
+        )
+
+        timers = pd.DataFrame(
+            [match.groups() for match in expr_timer.finditer(text)],
+            columns=["name", "calls", "time", "fraction"],
+        )
+        timers = timers.astype({"calls": int, "time": float, "fraction": float})
+        timers = timers.set_index("name")
+
+        summary = {}
+        for match in expr_summary.finditer(text):
+            try:
+                summary[match["name"]] = float(match["value"])
+            except ValueError:
+                pass
+
+        return timers, summary
+
+    def watch_anomalies(self, detectors=None, callbacks=None, interval=10.0):
+        """Detect anomalies in a background thread while the simulation runs.
+
+        Parameters
+        ----------
+        detectors: list of snek5000.util.anomalies.Detector
+            By default, :func:`snek5000.util.anomalies.create_detectors` with
+            ``params.nek.general.target_cfl``.
+        callbacks: list of callable
+            Called as ``callback(anomaly, path_run)``, by default only
+            :func:`snek5000.util.anomalies.log_anomaly`.
+        interval: float
+            Period of the polling of the log (s).
+
+        Returns
+        -------
+        snek5000.util.anomalies.AnomalyWatcher
+            The started thread, to be stopped with its method ``stop``.
+
+        """
+        from snek5000.util.anomalies import (
+            AnomalyDetector,
+            AnomalyWatcher,
+            create_detectors,
+        )
+
+        if detectors is None:
+            general = self.output.sim.params.nek.general
+            detectors = create_detectors(general.target_cfl)
+        path_run = self.output.path_run
+        detector = AnomalyDetector(path_run, detectors, callbacks)
+        watcher = AnomalyWatcher(path_run, detector, interval)
+        watcher.start()
+        return watcher
+
     def __call__(self, *args):
         """Print to stdout and log file simultaneously."""
         mpi.printby0(*args)
@@ -167,3 +284,101 @@ class PrintStdOut:
         ax.set_xlabel("time")
 
         fig.tight_layout()
+
+    def plot_timings(self):
+        """Plot the wall time of the time steps, of the fluid solver and of the
+        pressure solver, and the final timers of Nek5000 if available
+        (see :meth:`load_timers`)."""
+
+        df = self.load()
+        timers, _ = self.load_timers()
+
+        nrows = 2 if len(timers) else 1
+        fig, axes = plt.subplots(nrows=nrows, squeeze=False)
+        ax = axes[0, 0]
+
+        for key, label in (
+            ("elapsed_step", "time step"),
+            ("fluid_etime", "fluid solver"),
+            ("pres_etime", "pressure solver"),
+        ):
+            if key in df and df[key].notna().any():
+                ax.plot(df.t, df[key], label=label)
+        ax.set_xlabel("time")
+        ax.set_ylabel("wall time (s)")
+        ax.legend()
+
+        if len(timers):
+            ax = axes[1, 0]
+            timers = timers.sort_values("time")
+            ax.barh(timers.index, timers.time)
+            ax.set_xlabel("total wall time (s)")
+
+        fig.tight_layout()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class StdOutParser:
+    """Incremental parser of the log of a running simulation.
+
+    Lines are fed as they are written by Nek5000 and a record is returned for
+    every completed time step, with the key ``it`` and the same keys as the
+    columns of :meth:`PrintStdOut.load`.
+
+    Examples
+    --------
+    >>> parser = StdOutParser()
+    >>> for record in parser.feed(new_lines):
+    ...     print(record["it"], record["pres_it"])
+
+    """
+
+    def __init__(self, pressure_solver="gmres"):
+        self._expr, self._keys = _make_regex(pressure_solver)
+        self._current = None
+
+    def feed(self, lines):
+        """Parse new lines of the log.
+
+        Returns
+        -------
+        list of dict
+            Records of the time steps completed by these lines
+
+        """
+        records = []
+        for line in lines:
+            match = self._expr.match(line)
+            if match is None:
+                continue
+            kind = match.lastgroup[1:]
+            keys = self._keys[kind]
+            values = match.group(*keys)
+            it = int(values[0])
+            if kind == "step":
+                if self._current is not None:
+                    records.append(self._current)
+                self._current = {"it": it}
+            elif self._current is None or self._current["it"] != it:
+                continue
+
+            self._current.update(
+                (key, _to_float(value)) for key, value in zip(keys[1:], values[1:])
+            )
+            if kind == "fluid":
+                records.append(self._current)
+                self._current = None
+        return records
+
+    def flush(self):
+        """Return the records of the last time step, even if it is not
+        completed (an empty list if there is no such time step)."""
+        records = [] if self._current is None else [self._current]
+        self._current = None
+        return records
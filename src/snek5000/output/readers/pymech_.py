@@ -1,8 +1,13 @@
 """Read field files using ``pymech`` as ``xarray`` datasets."""
 
+import bisect
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
 import pymech as pm
 
 from ...log import logger
+from ...util.compress import readable_field_files, suffix_compressed
 from . import ReaderBase
 
 
@@ -38,21 +43,38 @@ class ReaderPymech(ReaderBase):
 
         """
         if isinstance(index, int):
-            path_file = self.output.get_field_file(prefix, index, t_approx)
-            ds = pm.open_dataset(path_file, **kwargs)
+            paths = [self.output.get_field_file(prefix, index, t_approx)]
         elif isinstance(index, str):
             case = self.output.name_solver
             path = self.output.path_session
             ext = "?????" if index == "all" else index
 
             pattern = f"{prefix}{case}0.f{ext}"
-            ds = pm.open_mfdataset(path.glob(pattern), **kwargs)
+            paths = {path.name: path for path in path.glob(pattern)}
+            for path_compressed in path.glob(pattern + suffix_compressed):
+                paths.setdefault(path_compressed.stem, path_compressed)
+            paths = [paths[name] for name in sorted(paths)]
         else:
             raise ValueError("Parameter index should be int or str")
 
+        ds = self._open(paths, single=isinstance(index, int), **kwargs)
         self.data = ds
         return ds
 
+    def _open(self, paths, single=False, **kwargs):
+        """Open field files, decompressing them and restoring their
+        coordinates if needed (see :mod:`snek5000.util.compress`)."""
+        with readable_field_files(paths) as paths_readable:
+            if single:
+                ds = pm.open_dataset(paths_readable[0], **kwargs)
+            else:
+                ds = pm.open_mfdataset(paths_readable, **kwargs)
+
+            if paths_readable != paths:
+                # temporary files are removed when exiting the context
+                ds = ds.load()
+        return ds
+
     def get_var(self, key):
         """Return a specific array.
 
@@ -84,3 +106,167 @@ class ReaderPymechStats(ReaderPymech):
 
         """
         return super().load(prefix, index, **kwargs)
+
+
+class ReaderPymechArchive(ReaderPymech):
+    """Read field files directly from a seekable archive created by the rule
+    ``archive`` (see :class:`snek5000.util.archive.IndexedArchive`). Only the
+    requested field files are decompressed.
+
+    """
+
+    tag = "pymech_archive"
+
+    def get_archive(self, path_archive=None):
+        """Get the seekable archive, by default the most recent one in
+        ``path_run/data``."""
+        from ...util.archive import IndexedArchive
+
+        if path_archive is None:
+            path_data = Path(self.output.path_run) / "data"
+            paths_index = sorted(
+                path_data.glob(f"*{IndexedArchive.index_suffix}"),
+                key=lambda path: path.stat().st_mtime,
+            )
+            if not paths_index:
+                raise FileNotFoundError(f"No seekable archive found in {path_data}")
+            path_archive = paths_index[-1].with_name(
+                paths_index[-1].name[: -len(IndexedArchive.index_suffix)]
+            )
+
+        return IndexedArchive(path_archive)
+
+    def get_field_names(self, archive, prefix="", ext="?????"):
+        """Sorted names of the field files in an archive, preferably from
+        the current session."""
+        pattern = f"{prefix}{self.output.name_solver}0.f{ext}"
+        session = Path(self.output.path_session).name
+        for pattern_dir in (f"{session}/", "*"):
+            # files with the same name in different sessions: keep the last
+            # one. Compressed files are used only if uncompressed files do not
+            # exist.
+            names_by_file = {}
+            for suffix in (suffix_compressed, ""):
+                for name in archive.names(pattern_dir + pattern + suffix):
+                    names_by_file[Path(name).name[: -len(suffix) or None]] = name
+            if names_by_file:
+                break
+        return [names_by_file[key] for key in sorted(names_by_file)]
+
+    def get_mesh_names(self, archive, names):
+        """Names of the field files containing the coordinates of field files
+        without coordinates (see :func:`snek5000.util.compress.dedupe_mesh`).
+        """
+        names_mesh = set()
+        for name in names:
+            if "X" in archive.members[name].get("variables", "X"):
+                continue
+            path = Path(name)
+            if path.suffix == suffix_compressed:
+                path = path.with_suffix("")
+            pattern = str(path.with_name(path.name[:-5] + "?????"))
+            candidates = archive.names(pattern) + archive.names(
+                pattern + suffix_compressed
+            )
+            for name_mesh in sorted(candidates):
+                if "X" in archive.members[name_mesh].get("variables", ""):
+                    names_mesh.add(name_mesh)
+                    break
+        return sorted(names_mesh - set(names))
+
+    def load(self, prefix="", index=-1, t_approx=None, path_archive=None, **kwargs):
+        """Opens field files(s) from a seekable archive as a xarray dataset.
+        The data is cached in :attr:`data`.
+
+        Parameters
+        ----------
+        prefix: str
+            Field file prefix to load custom output files. Empty for default
+            field files.
+
+        index : int or str
+            Same as :meth:`ReaderPymech.load`, except that a positive index
+            matching no field file raises a ``FileNotFoundError``.
+
+        t_approx: float
+            Find the file whose simulation time is the nearest, using the
+            times recorded in the index of the archive.
+
+        path_archive: str or path-like
+            Path to the archive. By default, the most recent seekable archive
+            in ``path_run/data``.
+
+        **kwargs
+            Keyword arguments for ``pymech.open_*`` function
+
+        Returns
+        -------
+        ds: xarray.Dataset
+
+        """
+        archive = self.get_archive(path_archive)
+
+        if isinstance(index, int):
+            if index > 0 and t_approx is not None:
+                raise ValueError(
+                    "Specify either index or t_approx at a time, not both."
+                )
+
+            names = self.get_field_names(archive, prefix)
+            ext = f".f{index:05d}"
+            exact = [
+                name for name in names if name.endswith((ext, ext + suffix_compressed))
+            ]
+            if index > 0:
+                if not exact:
+                    raise FileNotFoundError(
+                        f"Cannot find field file {index=} in {archive.path}"
+                    )
+                names = exact[-1:]
+            elif t_approx is not None:
+                times = [archive.members[name].get("time") for name in names]
+                if None in times:
+                    raise ValueError(
+                        f"Simulation times are not recorded in {archive.path}"
+                    )
+                names = sorted(zip(times, names))
+                times = [time for time, _ in names]
+                # nearest time, as in snek5000.util.files.find_field_file_by_time
+                idx = bisect.bisect_left(times, t_approx)
+                if idx == len(times):
+                    idx -= 1
+                elif idx > 0 and t_approx - times[idx - 1] <= times[idx] - t_approx:
+                    idx -= 1
+                names = [names[idx][1]]
+            else:
+                try:
+                    names = [names[index]]
+                except IndexError as err:
+                    raise FileNotFoundError(
+                        f"Cannot find field file {index=} in {archive.path}"
+                    ) from err
+        elif isinstance(index, str):
+            ext = "?????" if index == "all" else index
+            names = self.get_field_names(archive, prefix, ext)
+            if not names:
+                raise FileNotFoundError(
+                    f"Cannot find field files {index=} in {archive.path}"
+                )
+        else:
+            raise ValueError("Parameter index should be int or str")
+
+        logger.info(f"Loading {names} from {archive.path}")
+        with TemporaryDirectory(prefix="snek5000_") as path_tmp:
+            # relative paths are kept: files of different sessions can have
+            # the same name
+            for name in self.get_mesh_names(archive, names):
+                archive.extract(name, path_tmp, keep_parents=True)
+            paths = [
+                archive.extract(name, path_tmp, keep_parents=True) for name in names
+            ]
+            ds = self._open(paths, single=isinstance(index, int), **kwargs)
+            # the extracted files are removed when exiting the context
+            ds = ds.load()
+
+        self.data = ds
+        return ds
@@ -4,6 +4,7 @@ Scripting interface for Nek5000 :ref:`parameter file <nek:case_files_par>`.
 
 """
 
+import itertools
 import json
 import logging
 import os
@@ -11,6 +12,7 @@ import sys
 import textwrap
 from ast import literal_eval
 from configparser import ConfigParser
+from copy import deepcopy
 from io import StringIO
 from math import nan
 from pathlib import Path
@@ -35,6 +37,18 @@ literal_prune = ("<real>", "", "nan")
 #: JSON file name to which recorded user_params are saved
 filename_map_user_params = "map_user_params.json"
 
+#: Internal attributes which do not modify the par file
+_internal_attrs_not_par = (
+    "_doc",
+    "_autodoc_par_indent",
+    "_par_file",
+    "_par_version",
+    "_par_synced",
+)
+#: Counter of the modifications of Parameters objects (see
+#: :meth:`Parameters._mark_par_modified`)
+_par_versions = itertools.count()
+
 
 def _as_nek_value(input_value):
     """Convert Python values to equivalent Nek5000 par values."""
@@ -66,13 +80,34 @@ def _as_python_value(input_value):
         return value
 
 
-def load_params(path_dir="."):
+def _stat_key(path):
+    """Identify a version of a file. ``None`` if the file does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+#: Cache of :func:`load_params`: path to params_simul.xml -> (key, params)
+_cache_params = {}
+
+
+def load_params(path_dir=".", use_cache=True):
     """Load a :class:`snek5000.params.Parameters` instance from `path_dir`.
 
+    The parameters are cached and reloaded only if ``params_simul.xml`` or the
+    par file are modified, or if the short name of the solver (read from
+    ``info_solver.xml``, see :func:`snek5000.solvers.get_solver_short_name`)
+    changes. A copy of the cached parameters is returned, so that it can be
+    modified. See also :func:`clear_cache`.
+
     Parameters
     ----------
     path_dir : str or path-like
         Path to a simulation directory.
+    use_cache : bool
+        Use the cached parameters, if they are up to date.
 
     Returns
     -------
@@ -83,12 +118,54 @@ def load_params(path_dir="."):
 
     path_dir = _path_try_from_fluidsim_path(path_dir)
     short_name = get_solver_short_name(path_dir)
+    path_xml = path_dir / "params_simul.xml"
+    path_par = path_dir / f"{short_name}.par"
+
+    key = (short_name, _stat_key(path_xml), _stat_key(path_par))
+    path_cache = path_xml.resolve()
+    if use_cache:
+        cached = _cache_params.get(path_cache)
+        if cached is not None and cached[0] == key:
+            return deepcopy(cached[1])
+
     Simul = import_cls_simul(short_name)
+    params = Simul.load_params_from_file(path_xml=path_xml, path_par=path_par)
+    if key[1] is not None:
+        _cache_params[path_cache] = (key, deepcopy(params))
+    return params
+
+
+def clear_cache(path_dir=None):
+    """Invalidate the caches of :func:`load_params` and
+    :func:`snek5000.solvers.get_solver_short_name`. The caches of
+    :func:`snek5000.solvers.available_solvers` and of the default parameters
+    (see :meth:`snek5000.solvers.base.SimulNek.create_default_params`) are also
+    cleared if ``path_dir`` is not provided.
+
+    Parameters
+    ----------
+    path_dir : str or path-like
+        Path to a simulation directory. If not provided, the caches are
+        cleared for all simulations.
+
+    """
+    from .solvers import _cache_short_names, available_solvers
+    from .solvers.base import _cache_default_params
+
+    if path_dir is None:
+        _cache_params.clear()
+        _cache_short_names.clear()
+        _cache_default_params.clear()
+        available_solvers.cache_clear()
+        return
 
-    return Simul.load_params_from_file(
-        path_xml=path_dir / "params_simul.xml",
-        path_par=path_dir / f"{short_name}.par",
-    )
+    from snek5000.util.files import _path_try_from_fluidsim_path
+
+    # same keys as in load_params and get_solver_short_name: the files
+    # themselves are resolved, since they can be symbolic links
+    path_dir = _path_try_from_fluidsim_path(path_dir)
+    _cache_params.pop((path_dir / "params_simul.xml").resolve(), None)
+    _cache_short_names.pop((path_dir / "info_solver.xml").resolve(), None)
 
 
 class Parameters(_Parameters):
@@ -106,11 +183,6 @@ class Parameters(_Parameters):
         return load_params(path or Path.cwd())
 
     def __init__(self, *args, **kwargs):
-        comments = ("#",)
-        self._set_internal_attr(
-            "_par_file",
-            ConfigParser(comment_prefixes=comments, inline_comment_prefixes=comments),
-        )
         # Only enabled parameters would be written into par file
         self._set_internal_attr("_enabled", True)
         # User parameters sections should begin with an underscore
@@ -118,9 +190,54 @@ class Parameters(_Parameters):
 
         super().__init__(*args, **kwargs)
 
+    @property
+    def _par_file(self):
+        """:class:`configparser.ConfigParser` object of the par file, created
+        on first access since most containers are never written as par
+        files."""
+        try:
+            return self.__dict__["_par_file"]
+        except KeyError:
+            pass
+        comments = ("#",)
+        par_file = ConfigParser(
+            comment_prefixes=comments, inline_comment_prefixes=comments
+        )
         # Like in Python Nek5000's par files are case insensitive.
         # However for consistency, case sensitivity is enforced:
-        self._par_file.optionxform = str
+        par_file.optionxform = str
+        self._set_internal_attr("_par_file", par_file)
+        return par_file
+
+    def _set_internal_attr(self, key, value):
+        super()._set_internal_attr(key, value)
+        if key not in _internal_attrs_not_par:
+            self._mark_par_modified()
+
+    def _set_attrib(self, key, value):
+        super()._set_attrib(key, value)
+        self._mark_par_modified()
+
+    def _set_as_child(self, child, change_parent=True):
+        super()._set_as_child(child, change_parent)
+        child._mark_par_modified()
+
+    def _pop_attrib(self, name):
+        value = super()._pop_attrib(name)
+        self._mark_par_modified()
+        return value
+
+    def _mark_par_modified(self):
+        """Give a new version number to this object and its parents, so that
+        the corresponding sections of the par files are synchronized again by
+        :meth:`_sync_par`.
+
+        """
+        version = next(_par_versions)
+        node = self
+        while node is not None:
+            node.__dict__["_par_version"] = version
+            node = node.__dict__.get("_parent")
 
     def _make_dict_attribs(self):
         d = super()._make_dict_attribs()
@@ -133,14 +250,23 @@ class Parameters(_Parameters):
     def __update_par_section(
         self, section_name, section_dict, has_to_prune_literals=True
     ):
-        """Updates a section of the ``par_file`` object from a dictionary."""
+        """Updates a section of the ``par_file`` object from a dictionary.
+
+        Returns the name of the section in the par file.
+
+        """
         par = self._par_file
 
         # Start with underscore if it is a user section
         section_name_par = "_" if section_dict["_user"] else ""
         section_name_par += section_name.upper().lstrip("_")
 
-        if section_name_par not in par.sections():
+        if par.has_section(section_name_par):
+            # remove the options which could have been pruned since the
+            # previous synchronization
+            for option in par.options(section_name_par):
+                par.remove_option(section_name_par, option)
+        else:
             par.add_section(section_name_par)
 
         if "_recorded_user_params" in section_dict:
@@ -163,7 +289,7 @@ class Parameters(_Parameters):
 
         # _recorded_user_params -> userParam%%
         if not recorded_user_params:
-            return
+            return section_name_par
         params = self._parent
         if self._tag != "nek" or params._tag != "params":
             raise RuntimeError(
@@ -178,57 +304,95 @@ class Parameters(_Parameters):
                 f"userParam{idx_uparam:02d}",
                 str(value),
             )
+        return section_name_par
 
     def _sync_par(self, has_to_prune_literals=True, keep_all_sections=False):
         """Sync values in param children and attributes to ``self._par_file``
         object.
 
+        Only the sections modified since the previous call with the same
+        options are synchronized (see :meth:`_mark_par_modified`). Note that
+        in-place modifications of mutable values are not tracked.
+
         """
+        options = (has_to_prune_literals, keep_all_sections)
+        synced = self.__dict__.get("_par_synced")
+        if synced is None or synced["options"] != options:
+            synced = {"options": options, "versions": {}}
+            self._set_internal_attr("_par_synced", synced)
+        versions = synced["versions"]
+
         if self._tag_children:
-            data = [
-                (child, getattr(self, child)._make_dict_tree())
-                for child in self._tag_children
-            ]
+            nodes = [(child, getattr(self, child)) for child in self._tag_children]
         else:
             # No children
-            data = [(self._tag, self._make_dict_attribs())]
-
-        for child, d in data:
+            nodes = [(self._tag, self)]
+
+        for child, node in nodes:
+            version = node.__dict__.get("_par_version")
+            # user parameters are stored in other parts of the params tree
+            if (
+                version is not None
+                and versions.get(child) == version
+                and not hasattr(node, "_recorded_user_params")
+            ):
+                continue
+            if node is self:
+                d = self._make_dict_attribs()
+                # user parameters can only be resolved from params.nek
+                d.pop("_recorded_user_params", None)
+            else:
+                d = node._make_dict_tree()
             # Section name is often written in [UPPERCASE]
             section_name = child.upper()
-            self.__update_par_section(
+            section_name_par = self.__update_par_section(
                 section_name, d, has_to_prune_literals=has_to_prune_literals
             )
+            self.__tidy_par_section(section_name_par, keep_all_sections)
+            versions[child] = version
 
-        self.__tidy_par(keep_all_sections)
-
-    def __tidy_par(self, keep_all_sections=False):
-        """Remove internal attributes and disabled sections from par file."""
+    def __tidy_par_section(self, section_name, keep_all_sections=False):
+        """Remove internal attributes and disabled section from par file."""
         par = self._par_file
-        for section_name in par.sections():
-            par.remove_option(section_name, "_user")
+        par.remove_option(section_name, "_user")
 
-            if keep_all_sections:
-                enabled = True
-            else:
-                enabled = par.getboolean(section_name, "_enabled")
-            if enabled:
-                par.remove_option(section_name, "_enabled")
-            else:
-                par.remove_section(section_name)
+        if keep_all_sections:
+            enabled = True
+        else:
+            enabled = par.getboolean(section_name, "_enabled")
+        if enabled:
+            par.remove_option(section_name, "_enabled")
+        else:
+            par.remove_section(section_name)
 
     def _autodoc_par(self, indent=0):
-        """Autodoc a code block with ``ini`` syntax and set docstring."""
-        self._sync_par(has_to_prune_literals=False, keep_all_sections=True)
-        docstring = "\n.. code-block:: ini\n\n"
-        with StringIO() as output:
-            self._par_file.write(output)
-            ini = output.getvalue()
+        """Autodoc a code block with ``ini`` syntax and set docstring.
 
-        docstring += textwrap.indent(ini, "   ")
+        The code block is rendered with the default values by
+        :meth:`_complete_autodoc_par`, once per solver class (see
+        :meth:`snek5000.solvers.base.SimulNek.create_default_params`).
 
-        if ini:
-            self._set_doc(self._doc + textwrap.indent(docstring, " " * indent))
+        """
+        self._set_internal_attr("_autodoc_par_indent", indent)
+
+    def _complete_autodoc_par(self):
+        """Complete the docstrings of the tree with the code blocks requested
+        by :meth:`_autodoc_par`, rendered from the current values."""
+        indent = self.__dict__.pop("_autodoc_par_indent", None)
+        if indent is not None:
+            self._sync_par(has_to_prune_literals=False, keep_all_sections=True)
+            with StringIO() as output:
+                self._par_file.write(output)
+                ini = output.getvalue()
+            # the par file is not needed anymore
+            del self.__dict__["_par_file"], self.__dict__["_par_synced"]
+
+            if ini:
+                docstring = "\n.. code-block:: ini\n\n" + textwrap.indent(ini, "   ")
+                self._set_doc(self._doc + textwrap.indent(docstring, " " * indent))
+
+        for child in self._tag_children:
+            getattr(self, child)._complete_autodoc_par()
 
     def _record_nek_user_params(self, nek_params_keys, overwrite=False):
         """Record some Nek user parameters
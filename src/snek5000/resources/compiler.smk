@@ -1,11 +1,29 @@
+import os
+from pathlib import Path
 from pprint import pprint
 
-import snek5000
-from snek5000.clusters import nproc_available
 from snek5000.util import now
+from snek5000.util.smake import nek_source_input
 
 
-NEK_SOURCE_ROOT = snek5000.get_nek_source_root()
+def nproc_available(wildcards):
+    from snek5000.clusters import nproc_available
+
+    nproc = nproc_available()
+    if os.getenv("SNEK_RECOMMEND_NPROC"):
+        # limit the number of MPI ranks to an efficient and well balanced value
+        from snek5000.operators import Operators
+        from snek5000.params import load_params
+
+        oper = Operators(params=load_params())
+        nproc = oper.recommend_nproc(nproc).nproc
+
+    return nproc
+
+
+def path_log(wildcards):
+    # new log file for every run, named when the job is executed
+    return "logs/run_" + now() + ".log"
 
 
 # Snakemake configuration
@@ -21,16 +39,23 @@ rule compile:
         f"{config['CASE']}.usr",
         "makefile_usr.inc",
         "makefile",
-        NEK_SOURCE_ROOT + "/3rd_party/gslib/lib/libgs.a",
-        NEK_SOURCE_ROOT + "/3rd_party/blasLapack/libblasLapack.a",
+        nek_source_input("3rd_party/gslib/lib/libgs.a"),
+        nek_source_input("3rd_party/blasLapack/libblasLapack.a"),
     params:
         make="make",
     output:
         exe="nek5000",
-    shell:
-        """
-        {params.make} -j {output.exe} | tee -a build.log
-        """
+    run:
+        from snek5000.make import _Nek5000Make
+
+        nek5000 = _Nek5000Make()
+        if nek5000.cache_core:
+            nek5000.restore_core_objects(Path.cwd(), config)
+
+        shell("{params.make} -j {output.exe} | tee -a build.log")
+
+        if nek5000.cache_core:
+            nek5000.cache_core_objects(Path.cwd(), config)
 
 
 # mpiexec
@@ -41,19 +66,19 @@ rule mpiexec:
         f"{config['CASE']}.par",
         "SESSION.NAME",
         "nek5000",
-    output:
-        "logs/run_" + now() + ".log",
     resources:
-        nproc=nproc_available(),
+        nproc=nproc_available,
     params:
+        log=path_log,
         redirect=">",
         end="",
     shell:
         """
-        ln -sf {output} {config[CASE]}.log
+        mkdir -p logs
+        ln -sf {params.log} {config[CASE]}.log
         echo "Log file:"
         realpath {config[CASE]}.log
-        {config[MPIEXEC]} -n {resources.nproc} {config[MPIEXEC_FLAGS]} ./nek5000 {params.redirect} {output} {params.end}
+        {config[MPIEXEC]} -n {resources.nproc} {config[MPIEXEC_FLAGS]} ./nek5000 {params.redirect} {params.log} {params.end}
         echo $PWD
         """
 
@@ -61,6 +86,7 @@ rule mpiexec:
 # run in background
 use rule mpiexec as run with:
     params:
+        log=path_log,
         redirect=">",
         end="&",
 
@@ -68,5 +94,6 @@ use rule mpiexec as run with:
 # run in foreground
 use rule mpiexec as run_fg with:
     params:
+        log=path_log,
         redirect="| tee",
         end="",
@@ -1,15 +1,12 @@
-import snek5000
 from snek5000.util.files import create_session
-
-
-NEK_SOURCE_ROOT = snek5000.get_nek_source_root()
+from snek5000.util.smake import nek_source_input
 
 
 # generate a box mesh
 rule generate_box:
     input:
         box=f"{config['CASE']}.box",
-        genbox=NEK_SOURCE_ROOT + "/bin/genbox",
+        genbox=nek_source_input("bin/genbox"),
     output:
         "box.re2",
     shell:
@@ -30,7 +27,7 @@ rule move_box:
 rule generate_map:
     input:
         f"{config['CASE']}.re2",
-        genmap=NEK_SOURCE_ROOT + "/bin/genmap",
+        genmap=nek_source_input("bin/genmap"),
     output:
         f"{config['CASE']}.ma2",
     resources:
@@ -47,7 +44,7 @@ rule generate_makefile:
         f"{config['CASE']}.re2",
         f"{config['CASE']}.ma2",
         f"{config['CASE']}.usr",
-        cmd=NEK_SOURCE_ROOT + "/bin/nekconfig",
+        cmd=nek_source_input("bin/nekconfig"),
     output:
         "makefile",
         ".state",
@@ -1,11 +1,38 @@
 import itertools
 from glob import iglob
 
-import snek5000
-from snek5000.util.archive import tar_name, archive, clean_simul
+from snek5000.util.archive import tar_name, clean_simul, stream_archive
+from snek5000.util.smake import nek_source_input
 
 
-NEK_SOURCE_ROOT = snek5000.get_nek_source_root()
+# Parameters depending on the contents of the simulation directory are given
+# as functions, so that the directory is only scanned when a rule is executed
+def archive_solution(wildcards):
+    return sorted(
+        itertools.chain.from_iterable(
+            iglob(f"{directory}{prefix}{config['CASE']}0.f*")
+            for directory in ("", "session_*/")
+            for prefix in ("", "c2D", "sts")
+        )
+    )
+
+
+def archive_tarball(wildcards):
+    # named from the field files of the run and session directories
+    return tar_name(compress_format=".zst", paths=archive_solution(wildcards))
+
+
+def archive_rest(wildcards):
+    return [
+        "SESSION.NAME",
+        "params_simul.xml",
+        "SIZE",
+        *iglob(f"rs6{config['CASE']}0.f*"),
+        f"{config['CASE']}.re2",
+        f"{config['CASE']}.ma2",
+        f"{config['CASE']}.par",
+        f"{config['CASE']}.usr",
+    ]
 
 
 # clean compiler output
@@ -22,7 +49,7 @@ rule clean:
 # clean simulation files
 rule cleansimul:
     params:
-        tarball=tar_name(compress_format=".zst"),
+        tarball=archive_tarball,
     run:
         clean_simul(config["CASE"], params.tarball)
 
@@ -30,7 +57,7 @@ rule cleansimul:
 # clean third party
 rule clean3rd:
     params:
-        gslib_dir=NEK_SOURCE_ROOT + "/3rd_party/gslib",
+        gslib_dir=nek_source_input("3rd_party/gslib"),
     shell:
         """
         nekconfig clean < <(yes)
@@ -50,26 +77,20 @@ rule cleanall:
 # create an archive with all the results
 rule archive:
     params:
-        solution=sorted(
-            itertools.chain.from_iterable(
-                (
-                    iglob(f"{prefix} {config['CASE']}0.f*")
-                    for prefix in ("", "c2D", "sts")
-                )
-            )
-        ),
-        rest=[
-            "SESSION.NAME",
-            "params_simul.xml",
-            "SIZE",
-            *iglob(f"rs6{config['CASE']}0.f*"),
-            f"{config['CASE']}.re2",
-            f"{config['CASE']}.ma2",
-            f"{config['CASE']}.par",
-            f"{config['CASE']}.usr",
-        ],
-        tarball=tar_name(),
+        solution=archive_solution,
+        rest=archive_rest,
+        tarball=archive_tarball,
     run:
-        archive(params.tarball, params.solution, remove=True)
-        archive(params.tarball, params.rest)
-        archive(params.tarball + ".zst", readonly=True)
+        stream_archive(
+            params.tarball, params.rest, items_to_remove=params.solution, seekable=True
+        )
+
+
+# remove the coordinates from all field files except the first ones
+rule dedupe:
+    run:
+        # numpy is only imported when the rule is executed
+        from snek5000.util.compress import dedupe_mesh
+
+        for path_dir in (".", *sorted(iglob("session_*"))):
+            dedupe_mesh(path_dir)
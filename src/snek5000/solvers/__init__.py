@@ -10,7 +10,9 @@ Solver framework
 """
 
 import importlib
-from functools import partial
+import sys
+from functools import lru_cache
+from pathlib import Path
 from pkgutil import ModuleInfo
 from types import ModuleType
 
@@ -18,13 +20,70 @@ from fluidsim_core import loader
 
 from ..log import logger
 
-available_solvers = partial(loader.available_solvers, entrypoint_grp="snek5000.solvers")
-available_solvers.__doc__ = """\
-Returns a dictionary of all registered solvers registered as an entrypoint.
-"""
+#: Name of the entrypoint group listing the solvers
+entrypoint_grp = "snek5000.solvers"
+
+
+@lru_cache(maxsize=None)
+def available_solvers():
+    """Returns all the solvers registered as an entrypoint in the group
+    ``snek5000.solvers``.
+
+    Scanning the metadata of the installed distributions is slow in large
+    environments, therefore the result is cached for the lifetime of the
+    interpreter. Call ``available_solvers.cache_clear()`` after installing a
+    new solver in a running interpreter.
+
+    """
+    return loader.available_solvers(entrypoint_grp)
+
+
+def _get_entrypoint(key):
+    """Entrypoint of a solver from its short name or its full name."""
+    if key.startswith(entrypoint_grp + "."):
+        key = key[len(entrypoint_grp) + 1 :]
 
-import_cls_simul = partial(loader.import_cls_simul, entrypoint_grp="snek5000.solvers")
-import_cls_simul.__doc__ = """Import the Simul class of a solver."""
+    solvers = available_solvers()
+    try:
+        return solvers[key]
+    except KeyError:
+        raise ValueError(
+            "You have to give a proper solver key. Given: "
+            f"{key}. Expected one of: {sorted(solvers.names)}"
+        )
+
+
+def import_module_solver(key):
+    """Import the solver module. Solver modules which were already imported
+    are directly taken from :data:`sys.modules`.
+
+    Parameters
+    ----------
+    key: str
+        The short name of a solver.
+
+    """
+    entrypoint = _get_entrypoint(key)
+    module = sys.modules.get(entrypoint.module)
+    if module is None:
+        return entrypoint.load()
+
+    if entrypoint.attr:
+        for attr in entrypoint.attr.split("."):
+            module = getattr(module, attr)
+    return module
+
+
+def import_cls_simul(key):
+    """Import the Simul class of a solver.
+
+    Parameters
+    ----------
+    key: str
+        The short name of a solver.
+
+    """
+    return import_module_solver(key).Simul
 
 
 def is_package(module):
@@ -67,21 +126,21 @@ def get_solver_package(name_solver):
     str
 
     """
-    entrypoint = available_solvers()[name_solver]
-    try:
-        # importlib.metadata.entry_points (fluidsim_core > 0.6.0)
-        module = entrypoint.module
-    except AttributeError:
-        module = entrypoint.module_name
-    if is_package(module):
+    module = _get_entrypoint(name_solver).module
+    if is_package(sys.modules.get(module, module)):
         return module
     else:
         return module.rpartition(".")[0]
 
 
+#: Cache of :func:`get_solver_short_name`: path to info_solver.xml -> (key, name)
+_cache_short_names = {}
+
+
 def get_solver_short_name(path_dir):
     """Detects short name of the solver from ``info_solver.xml`` if present or
-    the path.
+    the path. The result is cached until ``info_solver.xml`` is modified (see
+    :func:`snek5000.params.clear_cache`).
 
     Parameters
     ----------
@@ -93,17 +152,29 @@ def get_solver_short_name(path_dir):
     short_name: str
 
     """
-    info_solver_xml = path_dir / "info_solver.xml"
-    if info_solver_xml.exists():
+    info_solver_xml = Path(path_dir) / "info_solver.xml"
+    try:
+        stat = info_solver_xml.stat()
+    except FileNotFoundError:
+        stat = None
+
+    if stat is not None:
+        path_cache = info_solver_xml.resolve()
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = _cache_short_names.get(path_cache)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         from snek5000.info import InfoSolverNek
 
         info_solver = InfoSolverNek(path_file=info_solver_xml)
         short_name = info_solver.short_name
+        _cache_short_names[path_cache] = (key, short_name)
     else:
         logger.warning(
             f"The {info_solver_xml} file is missing! "
             "Attempting to guess solver from the directory name."
         )
-        short_name = path_dir.absolute().name.split("_")[0]
+        short_name = Path(path_dir).absolute().name.split("_")[0]
 
     return short_name
@@ -7,6 +7,7 @@ A bare Nek5000 solver which does not rely on any user parameters.
 
 import math
 import textwrap
+from copy import deepcopy
 from pathlib import Path
 
 from inflection import underscore
@@ -21,6 +22,11 @@ from ..params import (
     complete_params_from_par_file,
 )
 from ..util import docstring_params
+from ..util.timings import Timings
+
+#: Default parameters indexed by solver class (see
+#: :meth:`SimulNek.create_default_params`)
+_cache_default_params = {}
 
 
 class SimulNek(SimulCore):
@@ -52,8 +58,20 @@ class SimulNek(SimulCore):
         """Generate default parameters. ``params.nek`` contains runtime
         parameters consumed by Nek5000.
 
+        The default parameters are computed once per class and deep copies are
+        returned (see :func:`snek5000.params.clear_cache`).
+
         """
-        return super().create_default_params()
+        try:
+            info_solver, params = _cache_default_params[cls]
+        except KeyError:
+            params = super().create_default_params()
+            # documentation of the default values
+            params._complete_autodoc_par()
+            _cache_default_params[cls] = cls.info_solver, params
+        else:
+            cls.info_solver = info_solver
+        return deepcopy(params)
 
     @classmethod
     def load_params_from_file(cls, path_xml=None, path_par=None):
@@ -252,7 +270,11 @@ class SimulNek(SimulCore):
         return params
 
     def __init__(self, params):
-        super().__init__(params)
+        #: Wall time of the phases of the instantiation (see
+        #: :mod:`snek5000.util.timings`)
+        self.timings = timings = Timings()
+        with timings.phase("init_info"):
+            super().__init__(params)
 
         self._objects_to_print = "{:28s}{}\n".format("sim: ", type(self))
         dict_classes = self.info_solver.import_classes()
@@ -262,7 +284,8 @@ class SimulNek(SimulCore):
             # only initialize if Class is not the Simul class
             if not isinstance(self, Class):
                 obj_name = underscore(cls_name)
-                setattr(self, obj_name, Class(self))
+                with timings.phase(f"init_{obj_name}"):
+                    setattr(self, obj_name, Class(self))
                 self._objects_to_print += "{:28s}{}\n".format(
                     f"sim.{obj_name}: ", Class
                 )
@@ -275,12 +298,16 @@ class SimulNek(SimulCore):
                 # See self.output._init_name_run()
                 self.path_run = Path(self.output.path_run)
 
-            self.output.post_init()
+            with timings.phase("post_init"):
+                self.output.post_init()
         else:
             self.path_run = None
             if mpi.rank == 0:
                 logger.warning("No output class initialized!")
 
+        if mpi.rank == 0:
+            timings.log_and_save(self.path_run, solver=self.info_solver.short_name)
+
     def create_symlink_start_from_file(self, path):
         """Create a symlink towards the start_from file"""
         path = Path(path)
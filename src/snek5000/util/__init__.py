@@ -4,29 +4,43 @@
 .. autosummary::
    :toctree:
 
+   anomalies
    archive
+   bench
+   compress
    console
    files
+   monitor
    restart
    smake
+   status
+   timings
 
 """
 
+import fnmatch
 import itertools
 import os
 import sys
 from datetime import datetime
-from functools import partial, reduce
+from functools import partial
 from tarfile import TarFile
 from zipfile import ZipFile
 
-from fluiddyn import util
-
 from .. import get_nek_source_root
-from .restart import get_status
 
 __all__ = ["get_nek_source_root", "get_status"]
 
+
+def __getattr__(name):
+    """Import :func:`get_status` on first access (:pep:`562`)."""
+    if name == "get_status":
+        from .restart import get_status
+
+        return get_status
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 repeat = partial(itertools.repeat, None)
 repeat.__doc__ = """\
 Iterator which returns a ``None`` object for a number of times.
@@ -63,6 +77,8 @@ def timestamp(path):
     :returns str:
 
     """
+    from fluiddyn import util
+
     return isoformat(util.modification_date(path))
 
 
@@ -101,30 +117,118 @@ def tar_info(filename):
         file.list()
 
 
-def scantree(path):
-    """Recursively yield DirEntry objects for given directory.
+def scan_dir(path, pattern=None):
+    """List a directory in a single pass with :func:`os.scandir`.
 
-    Courtesy: https://stackoverflow.com/a/33135143
+    The ``DirEntry`` objects cache the results of ``stat`` calls, which are
+    often free on Linux for the file type.
 
-    :returns generator: A generator for ``DirEntry`` objects.
+    Parameters
+    ----------
+    path: str or path-like
+        Directory to list. If it does not exist, an empty dictionary is returned.
+    pattern: str
+        Optional glob pattern (:mod:`fnmatch` syntax) to filter the names.
+
+    Returns
+    -------
+    dict
+        ``DirEntry`` objects indexed by name
 
     """
-    for entry in os.scandir(path):
-        if entry.is_dir(follow_symlinks=False):
-            yield from scantree(entry.path)
-        else:
-            yield entry
+    try:
+        with os.scandir(path) as entries:
+            if pattern is None:
+                return {entry.name: entry for entry in entries}
+            return {
+                entry.name: entry
+                for entry in entries
+                if fnmatch.fnmatchcase(entry.name, pattern)
+            }
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+
+def _scan_subtree(path, prefetch_stat):
+    """Files and sub-directories of a directory."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    if prefetch_stat:
+                        # cached in the DirEntry
+                        entry.stat()
+                    files.append(entry)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        pass
+    return files, subdirs
+
+
+def scantree(path, max_workers=None, prefetch_stat=False):
+    """Recursively yield DirEntry objects for given directory.
 
+    The tree is walked in a single pass without recursion. With
+    ``max_workers > 1``, the sub-directories are scanned concurrently by a
+    thread pool, which can be much faster on network file systems. The order
+    of the entries is then not deterministic.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Root directory
+    max_workers: int
+        Number of threads used to scan the sub-directories.
+    prefetch_stat: bool
+        Call ``DirEntry.stat`` while scanning (in the threads), so that the
+        results are cached in the yielded entries.
 
-def last_modified(path):
+    :returns generator: A generator for ``DirEntry`` objects.
+
+    """
+    if not max_workers or max_workers <= 1:
+        stack = [path]
+        while stack:
+            files, subdirs = _scan_subtree(stack.pop(), prefetch_stat)
+            yield from files
+            stack.extend(reversed(subdirs))
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = {executor.submit(_scan_subtree, path, prefetch_stat)}
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                futures.update(
+                    executor.submit(_scan_subtree, subdir, prefetch_stat)
+                    for subdir in subdirs
+                )
+                yield from files
+
+
+def last_modified(path, max_workers=None):
     """Find the last modified file in a directory tree.
 
+    Parameters
+    ----------
+    path: str or path-like
+        Root directory
+    max_workers: int
+        Number of threads used to scan the sub-directories, see
+        :func:`scantree`.
+
     :returns DirEntry:
 
     """
-    return reduce(
-        lambda x, y: x if x.stat().st_mtime > y.stat().st_mtime else y,
-        scantree(path),
+    return max(
+        scantree(path, max_workers, prefetch_stat=max_workers is not None),
+        key=lambda entry: entry.stat().st_mtime,
     )
 
 
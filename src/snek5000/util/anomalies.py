@@ -0,0 +1,367 @@
+"""Detection of anomalies of running simulations
+==============================================
+
+Streaming detectors are fed with the records of the time steps parsed
+incrementally from the log (see
+:class:`snek5000.output.print_stdout.StdOutParser`):
+
+- :class:`RisingPressureIterations`: the number of iterations of the pressure
+  solver (averaged over some time steps) increases a lot,
+- :class:`CFLExceeded`: the CFL number exceeds the target CFL
+  (``params.nek.general.target_cfl``),
+- :class:`DtCollapse`: the time step collapses.
+
+When an anomaly is detected, callbacks are called, for example to log it
+(:func:`log_anomaly`), to request Nek5000 to write the field files
+(:func:`request_checkpoint`) or to stop the simulation
+(:func:`stop_simulation`). A detector reports an anomaly only once, until the
+simulation recovers. The time steps already in the log when a simulation is
+attached only warm up the detectors: past anomalies do not trigger callbacks.
+
+The detectors can run in a background thread attached to a simulation::
+
+    watcher = sim.output.print_stdout.watch_anomalies(
+        callbacks=[log_anomaly, stop_simulation]
+    )
+    sim.make.exec("run_fg", nproc=4)
+    watcher.stop()
+
+or in the command ``snek-monitor`` (see :mod:`snek5000.util.monitor`)::
+
+    snek-monitor ~/sim_data --anomalies --on-anomaly log --on-anomaly stop
+
+Field files and stop requests rely on the file ``ioinfo`` of the simulation
+directory, which is read by Nek5000 every 10 time steps.
+
+"""
+
+import abc
+import math
+import threading
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+from .. import logger
+
+
+class Anomaly(NamedTuple):
+    """Anomaly detected for a time step."""
+
+    #: name of the detector
+    kind: str
+    #: index of the time step
+    it: int
+    #: simulated time
+    t: float
+    message: str
+
+
+class Detector(abc.ABC):
+    """Base class of the streaming detectors.
+
+    Subclasses implement :meth:`_check` which returns a message if a record is
+    anomalous.
+
+    """
+
+    kind = "anomaly"
+
+    def __init__(self):
+        #: whether the last record is anomalous
+        self.active = False
+
+    @abc.abstractmethod
+    def _check(self, record):
+        """Return a message if the record is anomalous."""
+
+    def check(self, record):
+        """Check the record of a time step.
+
+        Returns
+        -------
+        Anomaly or None
+            ``None`` if the record is normal or if the anomaly has already been
+            reported
+
+        """
+        message = self._check(record)
+        if message is None:
+            self.active = False
+            return None
+        if self.active:
+            return None
+        self.active = True
+        return Anomaly(self.kind, record["it"], record["t"], message)
+
+
+class RisingPressureIterations(Detector):
+    """Detect an increase of the number of iterations of the pressure solver.
+
+    Parameters
+    ----------
+    window: int
+        Number of time steps of the rolling mean
+    factor: float
+        An anomaly is detected if the rolling mean is larger than ``factor``
+        times its minimum since the start of the run...
+    min_iterations: float
+        ...and larger than ``min_iterations``.
+
+    """
+
+    kind = "rising_pressure_iterations"
+
+    def __init__(self, window=20, factor=2.0, min_iterations=10):
+        super().__init__()
+        self.factor = factor
+        self.min_iterations = min_iterations
+        self._values = deque(maxlen=window)
+        self._baseline = math.inf
+
+    def _check(self, record):
+        value = record.get("pres_it", math.nan)
+        if not math.isfinite(value):
+            return None
+        values = self._values
+        values.append(value)
+        if len(values) < values.maxlen:
+            return None
+
+        mean = sum(values) / len(values)
+        self._baseline = min(self._baseline, mean)
+        if mean > self.factor * self._baseline and mean >= self.min_iterations:
+            return (
+                f"mean number of pressure iterations {mean:.1f} over "
+                f"{len(values)} time steps > {self.factor} x {self._baseline:.1f}"
+            )
+        return None
+
+
+class CFLExceeded(Detector):
+    """Detect a CFL number larger than the target CFL.
+
+    Parameters
+    ----------
+    target_cfl: float
+        Usually ``params.nek.general.target_cfl``
+    factor: float
+        Tolerance: an anomaly is detected if ``CFL > factor * target_cfl``...
+    nb_steps: int
+        ...for ``nb_steps`` consecutive time steps (or if the CFL number is not
+        finite).
+
+    """
+
+    kind = "cfl_exceeded"
+
+    def __init__(self, target_cfl, factor=1.2, nb_steps=3):
+        super().__init__()
+        self.target_cfl = target_cfl
+        self.factor = factor
+        self.nb_steps = nb_steps
+        self._count = 0
+
+    def _check(self, record):
+        cfl = record.get("CFL", math.nan)
+        if not math.isfinite(cfl):
+            return f"CFL number is {cfl}"
+        if cfl <= self.factor * self.target_cfl:
+            self._count = 0
+            return None
+        self._count += 1
+        if self._count >= self.nb_steps:
+            return (
+                f"CFL number {cfl:.3g} > {self.factor} x target_cfl "
+                f"({self.target_cfl}) for {self._count} time steps"
+            )
+        return None
+
+
+class DtCollapse(Detector):
+    """Detect a collapse of the time step.
+
+    Parameters
+    ----------
+    window: int
+        Number of previous time steps of the reference
+    ratio: float
+        An anomaly is detected if the time step is smaller than ``ratio`` times
+        the largest of the ``window`` previous time steps (or if it is not
+        positive).
+
+    """
+
+    kind = "dt_collapse"
+
+    def __init__(self, window=50, ratio=0.1):
+        super().__init__()
+        self.ratio = ratio
+        self._values = deque(maxlen=window)
+
+    def _check(self, record):
+        dt = record.get("dt", math.nan)
+        if not dt > 0 or not math.isfinite(dt):
+            return f"time step is {dt}"
+
+        message = None
+        if self._values:
+            reference = max(self._values)
+            if dt < self.ratio * reference:
+                message = f"time step {dt:.3e} < {self.ratio} x {reference:.3e}"
+        self._values.append(dt)
+        return message
+
+
+def create_detectors(target_cfl=None):
+    """Create the default detectors (no :class:`CFLExceeded` if
+    ``target_cfl`` is ``None``)."""
+    detectors = [RisingPressureIterations(), DtCollapse()]
+    if target_cfl is not None:
+        detectors.insert(1, CFLExceeded(target_cfl))
+    return detectors
+
+
+def _write_ioinfo(path_run, value):
+    path = Path(path_run) / "ioinfo"
+    path.write_text(f"{value}\n")
+    return path
+
+
+def log_anomaly(anomaly, path_run):
+    """Callback logging the anomaly."""
+    logger.warning(
+        f"Anomaly {anomaly.kind} at it={anomaly.it}, t={anomaly.t:.6g} "
+        f"in {path_run}: {anomaly.message}"
+    )
+
+
+def request_checkpoint(anomaly, path_run):
+    """Callback requesting Nek5000 to write the field files (with a positive
+    value in the file ``ioinfo``)."""
+    path = _write_ioinfo(path_run, 1)
+    logger.info(f"Field files requested ({path}) after anomaly {anomaly.kind}")
+
+
+def stop_simulation(anomaly, path_run):
+    """Callback requesting Nek5000 to write the field files and stop (with a
+    negative value in the file ``ioinfo``)."""
+    path = _write_ioinfo(path_run, -1)
+    logger.warning(f"Stop requested ({path}) after anomaly {anomaly.kind}")
+
+
+#: Callbacks indexed by their names in the command line
+CALLBACKS = {
+    "log": log_anomaly,
+    "checkpoint": request_checkpoint,
+    "stop": stop_simulation,
+}
+
+
+class AnomalyDetector:
+    """Run detectors on the records of the time steps of a simulation.
+
+    Parameters
+    ----------
+    path_run: str or path-like
+        Simulation directory
+    detectors: list of Detector
+        By default, :func:`create_detectors`
+    callbacks: list of callable
+        Functions called as ``callback(anomaly, path_run)`` for each anomaly.
+        By default, only :func:`log_anomaly`.
+
+    """
+
+    def __init__(self, path_run, detectors=None, callbacks=None):
+        self.path_run = Path(path_run)
+        self.detectors = create_detectors() if detectors is None else detectors
+        self.callbacks = [log_anomaly] if callbacks is None else list(callbacks)
+        #: detected anomalies
+        self.anomalies = []
+
+    def feed(self, records, warm_up=False):
+        """Check new records and call the callbacks.
+
+        Parameters
+        ----------
+        records: list of dict
+        warm_up: bool
+            Only update the state of the detectors (for example with the past
+            time steps of a simulation): no anomaly is reported.
+
+        Returns
+        -------
+        list of Anomaly
+            Anomalies detected in these records
+
+        """
+        anomalies = []
+        for record in records:
+            for detector in self.detectors:
+                anomaly = detector.check(record)
+                if anomaly is not None:
+                    anomalies.append(anomaly)
+
+        if warm_up:
+            # an anomaly still present is reported with the next time steps
+            for detector in self.detectors:
+                detector.active = False
+            return []
+
+        for anomaly in anomalies:
+            for callback in self.callbacks:
+                try:
+                    callback(anomaly, self.path_run)
+                except Exception as err:
+                    logger.error(f"Error in callback {callback}: {err!r}")
+
+        self.anomalies.extend(anomalies)
+        return anomalies
+
+
+class AnomalyWatcher(threading.Thread):
+    """Background thread following the log of a simulation and running an
+    :class:`AnomalyDetector` on the new time steps.
+
+    Parameters
+    ----------
+    path_run: str or path-like
+        Simulation directory
+    detector: AnomalyDetector
+    interval: float
+        Period (in seconds) of the polling of the log
+
+    """
+
+    def __init__(self, path_run, detector, interval=10.0):
+        from .monitor import SimulationMonitor
+
+        super().__init__(name=f"snek-anomalies-{Path(path_run).name}", daemon=True)
+        self.detector = detector
+        self.interval = interval
+        self.sim_monitor = SimulationMonitor(path_run, detector=detector)
+        self._stopping = threading.Event()
+        # warm up the detector with the time steps already in the log
+        self.sim_monitor.update()
+
+    def poll(self):
+        """Read the new lines of the log and check the new time steps."""
+        nb_anomalies = len(self.detector.anomalies)
+        self.sim_monitor.update()
+        return self.detector.anomalies[nb_anomalies:]
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.poll()
+            except OSError as err:
+                logger.warning(f"Cannot read the outputs: {err}")
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        """Check the last time steps and stop the thread."""
+        self._stopping.set()
+        if self.is_alive():
+            self.join()
+        return self.poll()
@@ -1,16 +1,29 @@
 """Post simulation archive-creation utilities"""
 
+import fnmatch
+import glob
+import hashlib
+import io
+import json
+import os
+import re
 import shlex
 import shutil
 import subprocess
-from glob import iglob
+import tarfile
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
 from pathlib import Path
 from shutil import rmtree
 
 from .. import logger
-from . import modification_date
+from . import isoformat, scan_dir
 from .files import next_path
 
+_CHUNK_SIZE = 2**20
+# uncompressed or compressed (see snek5000.util.compress) field files
+_nek_field_file_regex = re.compile(r"0\.f\d{5}(\.nekz)?$")
+
 
 def archive(tarball, items=(), remove=False, readonly=False):
     """Archive simulation contents into a tarball / compress a tarball.
@@ -46,6 +59,471 @@ def archive(tarball, items=(), remove=False, readonly=False):
     return cmd_output
 
 
+def stream_archive(
+    tarball,
+    items=(),
+    items_to_remove=(),
+    level=3,
+    threads=-1,
+    readonly=True,
+    verify=True,
+    seekable=False,
+):
+    """Archive simulation contents into a zstd compressed tarball in a single
+    pass. The files are read once, streamed as tar members into a
+    multithreaded zstd compressor and their checksums are computed on the fly.
+    The archive is then verified against these checksums before removing
+    ``items_to_remove``.
+
+    With ``seekable=True``, every tar member is compressed as an independent
+    zstd frame and an index of the members is written alongside the archive
+    (``<tarball>.index.json``), so that a single file can be read without
+    decompressing the whole archive (see :class:`IndexedArchive`). The archive
+    remains a valid ``.tar.zst`` file.
+
+    The Python package ``zstandard`` is used if available, otherwise the
+    command ``zstd`` is used through a pipe.
+
+    Parameters
+    ----------
+    tarball: str or path-like
+        Name of the archive, typically ending with ``.tar.zst``. If it exists,
+        a new name is chosen with :func:`snek5000.util.files.next_path`.
+    items: iterable of str or path-like
+        Files or directories to archive and keep.
+    items_to_remove: iterable of str or path-like
+        Files or directories to archive and remove after verification.
+    level: int
+        Compression level.
+    threads: int
+        Number of compression threads. ``-1`` uses all processors.
+    readonly: bool
+        Make the archive read-only.
+    verify: bool
+        Verify the checksums of the archived files. Files are never removed
+        without verification.
+    seekable: bool
+        Compress members independently and write an index of the members.
+
+    Returns
+    -------
+    Path
+        Path to the archive
+
+    Examples
+    --------
+    >>> stream_archive(
+    ...     "data/sim.tar.zst",
+    ...     ["SIZE", "phill.par"],
+    ...     items_to_remove=["phill0.f00001"],
+    ... )
+
+    """
+    if not tarball or not (items or items_to_remove):
+        raise IOError(
+            "Abort archiving because of illegal tarball name / empty input! "
+            f"tarball: {tarball}, items: {items}, items_to_remove: {items_to_remove}"
+        )
+
+    output = next_path(tarball)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    paths = [*_iter_paths(items_to_remove), *_iter_paths(items)]
+    size_total = sum(path.lstat().st_size for path in paths if _is_regular(path))
+
+    logger.info(f"Archiving {len(paths)} files ({size_total / 1e6:.1f} MB) -> {output}")
+    # used only to create the tar headers
+    tar = tarfile.TarFile(fileobj=io.BytesIO(), mode="w")
+    checksums = {}
+    members = {}
+    size_done = 0
+    next_report = 0.1
+    with open(output, "wb") as fp:
+        with ExitStack() as stack:
+            if not seekable:
+                stream = stack.enter_context(_zstd_frame(fp, level, threads))
+
+            for path in paths:
+                tarinfo = tar.gettarinfo(path)
+                offset = fp.tell()
+                if seekable:
+                    with _zstd_frame(fp, level, threads) as stream:
+                        header_size, checksum = _write_member(stream, tarinfo, path)
+                else:
+                    header_size, checksum = _write_member(stream, tarinfo, path)
+
+                if not tarinfo.isreg():
+                    continue
+
+                checksums[tarinfo.name] = checksum
+                size_done += tarinfo.size
+                if seekable:
+                    members[tarinfo.name] = _index_entry(
+                        path,
+                        offset=offset,
+                        length=fp.tell() - offset,
+                        data_offset=header_size,
+                        size=tarinfo.size,
+                        sha256=checksum,
+                    )
+
+                if size_total and size_done / size_total >= next_report:
+                    logger.info(
+                        f"Archived {size_done / 1e6:.1f} / {size_total / 1e6:.1f} MB"
+                    )
+                    next_report = size_done / size_total + 0.1
+
+            if seekable:
+                stream = stack.enter_context(_zstd_frame(fp, level, threads))
+            # end-of-archive marker
+            stream.write(tarfile.NUL * 2 * tarfile.BLOCKSIZE)
+
+    if verify or items_to_remove:
+        verify_archive(output, checksums)
+
+    if seekable:
+        IndexedArchive.write_index(output, members)
+
+    if readonly:
+        output.chmod(0o444)
+
+    remove([Path(item) for item in items_to_remove])
+
+    return output
+
+
+def verify_archive(tarball, checksums):
+    """Verify the contents of a zstd compressed tarball.
+
+    Parameters
+    ----------
+    tarball: str or path-like
+        Path to the archive
+    checksums: dict
+        SHA-256 checksums of the archived regular files, indexed by member name
+
+    """
+    found = {}
+    with _zstd_reader(tarball) as stream:
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for tarinfo in tar:
+                if tarinfo.isreg():
+                    reader = _HashingReader(tar.extractfile(tarinfo))
+                    while reader.read(_CHUNK_SIZE):
+                        pass
+                    found[tarinfo.name] = reader.hexdigest()
+
+    if found != checksums:
+        names = sorted(
+            name
+            for name in set(found) | set(checksums)
+            if found.get(name) != checksums.get(name)
+        )
+        raise IOError(f"Verification of {tarball} failed for members: {names}")
+
+    logger.info(f"Verified {len(found)} files in {tarball}")
+
+
+class IndexedArchive:
+    """Random access to the members of a seekable archive created by
+    :func:`stream_archive` with ``seekable=True``.
+
+    Only the zstd frame containing a member is read and decompressed.
+
+    Parameters
+    ----------
+    tarball: str or path-like
+        Path to the archive. The index ``<tarball>.index.json`` should exist.
+
+    Examples
+    --------
+    >>> ark = IndexedArchive("data/sim.tar.zst")
+    >>> ark.names("session_00/phill0.f?????")
+    ['session_00/phill0.f00001', 'session_00/phill0.f00002']
+    >>> ark.extract("session_00/phill0.f00001", "/tmp")
+    PosixPath('/tmp/phill0.f00001')
+
+    """
+
+    index_suffix = ".index.json"
+    index_version = 1
+
+    @classmethod
+    def path_index(cls, tarball):
+        """Path to the index of an archive."""
+        tarball = Path(tarball)
+        return tarball.with_name(tarball.name + cls.index_suffix)
+
+    @classmethod
+    def write_index(cls, tarball, members):
+        """Write the index of an archive.
+
+        Parameters
+        ----------
+        tarball: str or path-like
+            Path to the archive
+        members: dict
+            Index entries of the members, indexed by member name
+
+        """
+        path_index = cls.path_index(tarball)
+        with open(path_index, "w") as fp:
+            json.dump(
+                {
+                    "version": cls.index_version,
+                    "archive": Path(tarball).name,
+                    "members": members,
+                },
+                fp,
+                indent=1,
+            )
+        return path_index
+
+    def __init__(self, tarball):
+        self.path = Path(tarball)
+        path_index = self.path_index(self.path)
+        try:
+            with open(path_index) as fp:
+                index = json.load(fp)
+        except FileNotFoundError as err:
+            raise IOError(
+                f"{self.path} is not a seekable archive: {path_index} not found"
+            ) from err
+
+        if index.get("version") != self.index_version:
+            raise ValueError(
+                f"Unsupported version {index.get('version')} of the index {path_index}"
+            )
+        self.members = index["members"]
+
+    def __repr__(self):
+        return f"IndexedArchive <{self.path}>"
+
+    def __contains__(self, name):
+        return name in self.members
+
+    def names(self, pattern="*"):
+        """Sorted member names matching a glob pattern."""
+        return sorted(fnmatch.filter(self.members, pattern))
+
+    def read(self, name):
+        """Read the content of a member.
+
+        Parameters
+        ----------
+        name: str
+            Name of the member
+
+        Returns
+        -------
+        bytes
+
+        """
+        try:
+            member = self.members[name]
+        except KeyError as err:
+            raise FileNotFoundError(f"{name} not found in {self.path}") from err
+
+        with open(self.path, "rb") as fp:
+            fp.seek(member["offset"])
+            frame = fp.read(member["length"])
+
+        data_offset = member["data_offset"]
+        data = _zstd_decompress(frame)[data_offset : data_offset + member["size"]]
+        if hashlib.sha256(data).hexdigest() != member["sha256"]:
+            raise IOError(f"Checksum mismatch for {name} in {self.path}")
+        return data
+
+    def extract(self, name, path_dir=".", keep_parents=False):
+        """Extract a member into a directory, by default without its parent
+        directories.
+
+        Parameters
+        ----------
+        name: str
+            Name of the member
+        path_dir: str or path-like
+            Directory where the member is extracted
+        keep_parents: bool
+            Extract the member at its relative path in ``path_dir``, so that
+            members with the same name in different directories do not
+            overwrite each other.
+
+        Returns
+        -------
+        Path
+            Path to the extracted file
+
+        """
+        path = Path(path_dir) / (name if keep_parents else Path(name).name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.read(name))
+        return path
+
+
+class _HashingReader:
+    """Wrap a binary file object to compute a SHA-256 checksum while reading."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def _write_member(stream, tarinfo, path):
+    """Write a tar member. Returns the size of the header and the checksum of
+    the content of regular files."""
+    header = tarinfo.tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, "surrogateescape")
+    stream.write(header)
+    if not tarinfo.isreg():
+        return len(header), None
+
+    reader = _HashingReader(open(path, "rb"))
+    with reader.fileobj:
+        remaining = tarinfo.size
+        while remaining:
+            data = reader.read(min(_CHUNK_SIZE, remaining))
+            if not data:
+                raise IOError(f"{path} was truncated while archiving")
+            stream.write(data)
+            remaining -= len(data)
+
+    remainder = tarinfo.size % tarfile.BLOCKSIZE
+    if remainder:
+        stream.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+
+    return len(header), reader.hexdigest()
+
+
+def _index_entry(path, **entry):
+    """Index entry of an archive member. The simulation time and the variables
+    of Nek5000 field files are also recorded."""
+    if _nek_field_file_regex.search(path.name):
+        from pymech.neksuite.field import read_header
+
+        try:
+            header = read_header(path)
+            entry["time"] = header.time
+            entry["variables"] = header.variables
+        except Exception:
+            logger.warning(f"Cannot read the header of {path}")
+
+    return entry
+
+
+def _is_regular(path):
+    return path.is_file() and not path.is_symlink()
+
+
+def _iter_paths(items):
+    """Yield paths of files and symbolic links, walking through directories.
+    Missing items are skipped."""
+    for item in items:
+        path = Path(item)
+        if not path.exists() and not path.is_symlink():
+            logger.warning(f"Skipping missing item {path}")
+        elif path.is_dir() and not path.is_symlink():
+            yield path
+            yield from sorted(
+                child
+                for child in path.rglob("*")
+                if child.is_symlink() or not child.is_dir()
+            )
+        else:
+            yield path
+
+
+def _zstd_cmd(*args):
+    """Command to run the zstd executable, if available."""
+    zstd = shutil.which("zstd")
+    if zstd is None:
+        raise OSError(
+            "Install the Python package zstandard or the command zstd "
+            "to create zstd compressed archives."
+        )
+    return [zstd, "-q", *args]
+
+
+@contextmanager
+def _zstd_frame(fp, level, threads):
+    """Writable stream compressing into a single zstd frame appended to the
+    binary file object ``fp``."""
+    try:
+        import zstandard
+    except ImportError:
+        threads = os.cpu_count() if threads < 0 else threads
+        cmd = _zstd_cmd(f"-{level}", f"-T{threads}", "-c")
+        # the process writes directly into the file descriptor
+        fp.flush()
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=fp)
+        try:
+            yield process.stdin
+        finally:
+            process.stdin.close()
+            if process.wait():
+                raise subprocess.CalledProcessError(process.returncode, cmd)
+    else:
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        with compressor.stream_writer(fp, closefd=False) as stream:
+            yield stream
+
+
+def _zstd_compress(data, level=3):
+    """Compress data into a complete zstd frame."""
+    try:
+        import zstandard
+    except ImportError:
+        process = subprocess.run(
+            _zstd_cmd(f"-{level}", "-c"),
+            input=data,
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+        return process.stdout
+    else:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(frame):
+    """Decompress a complete zstd frame."""
+    try:
+        import zstandard
+    except ImportError:
+        process = subprocess.run(
+            _zstd_cmd("-d", "-c"), input=frame, stdout=subprocess.PIPE, check=True
+        )
+        return process.stdout
+    else:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(frame)
+
+
+@contextmanager
+def _zstd_reader(path):
+    """Readable stream decompressing ``path``."""
+    try:
+        import zstandard
+    except ImportError:
+        cmd = _zstd_cmd("-d", "-c", str(path))
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            process.wait()
+    else:
+        with open(path, "rb") as fp:
+            decompressor = zstandard.ZstdDecompressor()
+            with decompressor.stream_reader(fp, read_across_frames=True) as stream:
+                yield stream
+
+
 def clean_simul(case, tarball):
     """Clean a simulation after archiving into a tarball."""
     if tarball and not Path(tarball).exists():
@@ -60,8 +538,8 @@ def clean_simul(case, tarball):
         for file in "makefile box.tmp compiler.out SESSION.NAME GIT_REVISION.txt nek5000".split()
     )
     remove([Path("obj")])
-    field_files = Path.cwd().glob(f"*{case}?.f?????")
-    remove(field_files)
+    field_files = scan_dir(Path.cwd(), f"*{case}?.f?????")
+    remove([Path(entry.path) for entry in field_files.values()])
 
 
 def exec_compress(tarball):
@@ -165,16 +643,34 @@ def tar_name(
     compress_format="",
     subdir="data",
     default_prefix="test",
+    paths=None,
 ):
     """Generate a tarball name based on contents of current working
-    directory.
+    directory. The directory of ``pattern`` is listed in a single pass with
+    :func:`snek5000.util.scan_dir`.
+
+    If ``paths`` is given (for example the field files of all the session
+    directories), the files are not searched with ``pattern``: the name is
+    based on their modification dates. An empty string is returned if there
+    are no files.
 
     """
-    modified_dates = [modification_date(f) for f in iglob(pattern)]
+    path_dir, pattern_name = os.path.split(pattern)
+    if paths is not None:
+        modified_dates = [os.path.getmtime(path) for path in paths]
+    elif glob.has_magic(path_dir):
+        modified_dates = [os.path.getmtime(f) for f in glob.iglob(pattern)]
+    else:
+        # single pass over the directory, reusing the results of scandir
+        modified_dates = [
+            entry.stat().st_mtime
+            for entry in scan_dir(path_dir or ".", pattern_name).values()
+            if not entry.name.startswith(".") or pattern_name.startswith(".")
+        ]
     cwd = Path.cwd().name
     if modified_dates:
         if cwd == root_name:
-            timestamp = max(modified_dates)
+            timestamp = isoformat(datetime.fromtimestamp(max(modified_dates)))
             basename = f"{default_prefix}-{timestamp}"
         else:
             basename = cwd
@@ -0,0 +1,435 @@
+"""Scaling benchmarks
+===================
+
+The command ``snek-bench`` measures the strong and weak scaling of a solver on
+the current machine. A family of short simulations is generated from the
+default parameters of the solver (``Simul.create_default_params()``) by varying
+the number of MPI processes, the number of elements and the order of the
+elements. The simulations are launched one after the other with the rule
+``run_fg`` (see :class:`snek5000.make.Make`) and the time per time step is
+parsed from their log file (see
+:class:`snek5000.output.print_stdout.PrintStdOut`) or from the output
+``remaining_clock_time`` (see
+:class:`snek5000.output.remaining_clock_time.RemainingClockTime`)::
+
+    snek-bench phill --nproc 1 2 4 --order 6 8
+    snek-bench phill --nproc 1 2 4 --weak --num-steps 50
+
+The results are saved in a CSV file and plotted as the time per time step and
+per grid point, multiplied by the number of processes, as a function of the
+number of processes. With a perfect scaling, this quantity would be
+constant. Failed runs are recorded with ``success = False``.
+
+For strong scaling, the cases of a series share the same SIZE file, written
+for the smallest number of processes (``params.oper.nproc_min``). If the
+cache of the Nek5000 core objects is enabled (environment variable
+``SNEK_CACHE_CORE``, see
+:meth:`snek5000.make._Nek5000Make.get_path_core_cache`), the core objects are
+then compiled once per series. With ``tight_size=True`` (``--tight-size``),
+each case has a SIZE file for its number of processes: the memory per rank is
+minimal but the core objects cannot be shared between the cases. For weak
+scaling, the mesh changes with the number of processes and each case has its
+own SIZE file.
+
+The same can be done in Python::
+
+    from snek5000.util.bench import Benchmark
+
+    bench = Benchmark("phill", nprocs=[1, 2, 4], orders=[6, 8])
+    df = bench.run()
+    bench.plot(df)
+
+"""
+
+import argparse
+import itertools
+import math
+import sys
+from pathlib import Path
+
+from .. import logger
+from . import now
+
+
+def get_time_per_step(sim):
+    """Get the mean wall time per time step of a simulation.
+
+    The time is read from the summary printed by Nek5000 at the end of the log
+    file (see :meth:`snek5000.output.print_stdout.PrintStdOut.load_timers`)
+    or, if missing, from the output ``remaining_clock_time``.
+
+    Returns
+    -------
+    float
+        ``nan`` if the time per time step cannot be found
+
+    """
+    try:
+        _, summary = sim.output.print_stdout.load_timers()
+    except FileNotFoundError:
+        summary = {}
+    if "time/timestep" in summary:
+        return summary["time/timestep"]
+
+    try:
+        df = sim.output.remaining_clock_time.load()
+    except (AttributeError, IOError):
+        return math.nan
+    return float(df["clock_times_per_timestep"].mean())
+
+
+class Benchmark:
+    """Family of short simulations to measure the scaling of a solver.
+
+    Parameters
+    ----------
+    solver: str
+        Short name of the solver (see
+        :func:`snek5000.solvers.available_solvers`).
+    nprocs: iterable of int
+        Numbers of MPI processes.
+    orders: iterable of int
+        Orders of the elements (``params.oper.elem.order``). By default, the
+        order of the default parameters.
+    nelems: iterable of tuple of int
+        Numbers of elements in each direction for strong scaling. By default,
+        the mesh of the default parameters.
+    weak: bool
+        Weak scaling: the number of elements in the x direction is
+        proportional to the number of MPI processes (starting from the meshes
+        of ``nelems`` for the smallest number of processes).
+    num_steps: int
+        Number of time steps of each simulation.
+    sub_directory: str
+        Sub-directory of ``$FLUIDSIM_PATH`` where the simulations are created.
+    tight_size: bool
+        For strong scaling, write the SIZE file of each case for its number of
+        processes instead of sharing the SIZE file of the smallest number of
+        processes in a series.
+
+    """
+
+    def __init__(
+        self,
+        solver,
+        nprocs=(1, 2, 4),
+        orders=None,
+        nelems=None,
+        weak=False,
+        num_steps=20,
+        sub_directory=None,
+        tight_size=False,
+    ):
+        from ..solvers import import_cls_simul
+
+        self.solver = solver
+        self.Simul = import_cls_simul(solver)
+        self.nprocs = sorted(set(nprocs))
+        self.weak = weak
+        self.num_steps = num_steps
+        self.tight_size = tight_size
+        self.sub_directory = sub_directory or f"bench_{solver}"
+
+        params = self.Simul.create_default_params()
+        self.orders = list(orders or [params.oper.elem.order])
+        if nelems is None:
+            nelems = [(params.oper.nx, params.oper.ny, params.oper.nz)]
+        self.nelems = [tuple(nelem) for nelem in nelems]
+
+    def get_cases(self):
+        """List the cases of the benchmark.
+
+        Returns
+        -------
+        list of dict
+            Cases with the keys ``series`` (index of the series of cases
+            compared for the scaling), ``mode`` (``"strong"`` or ``"weak"``),
+            ``nproc``, ``order``, ``nx``, ``ny`` and ``nz``
+
+        """
+        nproc_ref = self.nprocs[0]
+        mode = "weak" if self.weak else "strong"
+        cases = []
+        series = itertools.count()
+        for order in self.orders:
+            for nx, ny, nz in self.nelems:
+                index_series = next(series)
+                for nproc in self.nprocs:
+                    nx_case = nx
+                    if self.weak:
+                        nx_case = max(1, round(nx * nproc / nproc_ref))
+                    cases.append(
+                        dict(
+                            series=index_series,
+                            mode=mode,
+                            nproc=nproc,
+                            order=order,
+                            nx=nx_case,
+                            ny=ny,
+                            nz=nz,
+                        )
+                    )
+        return cases
+
+    def create_params(self, case):
+        """Create the parameters of the simulation of a case."""
+        params = self.Simul.create_default_params()
+        oper = params.oper
+        oper.nx, oper.ny, oper.nz = case["nx"], case["ny"], case["nz"]
+        oper.elem.order = oper.elem.order_out = case["order"]
+        if self.weak or self.tight_size:
+            # tight SIZE file for this number of processes
+            oper.nproc_min = case["nproc"]
+        else:
+            # same SIZE file (and compiled core objects) for the whole series
+            oper.nproc_min = self.nprocs[0]
+        oper.nproc_max = max(oper.nproc_max, self.nprocs[-1])
+
+        general = params.nek.general
+        general.stop_at = "numSteps"
+        general.num_steps = self.num_steps
+        # no field files during the benchmark
+        general.write_control = "timeStep"
+        general.write_interval = self.num_steps + 1
+
+        params.output.sub_directory = self.sub_directory
+        params.short_name_type_run = (
+            f"bench_{case['mode']}_np{case['nproc']}_o{case['order']}"
+        )
+        return params
+
+    def run_case(self, case, dryrun=False):
+        """Create and run the simulation of a case.
+
+        Returns
+        -------
+        dict
+            The case completed with the results. If the run fails, ``success``
+            is ``False`` and the times are ``nan``.
+
+        """
+        sim = self.Simul(self.create_params(case))
+        nb_elements = sim.oper.nb_elements
+        nb_points = nb_elements * case["order"] ** sim.params.oper.dim
+        result = dict(
+            solver=self.solver,
+            **case,
+            nb_elements=nb_elements,
+            nb_points=nb_points,
+            path_run=str(sim.path_run),
+        )
+        if dryrun:
+            return result
+
+        logger.info(f"Benchmark: running {case} in {sim.path_run}")
+        success = bool(sim.make.exec("run_fg", nproc=case["nproc"]))
+        if not success:
+            logger.error(f"Benchmark: the simulation in {sim.path_run} failed")
+
+        try:
+            df = sim.output.print_stdout.load()
+        except FileNotFoundError:
+            num_steps = 0
+        else:
+            num_steps = int(df.index.max()) if len(df) else 0
+
+        time_per_step = get_time_per_step(sim) if success else math.nan
+        result.update(
+            success=success,
+            num_steps=num_steps,
+            time_per_step=time_per_step,
+            time_per_step_per_point=time_per_step * case["nproc"] / nb_points,
+        )
+        return result
+
+    def run(self, dryrun=False, path_csv=None):
+        """Run all the cases of the benchmark.
+
+        Parameters
+        ----------
+        dryrun: bool
+            Only create the simulations
+        path_csv: str or path-like
+            CSV file where the results are saved
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        import pandas as pd
+
+        df = pd.DataFrame([self.run_case(case, dryrun) for case in self.get_cases()])
+        if not dryrun:
+            df = compute_efficiency(df)
+        if path_csv is not None:
+            df.to_csv(path_csv, index=False)
+            logger.info(f"Benchmark results saved in {path_csv}")
+        return df
+
+    def plot(self, df, path_fig=None):
+        """Plot the results of :meth:`run`."""
+        return plot_bench(df, path_fig)
+
+
+def compute_efficiency(df):
+    """Add the column ``efficiency``: the parallel efficiency compared to the
+    smallest number of processes of each series.
+
+    For strong and weak scaling, the efficiency is the ratio of the times per
+    time step and per grid point multiplied by the number of processes.
+
+    """
+    df = df.copy()
+    df["efficiency"] = math.nan
+    for _, group in df.groupby("series"):
+        ref = group.loc[group["nproc"].idxmin()]
+        df.loc[group.index, "efficiency"] = (
+            ref["time_per_step_per_point"] / group["time_per_step_per_point"]
+        )
+    return df
+
+
+def plot_bench(df, path_fig=None):
+    """Plot the time per time step and per grid point (multiplied by the number
+    of processes) and the parallel efficiency as functions of the number of
+    processes.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Results of :meth:`Benchmark.run` (or loaded from its CSV file)
+    path_fig: str or path-like
+        Optional path to save the figure
+
+    """
+    import matplotlib.pyplot as plt
+
+    if "efficiency" not in df:
+        df = compute_efficiency(df)
+
+    fig, (ax_time, ax_eff) = plt.subplots(nrows=2, sharex=True)
+    for _, group in df.groupby("series"):
+        group = group.sort_values("nproc")
+        first = group.iloc[0]
+        label = (
+            f"{first['mode']}, order={first['order']}, "
+            f"{first['nx']}x{first['ny']}x{first['nz']} elements"
+        )
+        ax_time.plot(group.nproc, group.time_per_step_per_point, "o-", label=label)
+        ax_eff.plot(group.nproc, group.efficiency, "o-")
+
+    ax_time.set_ylabel("time / (step point) x nproc (s)")
+    ax_time.set_xscale("log", base=2)
+    ax_time.legend(fontsize="small")
+    ax_eff.set_ylabel("efficiency")
+    ax_eff.set_xlabel("number of MPI processes")
+    ax_eff.axhline(1.0, color="k", linestyle=":")
+    fig.tight_layout()
+
+    if path_fig is not None:
+        fig.savefig(path_fig)
+        logger.info(f"Benchmark figure saved in {path_fig}")
+    return fig
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="snek-bench",
+        description="Measure the strong and weak scaling of a solver.",
+    )
+    parser.add_argument("solver", help="short name of the solver")
+    parser.add_argument(
+        "-np",
+        "--nproc",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="numbers of MPI processes",
+    )
+    parser.add_argument(
+        "-o", "--order", type=int, nargs="+", default=None, help="orders of elements"
+    )
+    parser.add_argument(
+        "-n",
+        "--nelem",
+        type=int,
+        nargs=3,
+        action="append",
+        default=None,
+        metavar=("NX", "NY", "NZ"),
+        help="numbers of elements (can be repeated)",
+    )
+    parser.add_argument(
+        "--weak",
+        action="store_true",
+        help="weak scaling: nx proportional to the number of processes",
+    )
+    parser.add_argument(
+        "--num-steps", type=int, default=20, help="number of time steps per run"
+    )
+    parser.add_argument(
+        "--sub-directory",
+        default=None,
+        help="sub-directory of $FLUIDSIM_PATH for the simulations",
+    )
+    parser.add_argument(
+        "--tight-size",
+        action="store_true",
+        help=(
+            "strong scaling: one SIZE file per number of processes instead of "
+            "one per series (compiles the Nek5000 core for each case)"
+        ),
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="CSV file of the results (default: bench_<solver>_<date>.csv)",
+    )
+    parser.add_argument(
+        "-d",
+        "--dry-run",
+        action="store_true",
+        help="only create the simulations",
+    )
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    bench = Benchmark(
+        args.solver,
+        nprocs=args.nproc,
+        orders=args.order,
+        nelems=args.nelem,
+        weak=args.weak,
+        num_steps=args.num_steps,
+        sub_directory=args.sub_directory,
+        tight_size=args.tight_size,
+    )
+    path_csv = args.output or Path(f"bench_{args.solver}_{now()}.csv")
+    df = bench.run(dryrun=args.dry_run, path_csv=path_csv)
+    print(df.to_string(index=False))
+    if not args.dry_run:
+        bench.plot(df, path_csv.with_suffix(".png"))
+
+    if not args.dry_run and (
+        not df["success"].all() or df["time_per_step"].isna().any()
+    ):
+        sys.exit(1)
+
+
+if "sphinx" in sys.modules:
+    from textwrap import indent
+
+    __doc__ += """
+Help message
+------------
+
+.. code-block::
+
+""" + indent(
+        create_parser().format_help(), "    "
+    )
@@ -0,0 +1,673 @@
+"""Compression of Nek5000 field files
+====================================
+
+Field files are transcoded into a compressed format (suffix ``.nekz``) in which
+
+- the 132 bytes header of the field file is kept as it is at the beginning of
+  the file, so that :func:`pymech.neksuite.field.read_header` and
+  :func:`snek5000.util.files.bisect_nek_files_by_time` work on compressed
+  files,
+- the element map, the mesh and the metadata are compressed losslessly,
+- every other variable (``ux``, ``uy``, ``uz``, ``pressure``, ``temperature``,
+  ``s01``, ...) is byte-shuffled and compressed with zstd, optionally after an
+  error-bounded quantization (lossy compression).
+
+With an absolute tolerance ``tol`` for a variable, its values ``v`` are
+quantized as ``q = round(v / (2 * tol))`` and restored as ``2 * tol * q``, so
+that the absolute error is bounded by ``tol`` (up to the floating point
+precision of the file).
+
+The coordinates can also be removed from all field files of a series except
+the first one with :func:`dedupe_mesh` (rule ``dedupe`` of ``snek-make``).
+
+The readers of :mod:`snek5000.output.readers` decompress such files and restore
+their coordinates transparently (see :func:`readable_field_files`).
+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import numpy as np
+
+from ..log import logger
+from .archive import _zstd_compress, _zstd_decompress
+
+suffix_compressed = ".nekz"
+_magic = b"\x00SNEKZ1\x00"
+_header_size = 132
+
+
+def is_compressed(path):
+    """Check if a field file is compressed."""
+    path = Path(path)
+    if path.suffix != suffix_compressed:
+        return False
+    with open(path, "rb") as fp:
+        fp.seek(_header_size)
+        return fp.read(len(_magic)) == _magic
+
+
+def has_mesh(path):
+    """Check if a field file, compressed or not, contains the coordinates."""
+    with open(path, "rb") as fp:
+        return "X" in _parse_header(fp.read(_header_size)).variables
+
+
+def _parse_header(raw):
+    """Parse the header of a field file, like
+    :func:`pymech.neksuite.field.read_header`."""
+    from pymech.neksuite.field import Header
+
+    header = raw[:_header_size].split()
+    if len(header) < 12:
+        raise IOError("Header of the file was too short.")
+    return Header(header[1], header[2:5], *header[5:12])
+
+
+def _replace_variables(raw_header, variables):
+    """Replace the variables (``XUPT``, ...) in the header of a field file."""
+    token = list(re.finditer(rb"\S+", raw_header))[11]
+    raw_header = (
+        raw_header[: token.start()] + variables.encode() + raw_header[token.end() :]
+    )
+    if len(raw_header) > _header_size and raw_header[_header_size:].strip():
+        raise ValueError("No space left in the header of the field file")
+    return raw_header[:_header_size].ljust(_header_size)
+
+
+def _get_layout(header, nb_elems):
+    """Names and shapes of the variables of a field file, in the order they
+    are written."""
+    nb_dims = header.nb_dims
+    nb_vars = header.nb_vars
+    names_groups = (
+        ("mesh", ("x", "y", "z")[:nb_dims]),
+        ("velocity", ("ux", "uy", "uz")[:nb_dims]),
+        ("pressure", ("pressure",)),
+        ("temperature", ("temperature",)),
+        ("scalars", tuple(f"s{i:02d}" for i in range(1, nb_vars[4] + 1))),
+    )
+    layout = []
+    for (group, names), nb_comps in zip(names_groups, nb_vars):
+        if nb_comps:
+            # data is written element by element, then component by component
+            layout.append((group, names, (nb_elems, nb_comps, header.nb_pts_elem)))
+    return layout
+
+
+def _read_field_file(raw, path):
+    """Split the content of a field file into its parts, without copying the
+    data."""
+    header = _parse_header(raw)
+    nb_elems = header.nb_elems_file
+
+    endian_tag = raw[_header_size : _header_size + 4]
+    if struct.unpack("<f", endian_tag)[0] == np.float32(6.54321):
+        endian = "<"
+    elif struct.unpack(">f", endian_tag)[0] == np.float32(6.54321):
+        endian = ">"
+    else:
+        raise ValueError(f"Could not interpret endianness of {path}")
+    dtype = np.dtype(f"{endian}f{header.wdsz}")
+
+    offset = _header_size + 4
+    elmap = np.frombuffer(raw, dtype=f"{endian}i4", count=nb_elems, offset=offset)
+    offset += 4 * nb_elems
+    offset_data = offset
+
+    groups = {}
+    for group, names, shape in _get_layout(header, nb_elems):
+        count = int(np.prod(shape))
+        values = np.frombuffer(raw, dtype=dtype, count=count, offset=offset)
+        groups[group] = (names, values.reshape(shape))
+        offset += count * dtype.itemsize
+
+    return SimpleNamespace(
+        header=header,
+        dtype=dtype,
+        elmap=elmap,
+        offset_data=offset_data,
+        groups=groups,
+        trailer=raw[offset:],
+    )
+
+
+def _get_size_metadata(header, nb_elems):
+    """Size of the metadata (bounding boxes of the variables for every
+    element, in single precision) written by Nek5000 after the data of 3D
+    fields, and size of the part corresponding to the mesh."""
+    if header.nb_dims < 3:
+        return 0, 0
+    size_per_comp = 2 * 4 * nb_elems
+    return size_per_comp * sum(header.nb_vars), size_per_comp * header.nb_vars[0]
+
+
+def _shuffle(array):
+    """Group the bytes of the items of an array by significance."""
+    return np.ascontiguousarray(
+        array.view(np.uint8).reshape(-1, array.dtype.itemsize).T
+    ).tobytes()
+
+
+def _unshuffle(data, dtype, shape):
+    """Inverse of :func:`_shuffle`."""
+    dtype = np.dtype(dtype)
+    shuffled = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(shape)
+
+
+def compress_field_file(path, tolerances=None, level=3, path_output=None, strict=True):
+    """Compress a Nek5000 field file.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Path to the field file
+    tolerances: dict
+        Absolute tolerance of the lossy compression for some variables, for
+        example ``{"pressure": 1e-6, "ux": 1e-5}``. Variables without tolerance
+        and the mesh are compressed losslessly.
+    level: int
+        zstd compression level
+    path_output: str or path-like
+        Path to the compressed file, by default ``<path>.nekz``.
+    strict: bool
+        Raise a ``ValueError`` if a tolerance is given for a variable which is
+        not in the file. If ``False``, these tolerances are ignored with a
+        warning.
+
+    Returns
+    -------
+    dict
+        Paths, sizes and compression ratio
+
+    """
+    path = Path(path)
+    tolerances = dict(tolerances or {})
+    path_output = (
+        Path(path_output)
+        if path_output
+        else path.with_name(path.name + suffix_compressed)
+    )
+
+    raw = path.read_bytes()
+    field = _read_field_file(raw, path)
+    blocks = [("prefix", raw[_header_size : field.offset_data], {"codec": "zstd"})]
+
+    for group, (names, values) in field.groups.items():
+        for icomp, name in enumerate(names):
+            comp = values[:, icomp, :]
+            tolerance = tolerances.pop(name, None)
+            if group == "mesh" or not tolerance:
+                blocks.append((name, _shuffle(comp), {"codec": "shuffle-zstd"}))
+            elif not np.all(np.isfinite(comp)):
+                logger.warning(
+                    f"Non-finite values of {name} in {path}: lossless compression"
+                )
+                blocks.append((name, _shuffle(comp), {"codec": "shuffle-zstd"}))
+            else:
+                quantized = np.round(comp / (2 * tolerance)).astype("<i8")
+                blocks.append(
+                    (
+                        name,
+                        _shuffle(quantized),
+                        {"codec": "quantize-shuffle-zstd", "tolerance": tolerance},
+                    )
+                )
+
+    if tolerances:
+        message = f"Unknown variables {sorted(tolerances)} in {path}"
+        if strict:
+            raise ValueError(message)
+        logger.warning(f"{message}: tolerances ignored")
+
+    blocks.append(("trailer", field.trailer, {"codec": "zstd"}))
+
+    meta = {
+        "dtype": field.dtype.str,
+        "nb_elems": len(field.elmap),
+        "size": len(raw),
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "blocks": [],
+    }
+    compressed = []
+    for name, data, attribs in blocks:
+        data = _zstd_compress(data, level)
+        compressed.append(data)
+        meta["blocks"].append({"name": name, "length": len(data), **attribs})
+
+    meta = json.dumps(meta).encode()
+    with open(path_output, "wb") as fp:
+        fp.write(raw[:_header_size])
+        fp.write(_magic)
+        fp.write(struct.pack("<I", len(meta)))
+        fp.write(meta)
+        for data in compressed:
+            fp.write(data)
+
+    size_compressed = path_output.stat().st_size
+    return {
+        "path": path,
+        "path_output": path_output,
+        "size": len(raw),
+        "size_compressed": size_compressed,
+        "ratio": len(raw) / size_compressed,
+    }
+
+
+def decompress_field_file(path, path_output=None):
+    """Decompress a field file compressed with :func:`compress_field_file`.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Path to the compressed field file
+    path_output: str or path-like
+        Path to the decompressed file, by default ``path`` without the suffix
+        ``.nekz``.
+
+    Returns
+    -------
+    Path
+        Path to the decompressed file
+
+    """
+    path = Path(path)
+    path_output = Path(path_output) if path_output else path.with_suffix("")
+
+    with open(path, "rb") as fp:
+        header = fp.read(_header_size)
+        if fp.read(len(_magic)) != _magic:
+            raise ValueError(f"{path} is not a compressed field file")
+        (meta_size,) = struct.unpack("<I", fp.read(4))
+        meta = json.loads(fp.read(meta_size))
+
+        dtype = np.dtype(meta["dtype"])
+        nb_elems = meta["nb_elems"]
+        blocks = {}
+        for block in meta["blocks"]:
+            blocks[block["name"]] = (block, _zstd_decompress(fp.read(block["length"])))
+
+    chunks = [header, blocks["prefix"][1]]
+    for group, names, shape in _get_layout(_parse_header(header), nb_elems):
+        values = np.empty(shape, dtype=dtype)
+        for icomp, name in enumerate(names):
+            block, data = blocks[name]
+            if block["codec"] == "quantize-shuffle-zstd":
+                quantized = _unshuffle(data, "<i8", shape[::2])
+                values[:, icomp, :] = quantized * (2 * block["tolerance"])
+            else:
+                values[:, icomp, :] = _unshuffle(data, dtype, shape[::2])
+        chunks.append(values.tobytes())
+    chunks.append(blocks["trailer"][1])
+
+    raw = b"".join(chunks)
+    lossy = any(block["codec"].startswith("quantize") for block, _ in blocks.values())
+    if len(raw) != meta["size"] or (
+        not lossy and hashlib.sha256(raw).hexdigest() != meta["sha256"]
+    ):
+        raise IOError(f"Decompression of {path} failed")
+
+    path_output.write_bytes(raw)
+    return path_output
+
+
+def strip_mesh(path, path_output=None):
+    """Remove the coordinates from a field file.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Path to an uncompressed field file
+    path_output: str or path-like
+        Path to the output file, by default ``path`` is replaced.
+
+    Returns
+    -------
+    int
+        Number of bytes saved
+
+    """
+    path = Path(path)
+    path_output = Path(path_output) if path_output else path
+
+    raw = path.read_bytes()
+    field = _read_field_file(raw, path)
+    if "mesh" not in field.groups:
+        return 0
+
+    header = field.header
+    if header.nb_files > 1:
+        raise ValueError(f"{path} is part of a multi-file output")
+
+    nb_elems = len(field.elmap)
+    size_metadata, size_metadata_mesh = _get_size_metadata(header, nb_elems)
+    trailer = field.trailer
+    if size_metadata and len(trailer) == size_metadata:
+        trailer = trailer[size_metadata_mesh:]
+
+    _, mesh = field.groups["mesh"]
+    offset_mesh_end = field.offset_data + mesh.nbytes
+    chunks = [
+        _replace_variables(raw[:_header_size], header.variables.replace("X", "", 1)),
+        raw[_header_size : field.offset_data],
+        raw[offset_mesh_end : len(raw) - len(field.trailer)],
+        trailer,
+    ]
+    _write_bytes_atomic(path_output, b"".join(chunks))
+    return len(raw) - sum(len(chunk) for chunk in chunks)
+
+
+def restore_mesh(path, path_mesh, path_output=None):
+    """Restore the coordinates of a field file from another field file of the
+    same simulation.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Path to an uncompressed field file without coordinates
+    path_mesh: str or path-like
+        Path to an uncompressed field file with coordinates
+    path_output: str or path-like
+        Path to the output file, by default ``path`` is replaced.
+
+    Returns
+    -------
+    Path
+        Path to the output file
+
+    """
+    return _restore_mesh(path, _load_field_file(path_mesh), path_mesh, path_output)
+
+
+def _load_field_file(path):
+    return _read_field_file(Path(path).read_bytes(), path)
+
+
+def _restore_mesh(path, field_mesh, path_mesh, path_output=None):
+    """Restore the coordinates from a field file already read (see
+    :func:`restore_mesh`)."""
+    path = Path(path)
+    path_output = Path(path_output) if path_output else path
+
+    raw = path.read_bytes()
+    field = _read_field_file(raw, path)
+    if "mesh" in field.groups:
+        if path_output != path:
+            shutil.copyfile(path, path_output)
+        return path_output
+
+    header, header_mesh = field.header, field_mesh.header
+    if (
+        "mesh" not in field_mesh.groups
+        or header.orders != header_mesh.orders
+        or field.dtype != field_mesh.dtype
+        or not np.array_equal(np.sort(field.elmap), np.sort(field_mesh.elmap))
+    ):
+        raise ValueError(f"Cannot restore the mesh of {path} from {path_mesh}")
+
+    # elements may be written in different orders
+    order = np.argsort(field_mesh.elmap)
+    order = order[np.searchsorted(field_mesh.elmap, field.elmap, sorter=order)]
+    _, mesh = field_mesh.groups["mesh"]
+
+    nb_elems = len(field.elmap)
+    size_metadata, size_metadata_mesh = _get_size_metadata(header_mesh, nb_elems)
+    trailer = field.trailer
+    if size_metadata and len(field_mesh.trailer) == size_metadata:
+        if len(trailer) == size_metadata - size_metadata_mesh:
+            metadata_mesh = np.frombuffer(
+                field_mesh.trailer, dtype=np.uint8, count=size_metadata_mesh
+            ).reshape(nb_elems, -1)
+            trailer = metadata_mesh[order].tobytes() + trailer
+
+    chunks = [
+        _replace_variables(raw[:_header_size], "X" + header.variables),
+        raw[_header_size : field.offset_data],
+        mesh[order].tobytes(),
+        raw[field.offset_data : len(raw) - len(field.trailer)],
+        trailer,
+    ]
+    _write_bytes_atomic(path_output, b"".join(chunks))
+    return path_output
+
+
+def find_mesh_file(path):
+    """Find the field file containing the coordinates for a field file
+    without coordinates, that is the first file of the same series in the same
+    directory with coordinates.
+
+    Returns
+    -------
+    Path or None
+
+    """
+    path = Path(path)
+    name = path.name[: -len(suffix_compressed)] if is_compressed(path) else path.name
+    pattern = name[:-5] + "?????"
+    paths = {path.name: path for path in path.parent.glob(pattern)}
+    for path_compressed in path.parent.glob(pattern + suffix_compressed):
+        paths.setdefault(path_compressed.stem, path_compressed)
+
+    for key in sorted(paths):
+        if has_mesh(paths[key]):
+            return paths[key]
+
+
+def dedupe_mesh(path_dir=".", pattern="*0.f?????"):
+    """Remove the coordinates from the field files of a directory, except from
+    the first file of each series (for example ``phill0.f?????`` and
+    ``stsphill0.f?????``). The readers of :mod:`snek5000.output.readers`
+    restore the coordinates from the first file.
+
+    Parameters
+    ----------
+    path_dir: str or path-like
+        Directory containing the field files
+    pattern: str
+        Glob pattern of the field files
+
+    Returns
+    -------
+    int
+        Number of bytes saved
+
+    """
+    series = {}
+    for path in sorted(Path(path_dir).glob(pattern)):
+        series.setdefault(path.name[:-5], []).append(path)
+
+    size_saved = 0
+    for paths in series.values():
+        paths_with_mesh = [path for path in paths if has_mesh(path)]
+        for path in paths_with_mesh[1:]:
+            try:
+                size_saved += strip_mesh(path)
+            except ValueError as err:
+                logger.warning(f"Skipping {path}: {err}")
+
+    logger.info(f"Mesh deduplication in {path_dir}: {size_saved / 1e6:.1f} MB saved")
+    return size_saved
+
+
+def _write_bytes_atomic(path, data):
+    path_tmp = path.with_name(f".{path.name}.tmp")
+    path_tmp.write_bytes(data)
+    os.replace(path_tmp, path)
+
+
+@contextmanager
+def readable_field_files(paths):
+    """Context manager yielding paths to uncompressed field files with
+    coordinates. Compressed files are decompressed and coordinates removed by
+    :func:`dedupe_mesh` are restored into a temporary directory, removed when
+    exiting the context.
+
+    Parameters
+    ----------
+    paths: iterable of str or path-like
+        Paths to field files, compressed or not
+
+    """
+    paths = [Path(path) for path in paths]
+    if all(path.suffix != suffix_compressed and has_mesh(path) for path in paths):
+        yield paths
+        return
+
+    with TemporaryDirectory(prefix="snek5000_") as path_tmp:
+        path_tmp = Path(path_tmp)
+        (path_tmp / "mesh").mkdir()
+        # the mesh files are found, decompressed and read once per series
+        paths_mesh = {}
+        fields_mesh = {}
+        paths_readable = []
+        for path in paths:
+            name = path.stem if path.suffix == suffix_compressed else path.name
+            path_readable = path
+            if path.suffix == suffix_compressed:
+                path_readable = decompress_field_file(path, path_tmp / name)
+
+            if not has_mesh(path_readable):
+                key = path.parent, name[:-5]
+                if key not in paths_mesh:
+                    paths_mesh[key] = find_mesh_file(path)
+                path_mesh = paths_mesh[key]
+                if path_mesh is None:
+                    logger.warning(f"No field file with coordinates for {path}")
+                else:
+                    if path_mesh not in fields_mesh:
+                        path_mesh_readable = path_mesh
+                        if path_mesh.suffix == suffix_compressed:
+                            path_mesh_readable = decompress_field_file(
+                                path_mesh, path_tmp / "mesh" / path_mesh.stem
+                            )
+                        fields_mesh[path_mesh] = _load_field_file(path_mesh_readable)
+                    path_readable = _restore_mesh(
+                        path_readable,
+                        fields_mesh[path_mesh],
+                        path_mesh,
+                        path_tmp / name,
+                    )
+            paths_readable.append(path_readable)
+
+        yield paths_readable
+
+
+def _parse_tolerance(arg):
+    name, _, value = arg.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Invalid tolerance {arg!r}, expected NAME=VALUE"
+        ) from None
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="snek-compress",
+        description=(
+            "Compress Nek5000 field files, losslessly or with error-bounded "
+            "lossy quantization of some variables."
+        ),
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help=(
+            "field files, or directories in which the field files "
+            "(*0.f?????) are compressed"
+        ),
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        action="append",
+        type=_parse_tolerance,
+        default=[],
+        metavar="NAME=VALUE",
+        help="absolute tolerance for a variable, for example pressure=1e-6",
+    )
+    parser.add_argument(
+        "-l", "--level", type=int, default=3, help="zstd compression level"
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="remove the original files after compression",
+    )
+    parser.add_argument(
+        "-d",
+        "--decompress",
+        action="store_true",
+        help="decompress *.nekz files instead of compressing",
+    )
+    return parser
+
+
+def _iter_field_files(paths, decompress):
+    pattern = f"*0.f?????{suffix_compressed if decompress else ''}"
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.glob(pattern))
+        else:
+            yield path
+
+
+def main():
+    args = create_parser().parse_args()
+    tolerances = dict(args.tolerance)
+
+    size = size_compressed = 0
+    for path in _iter_field_files(args.paths, args.decompress):
+        if args.decompress:
+            path_output = decompress_field_file(path)
+            print(f"{path} -> {path_output}")
+        else:
+            # other series (for example statistics) may not have all variables
+            result = compress_field_file(path, tolerances, args.level, strict=False)
+            if args.remove:
+                # raises an IOError if the compressed file is corrupted
+                with TemporaryDirectory(prefix="snek5000_") as path_tmp:
+                    decompress_field_file(result["path_output"], Path(path_tmp) / "f")
+            size += result["size"]
+            size_compressed += result["size_compressed"]
+            print(
+                f"{path} -> {result['path_output']} "
+                f"(compression ratio {result['ratio']:.2f})"
+            )
+
+        if args.remove:
+            path.unlink()
+
+    if size_compressed:
+        print(
+            f"Total: {size / 1e6:.1f} MB -> {size_compressed / 1e6:.1f} MB "
+            f"(compression ratio {size / size_compressed:.2f})"
+        )
+
+
+if "sphinx" in sys.modules:
+    from textwrap import indent
+
+    __doc__ += """
+Help message
+------------
+
+.. code-block::
+
+""" + indent(
+        create_parser().format_help(), "    "
+    )
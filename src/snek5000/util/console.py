@@ -22,8 +22,7 @@ def print_versions():
     for pkg_name, version in versions.items():
         print(f"{pkg_name.ljust(15)} {version}")
 
-    names = sorted(set([entry_point.name for entry_point in available_solvers()]))
-    print("\nInstalled solvers: " + ", ".join(names))
+    print("\nInstalled solvers: " + ", ".join(sorted(available_solvers().names)))
 
 
 def start_ipython_load_sim():
@@ -1,15 +1,13 @@
 import bisect
+import fnmatch
 import os
 import re
+import sys
+from functools import lru_cache
 from pathlib import Path
 from shutil import copy2
 
-from pymech.neksuite.field import read_header
-
-from fluiddyn.io import FLUIDSIM_PATH
-
 from .. import logger
-from ..params import load_params
 
 
 def _is_empty_directory(path):
@@ -94,6 +92,83 @@ def next_path(old_path, force_suffix=False, return_suffix=False):
     return (i, new_path) if return_suffix else new_path
 
 
+#: ``ioctl`` request of Linux to clone a file (``FICLONE``)
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Clone a file with copy-on-write (Btrfs, XFS, ...). Only on Linux."""
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflinks are only supported on Linux")
+
+    import fcntl
+
+    with open(src, "rb") as file_src, open(dst, "wb") as file_dst:
+        fcntl.ioctl(file_dst.fileno(), _FICLONE, file_src.fileno())
+
+
+def copy_file(src, dst, link=None):
+    """Copy a file, or link it if possible.
+
+    Parameters
+    ----------
+    src: str or path-like
+        Source file
+    dst: str or path-like
+        Destination file, overwritten if it exists
+    link: str
+        ``None`` to copy the file, ``"hardlink"`` to create a hard link or
+        ``"reflink"`` to clone the file with copy-on-write. If the link cannot
+        be created (for example across filesystems), the file is copied.
+
+    Returns
+    -------
+    str
+        How the file was created: ``"copy"``, ``"hardlink"``, ``"reflink"`` or
+        ``"unchanged"`` if ``dst`` is already a hard link to ``src``.
+
+    .. warning::
+
+        A hard link shares its content with the source file: modifying the
+        destination in place also modifies the source. Reflinks do not have
+        this problem.
+
+    """
+    if link not in (None, "hardlink", "reflink"):
+        raise ValueError(f"Unknown link={link!r}: expected 'hardlink' or 'reflink'")
+
+    try:
+        same_file = os.path.samefile(src, dst)
+    except FileNotFoundError:
+        same_file = False
+
+    if same_file:
+        if link == "hardlink":
+            return "unchanged"
+        # break the hard link instead of truncating the source
+        os.unlink(dst)
+
+    if link == "hardlink":
+        try:
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            os.link(src, dst)
+        except OSError as err:
+            logger.debug(f"Cannot hard link {src}, copying it instead: {err}")
+        else:
+            return link
+    elif link == "reflink":
+        try:
+            _reflink(src, dst)
+        except OSError as err:
+            logger.debug(f"Cannot reflink {src}, copying it instead: {err}")
+        else:
+            return link
+
+    copy2(src, dst)
+    return "copy"
+
+
 def create_session(case, re2, ma2, par):
     """Creates a session and write the path to a `SESSION.NAME` file.
     Then, symlinks re2 and ma2 files, and copies the par file.
@@ -110,6 +185,8 @@ def create_session(case, re2, ma2, par):
         Parameter file name
 
     """
+    from ..params import load_params
+
     params = load_params()
     session_dir = Path(params.output.path_session).relative_to(params.path_run)
 
@@ -127,6 +204,66 @@ def create_session(case, re2, ma2, par):
     copy2(par, session_dir / par)
 
 
+@lru_cache(maxsize=4096)
+def _read_field_file_header(path, key):
+    """Read a header, cached by path and ``key`` (inode, modification time
+    and size) so that modified files are read again."""
+    from pymech.neksuite.field import read_header
+
+    header = read_header(path)
+    return header.time, header.istep
+
+
+def get_field_file_header(path):
+    """Get the simulation time and the time step of a field file from its
+    header. The headers of the most recently used files are cached as long as
+    the files are not modified.
+
+    Returns
+    -------
+    (time, istep): tuple[float, int]
+
+    """
+    path = os.fspath(path)
+    stat = os.stat(path)
+    return _read_field_file_header(path, (stat.st_ino, stat.st_mtime_ns, stat.st_size))
+
+
+def list_field_files(path_session, case, prefix="", compressed=True):
+    """List the field files ``{prefix}{case}0.f?????`` of a session directory,
+    sorted by index, with a single listing of the directory.
+
+    Parameters
+    ----------
+    path_session: str or path-like
+        Session directory
+    case: str
+        Name of the case (usually the short name of the solver)
+    prefix: str
+        Prefix of special field files, for example ``sts``
+    compressed: bool
+        Include compressed field files (see :mod:`snek5000.util.compress`)
+        whose uncompressed files do not exist.
+
+    Returns
+    -------
+    list of Path
+
+    """
+    from . import scan_dir
+    from .compress import suffix_compressed
+
+    pattern = f"{prefix}{case}0.f?????"
+    contents = scan_dir(path_session)
+    names = {name: name for name in fnmatch.filter(contents, pattern)}
+    if compressed:
+        for name in fnmatch.filter(contents, pattern + suffix_compressed):
+            names.setdefault(name[: -len(suffix_compressed)], name)
+
+    path_session = Path(path_session)
+    return [path_session / names[name] for name in sorted(names)]
+
+
 class LazyNekFile:
     """A small data stucture to assist bisection sort by simulation time,
     :func:`bisect_nek_files_by_time`
@@ -138,7 +275,7 @@ class LazyNekFile:
 
     @property
     def time(self):
-        return read_header(self.path).time
+        return get_field_file_header(self.path)[0]
 
     def __gt__(self, other):
         time = other.time if isinstance(other, type(self)) else other
@@ -179,6 +316,42 @@ def bisect_nek_files_by_time(files, time):
     return files[index]
 
 
+def find_field_file_by_time(files, time):
+    """Find the field file whose simulation time is the nearest to ``time``.
+
+    The search is a binary search over the times of the headers (see
+    :func:`get_field_file_header`), so that only a few headers are read, and
+    only once. The field files sorted by index are assumed to be sorted by
+    simulation time, which is the case within a session.
+
+    Parameters
+    ----------
+    files: iterable of str or path-like
+        Field files, for example given by :func:`list_field_files`
+    time: float
+        Simulation time
+
+    Returns
+    -------
+    file: str or path-like
+
+    """
+    files = sorted(files)
+    if not files:
+        raise FileNotFoundError(f"No field files to find {time = }")
+    lazy_files = [LazyNekFile(file) for file in files]
+
+    index = bisect.bisect_left(lazy_files, time)
+    if index == len(files):
+        index -= 1
+    elif index > 0:
+        time_before, time_after = lazy_files[index - 1].time, lazy_files[index].time
+        if time - time_before <= time_after - time:
+            index -= 1
+
+    return files[index]
+
+
 def _path_try_from_fluidsim_path(path_dir):
     """Converts to a :class:`pathlib.Path` object and if it does not exists,
     attempts a path relative to environment variable ``FLUIDSIM_PATH``.
@@ -187,6 +360,8 @@ def _path_try_from_fluidsim_path(path_dir):
     path = Path(path_dir)
 
     if not path.exists():
+        from fluiddyn.io import FLUIDSIM_PATH
+
         logger.info("Trying to open the path relative to $FLUIDSIM_PATH")
         path = Path(FLUIDSIM_PATH) / path_dir
 
@@ -0,0 +1,669 @@
+"""Live monitoring of running simulations
+=======================================
+
+The command ``snek-monitor`` follows the simulations under some directories.
+It reads only the new lines of their log files (see
+:class:`snek5000.output.print_stdout.StdOutParser`), of their files
+``remaining_clock_time.csv`` (see
+:class:`snek5000.output.remaining_clock_time.RemainingClockTime`) and of their
+history points (``*.his``). Rolling performance metrics are exposed in the
+`Prometheus text format
+<https://prometheus.io/docs/instrumenting/exposition_formats/>`__, either in a
+file (for the textfile collector of the node exporter) or through a local
+HTTP endpoint::
+
+    snek-monitor ~/sim_data --textfile /var/lib/node_exporter/snek.prom
+    snek-monitor ~/sim_data --port 9101 --interval 30
+    snek-monitor path/to/sim --once
+
+The metrics are labelled by the path and the case name of the simulations:
+
+- ``snek_step``, ``snek_time``, ``snek_dt`` and ``snek_cfl``: values of the last
+  completed time step,
+- ``snek_pressure_iterations`` and ``snek_pressure_iterations_mean``: number of
+  iterations of the pressure solver for the last time step and averaged over
+  the rolling window,
+- ``snek_steps_per_second`` and ``snek_simulated_time_per_hour``: rolling
+  throughput,
+- ``snek_eta_seconds``: estimated remaining wall time,
+- ``snek_log_age_seconds``: time since the last modification of the log (a
+  stalled simulation has an increasing age),
+- ``snek_history_time``: time of the last record of the history points,
+- ``snek_anomalies_total``: number of anomalies detected with the option
+  ``--anomalies`` (see :mod:`snek5000.util.anomalies`).
+
+Only the simulations whose log has been modified during the last ``max_age``
+seconds are followed and reported. When a simulation is attached, only the end
+of its outputs is read and the files are then read by bounded chunks, so that a
+poll does not depend on the total size of the logs.
+
+An alert on a slow down can be written as, for example,
+``snek_steps_per_second < 0.5 * avg_over_time(snek_steps_per_second[6h])``.
+
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .. import logger
+
+#: Type and description of the metrics
+METRICS = {
+    "step": ("gauge", "Index of the last completed time step"),
+    "time": ("gauge", "Simulated time of the last completed time step"),
+    "dt": ("gauge", "Time step"),
+    "cfl": ("gauge", "CFL number"),
+    "pressure_iterations": ("gauge", "Iterations of the pressure solver"),
+    "pressure_iterations_mean": (
+        "gauge",
+        "Iterations of the pressure solver averaged over the rolling window",
+    ),
+    "steps_per_second": ("gauge", "Time steps per second of wall time"),
+    "simulated_time_per_hour": ("gauge", "Simulated time per hour of wall time"),
+    "eta_seconds": ("gauge", "Estimated remaining wall time in seconds"),
+    "log_age_seconds": ("gauge", "Seconds since the last modification of the log"),
+    "history_time": ("gauge", "Time of the last record of the history points"),
+    "anomalies_total": ("counter", "Number of anomalies detected"),
+}
+
+
+class FileTail:
+    """Read the complete lines appended to a file since the previous call.
+
+    Parameters
+    ----------
+    path: str or path-like
+    start_bytes: int
+        At the first read, only the last ``start_bytes`` bytes of the file are
+        read (``None``: from its beginning).
+    chunk_size: int
+        Maximum number of bytes read per call: the rest of the file is read by
+        the next calls.
+
+    """
+
+    def __init__(self, path, start_bytes=None, chunk_size=2**24):
+        self.path = Path(path)
+        self.start_bytes = start_bytes
+        self.chunk_size = chunk_size
+        self._offset = None if start_bytes is not None else 0
+        self._partial = ""
+        self._skip_line = False
+
+    def read_lines(self):
+        """Return the new complete lines (an empty list if the file does not
+        exist). The file is read again from its beginning if it has been
+        truncated."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+        if self._offset is None:
+            self._offset = max(0, size - self.start_bytes)
+            # the first line is skipped if it is incomplete
+            self._skip_line = self._offset > 0
+        if size < self._offset:
+            self._offset = 0
+            self._partial = ""
+            self._skip_line = False
+        if size == self._offset:
+            return []
+
+        with open(self.path, "rb") as file:
+            if self._skip_line and not self._partial:
+                file.seek(self._offset - 1)
+                self._skip_line = file.read(1) != b"\n"
+            file.seek(self._offset)
+            data = file.read(self.chunk_size)
+        self._offset += len(data)
+
+        lines = (self._partial + data.decode(errors="replace")).split("\n")
+        self._partial = lines.pop()
+        if self._skip_line and lines:
+            del lines[0]
+            self._skip_line = False
+        return lines
+
+
+def _newest(path_dir, pattern):
+    paths = list(Path(path_dir).glob(pattern))
+    if not paths:
+        return None
+    return max(paths, key=lambda path: path.stat().st_mtime)
+
+
+class SimulationMonitor:
+    """Follow the outputs of one running simulation.
+
+    Parameters
+    ----------
+    path_run: str or path-like
+        Simulation directory
+    window: float
+        Duration in seconds (of wall time) of the rolling window
+    detector: snek5000.util.anomalies.AnomalyDetector
+        Optional detector fed with the new time steps (the time steps read by
+        the first update only warm it up)
+
+    """
+
+    #: Only the end of the outputs existing when a simulation is attached is read
+    start_bytes_log = 2**20
+    start_bytes_his = 2**16
+
+    def __init__(self, path_run, window=600.0, detector=None):
+        self.path_run = Path(path_run)
+        self.window = window
+        self.detector = detector
+        self.case = None
+        #: last completed time step (see
+        #: :meth:`snek5000.output.print_stdout.StdOutParser.feed`)
+        self.last_record = None
+        self._tail_log = self._tail_his = self._parser = None
+        self._tail_csv = FileTail(
+            self.path_run / "remaining_clock_time.csv", start_bytes=4096
+        )
+        self._records = deque()
+        self._clock = None
+        self._remaining_clock_time = math.nan
+        self._history_time = math.nan
+        self._general = None
+        self._attached = False
+
+    def _get_paths(self):
+        """Paths of the log and of the history points of the current session,
+        from the file ``SESSION.NAME`` if possible."""
+        try:
+            with open(self.path_run / "SESSION.NAME") as file:
+                case, session_dir = file.read().splitlines()[:2]
+        except (OSError, ValueError):
+            path_log = _newest(self.path_run, "*.log")
+            path_session = _newest(self.path_run, "session_*")
+            path_his = None if path_session is None else _newest(path_session, "*.his")
+            return path_log, path_his
+
+        self.case = case.strip()
+        path_log = self.path_run / f"{self.case}.log"
+        if not path_log.exists():
+            path_log = _newest(self.path_run, "*.log")
+        path_his = self.path_run / session_dir.strip() / f"{self.case}.his"
+        return path_log, path_his
+
+    def get_params_general(self):
+        """Parameters ``params.nek.general`` of the simulation, ``None`` if
+        they cannot be loaded."""
+        if self._general is None:
+            from ..params import load_params
+
+            try:
+                self._general = load_params(self.path_run).nek.general
+            except Exception:
+                self._general = False
+        return None if self._general is False else self._general
+
+    def _get_stop_condition(self):
+        """``("numSteps", num_steps)`` or ``("endTime", end_time)`` read from
+        the parameters, ``(None, None)`` if they cannot be loaded."""
+        general = self.get_params_general()
+        if general is None:
+            return None, None
+        if general.stop_at == "numSteps":
+            return "numSteps", general.num_steps
+        return "endTime", general.end_time
+
+    def update(self, now=None):
+        """Read the new lines of the outputs.
+
+        Returns
+        -------
+        list of dict
+            Records of the time steps completed since the previous call
+
+        """
+        from ..output.print_stdout import StdOutParser
+
+        if now is None:
+            now = time.time()
+
+        path_log, path_his = self._get_paths()
+        if path_log is not None and (
+            self._tail_log is None or self._tail_log.path != path_log
+        ):
+            self._tail_log = FileTail(path_log, start_bytes=self.start_bytes_log)
+            self._parser = StdOutParser()
+            self._records.clear()
+            self._clock = None
+        if path_his is not None and (
+            self._tail_his is None or self._tail_his.path != path_his
+        ):
+            self._tail_his = FileTail(path_his, start_bytes=self.start_bytes_his)
+
+        records = []
+        if self._tail_log is not None:
+            records = self._parser.feed(self._tail_log.read_lines())
+        for record in records:
+            self._add_record(record, now)
+        if records:
+            self.last_record = records[-1]
+        if self.detector is not None:
+            self.detector.feed(records, warm_up=not self._attached)
+        self._attached = True
+
+        for line in self._tail_csv.read_lines():
+            # it,equation_times,dt,delta_clock_times,remaining_...,remaining_...
+            values = line.split(",")
+            if len(values) == 6:
+                try:
+                    remaining = float(values[5])
+                except ValueError:
+                    continue
+                if math.isfinite(remaining):
+                    self._remaining_clock_time = remaining
+
+        if self._tail_his is not None:
+            for line in self._tail_his.read_lines():
+                values = line.split()
+                # records: time and at least 3 variables, unlike the header
+                # and the coordinates
+                if len(values) >= 4:
+                    try:
+                        self._history_time = float(values[0])
+                    except ValueError:
+                        pass
+
+        return records
+
+    def _add_record(self, record, now):
+        """Add a record to the rolling window. The wall time is the elapsed
+        time printed by Nek5000 or, for older versions, the time at which the
+        record is read."""
+        elapsed = record.get("elapsed", math.nan)
+        if math.isfinite(elapsed):
+            if self._clock != "log" or (
+                self._records and elapsed < self._records[-1][0]
+            ):
+                self._records.clear()
+            self._clock = "log"
+            wall = elapsed
+        elif self._clock == "log":
+            return
+        else:
+            self._clock = "monitor"
+            wall = now
+
+        records = self._records
+        records.append((wall, record))
+        while len(records) > 2 and wall - records[0][0] > self.window:
+            records.popleft()
+
+    @property
+    def path_log(self):
+        return None if self._tail_log is None else self._tail_log.path
+
+    def get_log_age(self, now=None):
+        """Seconds since the last modification of the log (``inf`` if there is
+        no log)."""
+        if now is None:
+            now = time.time()
+        path_log = self._get_paths()[0]
+        try:
+            return now - path_log.stat().st_mtime
+        except (AttributeError, OSError):
+            return math.inf
+
+    def get_metrics(self, now=None):
+        """Compute the metrics (see :data:`METRICS`).
+
+        Returns
+        -------
+        dict
+            Only the metrics which can be computed
+
+        """
+        if now is None:
+            now = time.time()
+
+        metrics = {}
+        record = self.last_record
+        if record is not None:
+            metrics.update(
+                step=record["it"],
+                time=record["t"],
+                dt=record["dt"],
+                cfl=record["CFL"],
+                pressure_iterations=record.get("pres_it", math.nan),
+            )
+
+        records = self._records
+        if records:
+            pres_its = [rec.get("pres_it", math.nan) for _, rec in records]
+            pres_its = [value for value in pres_its if math.isfinite(value)]
+            if pres_its:
+                metrics["pressure_iterations_mean"] = sum(pres_its) / len(pres_its)
+
+        steps_per_second = time_per_second = math.nan
+        if len(records) > 1:
+            (wall0, first), (wall1, last) = records[0], records[-1]
+            duration = wall1 - wall0
+            if duration > 0:
+                steps_per_second = (last["it"] - first["it"]) / duration
+                time_per_second = (last["t"] - first["t"]) / duration
+                metrics["steps_per_second"] = steps_per_second
+                metrics["simulated_time_per_hour"] = 3600 * time_per_second
+
+        path_csv = self._tail_csv.path
+        if math.isfinite(self._remaining_clock_time):
+            age_csv = now - path_csv.stat().st_mtime
+            metrics["eta_seconds"] = max(0.0, self._remaining_clock_time - age_csv)
+        elif record is not None and math.isfinite(steps_per_second):
+            stop_at, end = self._get_stop_condition()
+            if stop_at == "numSteps" and steps_per_second > 0:
+                metrics["eta_seconds"] = (end - record["it"]) / steps_per_second
+            elif stop_at == "endTime" and time_per_second > 0:
+                metrics["eta_seconds"] = (end - record["t"]) / time_per_second
+
+        if self.path_log is not None and self.path_log.exists():
+            metrics["log_age_seconds"] = now - self.path_log.stat().st_mtime
+        if math.isfinite(self._history_time):
+            metrics["history_time"] = self._history_time
+        if self.detector is not None:
+            metrics["anomalies_total"] = len(self.detector.anomalies)
+
+        return {
+            key: value
+            for key, value in metrics.items()
+            if value is not None and math.isfinite(value)
+        }
+
+
+class Monitor:
+    """Follow all the running simulations under some directories.
+
+    Parameters
+    ----------
+    paths: iterable of str or path-like
+        Simulation directories or directories containing simulations
+    window: float
+        Duration in seconds of the rolling window
+    max_age: float
+        Simulations whose log has not been modified for ``max_age`` seconds are
+        considered as not running and are not reported
+    max_depth: int
+        Maximum depth of the search of simulation directories
+    anomalies: bool
+        Detect anomalies (see :mod:`snek5000.util.anomalies`)
+    callbacks: list of callable
+        Callbacks called for each anomaly (by default, only
+        :func:`snek5000.util.anomalies.log_anomaly`)
+
+    """
+
+    def __init__(
+        self,
+        paths,
+        window=600.0,
+        max_age=3600.0,
+        max_depth=2,
+        anomalies=False,
+        callbacks=None,
+    ):
+        self.paths = [Path(path).expanduser() for path in paths]
+        self.window = window
+        self.max_age = max_age
+        self.max_depth = max_depth
+        self.anomalies = anomalies
+        self.callbacks = callbacks
+        #: :class:`SimulationMonitor` indexed by simulation directory
+        self.simulations = {}
+
+    def find_simulations(self):
+        """Find the simulation directories (new simulations can appear)."""
+        from .status import find_simulation_dirs
+
+        paths = []
+        for path in self.paths:
+            paths.extend(find_simulation_dirs(path, self.max_depth))
+        return paths
+
+    def _attach(self, sim_monitor):
+        if self.anomalies:
+            from .anomalies import AnomalyDetector, create_detectors
+
+            general = sim_monitor.get_params_general()
+            target_cfl = None if general is None else general.target_cfl
+            sim_monitor.detector = AnomalyDetector(
+                sim_monitor.path_run, create_detectors(target_cfl), self.callbacks
+            )
+        return sim_monitor
+
+    def update(self, now=None):
+        """Update the monitors of the running simulations.
+
+        Returns
+        -------
+        dict
+            Metrics indexed by the :class:`SimulationMonitor` of the running
+            simulations
+
+        """
+        if now is None:
+            now = time.time()
+
+        results = {}
+        for path_run in self.find_simulations():
+            sim_monitor = self.simulations.get(path_run)
+            if sim_monitor is None:
+                sim_monitor = SimulationMonitor(path_run, self.window)
+            # simulations which are not running are neither attached nor read
+            if sim_monitor.get_log_age(now) > self.max_age:
+                self.simulations.pop(path_run, None)
+                continue
+            if path_run not in self.simulations:
+                self.simulations[path_run] = self._attach(sim_monitor)
+            try:
+                sim_monitor.update(now)
+                metrics = sim_monitor.get_metrics(now)
+            except OSError as err:
+                logger.warning(f"Cannot monitor {path_run}: {err}")
+                continue
+            if metrics.get("log_age_seconds", math.inf) <= self.max_age:
+                results[sim_monitor] = metrics
+        return results
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_metrics(results):
+    """Format the metrics in the Prometheus text format.
+
+    Parameters
+    ----------
+    results: dict
+        Metrics indexed by :class:`SimulationMonitor` (see
+        :meth:`Monitor.update`)
+
+    """
+    lines = []
+    for key, (kind, description) in METRICS.items():
+        name = f"snek_{key}"
+        lines.extend((f"# HELP {name} {description}", f"# TYPE {name} {kind}"))
+        for sim_monitor, metrics in results.items():
+            if key not in metrics:
+                continue
+            labels = f'path="{_escape_label(sim_monitor.path_run)}"'
+            if sim_monitor.case is not None:
+                labels += f',case="{_escape_label(sim_monitor.case)}"'
+            lines.append(f"{name}{{{labels}}} {metrics[key]:.10g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, text):
+    """Write a file atomically (as required by the textfile collector)."""
+    path = Path(path)
+    path_tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    path_tmp.write_text(text)
+    os.replace(path_tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics_text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Start a HTTP server in a daemon thread. The text served at ``/metrics``
+    is the attribute ``metrics_text`` of the returned server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.metrics_text = ""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info(f"Metrics served at http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="snek-monitor",
+        description=(
+            "Expose performance metrics of running simulations in the "
+            "Prometheus text format."
+        ),
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help=(
+            "simulation directories or directories containing simulations "
+            "(default: $FLUIDSIM_PATH)"
+        ),
+    )
+    parser.add_argument(
+        "-i", "--interval", type=float, default=10.0, help="update period (s)"
+    )
+    parser.add_argument(
+        "-w",
+        "--window",
+        type=float,
+        default=600.0,
+        help="duration of the rolling window (s)",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=3600.0,
+        help="ignore simulations whose log is older (s)",
+    )
+    parser.add_argument(
+        "-d",
+        "--max-depth",
+        type=int,
+        default=2,
+        help="maximum depth of the search of simulation directories",
+    )
+    parser.add_argument(
+        "--textfile", type=Path, default=None, help="file updated with the metrics"
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=None, help="port of the HTTP endpoint"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="host of the HTTP endpoint")
+    parser.add_argument(
+        "--once", action="store_true", help="print the metrics once and exit"
+    )
+    parser.add_argument(
+        "-a",
+        "--anomalies",
+        action="store_true",
+        help="detect anomalies (rising pressure iterations, CFL, dt collapse)",
+    )
+    parser.add_argument(
+        "--on-anomaly",
+        action="append",
+        choices=["log", "checkpoint", "stop"],
+        default=None,
+        help="action for each anomaly, can be repeated (default: log)",
+    )
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    paths = args.paths
+    if not paths:
+        from fluiddyn.io import FLUIDSIM_PATH
+
+        paths = [Path(FLUIDSIM_PATH)]
+
+    callbacks = None
+    if args.on_anomaly:
+        from .anomalies import CALLBACKS
+
+        callbacks = [CALLBACKS[name] for name in args.on_anomaly]
+
+    monitor = Monitor(
+        paths,
+        args.window,
+        args.max_age,
+        args.max_depth,
+        anomalies=args.anomalies or bool(args.on_anomaly),
+        callbacks=callbacks,
+    )
+    if args.once:
+        print(format_metrics(monitor.update()), end="")
+        return
+
+    server = None
+    if args.port is not None:
+        server = start_http_server(args.port, args.host)
+
+    try:
+        while True:
+            text = format_metrics(monitor.update())
+            if args.textfile is not None:
+                write_textfile(args.textfile, text)
+            if server is not None:
+                server.metrics_text = text
+            if args.textfile is None and server is None:
+                print(text, flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if "sphinx" in sys.modules:
+    from textwrap import indent
+
+    __doc__ += """
+Help message
+------------
+
+.. code-block::
+
+""" + indent(
+        create_parser().format_help(), "    "
+    )
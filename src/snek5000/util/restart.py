@@ -3,7 +3,7 @@
 
 """
 
-import os
+import fnmatch
 import sys
 from enum import Enum
 from pathlib import Path
@@ -15,7 +15,15 @@ from ..log import logger
 from ..output import _make_path_session, _parse_path_run_session_id
 from ..params import load_params
 from ..solvers import get_solver_short_name, import_cls_simul
-from .files import _path_try_from_fluidsim_path, next_path
+from . import scan_dir
+from .compress import suffix_compressed
+from .files import (
+    _path_try_from_fluidsim_path,
+    find_field_file_by_time,
+    get_field_file_header,
+    list_field_files,
+    next_path,
+)
 
 
 class SnekRestartError(Exception):
@@ -80,9 +88,10 @@ def get_status(path_dir, session_id=None, verbose=False):
     Parameters
     ----------
     path : str or path-like
-        Path to an existing simulation directory
+        Path to an existing simulation directory or session directory
     session_id : int
-        Integer suffix of the session directory
+        Integer suffix of the session directory. If not provided, it is parsed
+        from the path or the current session is used.
     verbose : bool
         Print out the path and its contents
 
@@ -92,30 +101,36 @@ def get_status(path_dir, session_id=None, verbose=False):
         Enumeration indicating status code and message
 
     """
+    if session_id is None:
+        path_dir, session_id = _parse_path_run_session_id(path_dir)
+
     path = Path(path_dir)
-    if session_id:
+    if session_id is not None:
         path_session = _make_path_session(path, session_id)
     else:
-        path_session = Path(load_params(path_dir).output.path_session)
+        path_session = _get_path_session(path)
 
-    locks_dir = path / ".snakemake" / "locks"
-    contents = os.listdir(path)
+    # every directory is listed only once
+    contents = scan_dir(path)
+    if not contents and not path.is_dir():
+        raise FileNotFoundError(path)
 
     if verbose:
-        print(path, "\nContents:", contents)
+        print(path, "\nContents:", list(contents))
 
-    if not (path / ".snakemake").exists():
+    if ".snakemake" not in contents:
         return SimStatus.TOO_EARLY
-    elif locks_dir.exists():
-        locks = tuple(locks_dir.iterdir())
-        if locks:
-            return SimStatus.LOCKED
+    elif scan_dir(path / ".snakemake" / "locks"):
+        return SimStatus.LOCKED
 
     if not {"SIZE", "nek5000"}.issubset(contents):
         return SimStatus.NOT_FOUND
 
-    checkpoints = set(path.glob("rs6*0.f?????"))
-    field_files = set(path_session.glob("*0.f?????"))
+    checkpoints = fnmatch.filter(contents, "rs6*0.f?????")
+    contents_session = scan_dir(path_session)
+    field_files = fnmatch.filter(contents_session, "*0.f?????") or fnmatch.filter(
+        contents_session, "*0.f?????" + suffix_compressed
+    )
 
     if checkpoints and field_files:
         return SimStatus.RESET_CONTENT
@@ -125,6 +140,19 @@ def get_status(path_dir, session_id=None, verbose=False):
         return SimStatus.OK
 
 
+def _get_path_session(path_run):
+    """Path of the current session directory of a simulation, read from the
+    file ``SESSION.NAME`` if possible, which is much faster than loading the
+    parameters."""
+    path_run = Path(path_run)
+    try:
+        with open(path_run / "SESSION.NAME") as fp:
+            session_dir = fp.read().splitlines()[1].strip()
+    except (OSError, IndexError):
+        return Path(load_params(path_run).output.path_session)
+    return path_run / session_dir
+
+
 def load_for_restart(
     path_dir=".",
     use_start_from=None,
@@ -133,6 +161,7 @@ def load_for_restart(
     verify_contents=True,
     new_dir_results=False,
     only_check=False,
+    use_start_from_time=None,
 ):
     """Load params and Simul for a restart.
 
@@ -148,11 +177,11 @@ def load_for_restart(
 
     use_start_from: str or int
         Name or index of the field file to restart from. Mutually exclusive option
-        with ``use_checkpoint``.
+        with ``use_checkpoint`` and ``use_start_from_time``.
 
     use_checkpoint: int, {1, 2}
         Number of the multi-file checkpoint file set to restart from. Mutually
-        exclusive parameter with ``use_start_from``.
+        exclusive parameter with ``use_start_from`` and ``use_start_from_time``.
 
     session_id: int
         Indicate which session directory should be used to look for restart files.
@@ -165,6 +194,12 @@ def load_for_restart(
     new_dir_results: bool (default False)
         Create a new directory for the new simulation.
 
+    use_start_from_time: float
+        Simulation time of the field file to restart from: the field file whose
+        time is the nearest is used (see
+        :func:`snek5000.util.files.find_field_file_by_time`). Mutually exclusive
+        option with ``use_start_from`` and ``use_checkpoint``.
+
     Notes
     -----
     How it works:
@@ -204,12 +239,15 @@ def load_for_restart(
         raise ImportError(f"Cannot import Simul class of solver {short_name}")
 
     # Set restart file
-    if use_start_from and use_checkpoint:
+    nb_options = sum(
+        (bool(use_start_from), bool(use_checkpoint), use_start_from_time is not None)
+    )
+    if nb_options > 1:
         raise SnekRestartError(
-            "Options use_start_from and use_checkpoint are mutually exclusive. "
-            "Use only one option at a time."
+            "Options use_start_from, use_checkpoint and use_start_from_time are "
+            "mutually exclusive. Use only one option at a time."
         )
-    elif not use_start_from and not use_checkpoint:
+    elif not nb_options:
         raise SnekRestartError(
             "No restart files were requested. "
             "This would result in a fresh simulation in a new session."
@@ -231,18 +269,15 @@ def load_for_restart(
 
     params.NEW_DIR_RESULTS = bool(new_dir_results)
 
-    if use_start_from:
+    path_start_from = None
+    if use_start_from or use_start_from_time is not None:
         if session_id is not None:
             old_path_session = _make_path_session(path, session_id)
         else:
             old_path_session = Path(params.output.path_session)
-        try:
-            index_start_from = int(use_start_from)
-        except ValueError:
-            path_start_from = old_path_session / use_start_from
-        else:
-            paths = sorted(old_path_session.glob(f"{short_name}0.*"))
-            path_start_from = paths[index_start_from]
+        path_start_from = _get_path_start_from(
+            old_path_session, short_name, use_start_from, use_start_from_time
+        )
         params.nek.general._set_internal_attr("_path_start_from", path_start_from)
 
     name_restart_file = "init_state.restart"
@@ -250,7 +285,7 @@ def load_for_restart(
         params.path_run = None
         params.output.path_session = None
         params.output.session_id = 0
-        if use_start_from:
+        if path_start_from is not None:
             params.nek.general.start_from = name_restart_file
             # new option Nek5000 master for interpolation on a new mesh
             # params.nek.general.start_from = name_restart_file + " int"
@@ -263,7 +298,7 @@ def load_for_restart(
         if not only_check:
             new_path_session.mkdir(exist_ok=True)
 
-        if not only_check and use_start_from:
+        if not only_check and path_start_from is not None:
             if path_start_from.exists():
                 params.nek.general.start_from = name_restart_file
                 src = f"../{old_path_session.name}/{path_start_from.name}"
@@ -276,6 +311,39 @@ def load_for_restart(
     return params, Simul
 
 
+def _get_path_start_from(path_session, case, use_start_from, use_start_from_time):
+    """Resolve the field file to restart from (see :func:`load_for_restart`).
+    Only uncompressed field files can be used by Nek5000."""
+    if use_start_from_time is None:
+        try:
+            index_start_from = int(use_start_from)
+        except ValueError:
+            return path_session / use_start_from
+
+    paths = list_field_files(path_session, case, compressed=False)
+    if not paths:
+        raise SnekRestartError(
+            f"No uncompressed field files {case}0.f????? in {path_session}"
+        )
+
+    if use_start_from_time is None:
+        try:
+            return paths[index_start_from]
+        except IndexError as err:
+            raise SnekRestartError(
+                f"Cannot index field file {index_start_from} among {len(paths)} "
+                f"field files in {path_session}"
+            ) from err
+
+    path_start_from = find_field_file_by_time(paths, use_start_from_time)
+    time = get_field_file_header(path_start_from)[0]
+    logger.info(
+        f"Restart from {path_start_from.name} (t = {time}) for "
+        f"{use_start_from_time = }"
+    )
+    return path_start_from
+
+
 class Restarter(RestarterABC):
     def create_parser(self):
         parser = super().create_parser()
@@ -294,7 +362,19 @@ class Restarter(RestarterABC):
             help=(
                 "Name (relative to the session path) of the field file "
                 "to restart from. "
-                "Mutually exclusive option with `use_checkpoint`."
+                "Mutually exclusive option with `use_checkpoint` and "
+                "`use_start_from_time`."
+            ),
+        )
+        parser.add_argument(
+            "--use-start-from-time",
+            type=float,
+            default=None,
+            help=(
+                "Simulation time of the field file to restart from (the nearest "
+                "field file is used). "
+                "Mutually exclusive option with `use_start_from` and "
+                "`use_checkpoint`."
             ),
         )
         parser.add_argument(
@@ -303,7 +383,8 @@ class Restarter(RestarterABC):
             default=None,
             help=(
                 "Number of the multi-file checkpoint file set to restart from. "
-                "Mutually exclusive parameter with `use_start_from`."
+                "Mutually exclusive parameter with `use_start_from` and "
+                "`use_start_from_time`."
             ),
         )
         parser.add_argument(
@@ -351,8 +432,15 @@ class Restarter(RestarterABC):
     )
 
     def _get_params_simul_class(self, args):
-        if args.use_start_from is None and args.use_checkpoint is None:
-            logger.error("Either --use-start-from or --use-checkpoint have to be given")
+        if (
+            args.use_start_from is None
+            and args.use_checkpoint is None
+            and args.use_start_from_time is None
+        ):
+            logger.error(
+                "Either --use-start-from, --use-start-from-time or "
+                "--use-checkpoint have to be given"
+            )
             sys.exit(1)
         return load_for_restart(
             args.path,
@@ -362,6 +450,7 @@ class Restarter(RestarterABC):
             verify_contents=not args.skip_verify_contents,
             new_dir_results=args.new_dir_results,
             only_check=args.only_check,
+            use_start_from_time=args.use_start_from_time,
         )
 
     def _set_params_time_stepping(self, params, args):
@@ -378,7 +467,7 @@ class Restarter(RestarterABC):
 
     def _start_sim(self, sim, args):
         if args.new_dir_results:
-            if args.use_start_from:
+            if args.use_start_from or args.use_start_from_time is not None:
                 sim.create_symlink_start_from_file(
                     sim.params.nek.general._path_start_from
                 )
@@ -396,6 +485,8 @@ class Restarter(RestarterABC):
     def _get_path_restart_file(self, params, args):
         if args.use_start_from is not None:
             path_file = args.use_start_from
+        elif args.use_start_from_time is not None:
+            path_file = params.nek.general._path_start_from
         elif args.use_checkpoint is not None:
             path_file = f"Use checkpoint files (use_checkpoint={args.use_checkpoint})"
         logger.info(path_file)
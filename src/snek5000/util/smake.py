@@ -19,6 +19,31 @@ def ensure_env():
         os.environ["PATH"] = ":".join([NEK_SOURCE_ROOT + "/bin", os.getenv("PATH")])
 
 
+def nek_source_input(relative_path):
+    """Create a Snakemake input function returning a path under
+    ``NEK_SOURCE_ROOT``. Unlike a string, the input function is only evaluated
+    when a job requiring it is scheduled, so that parsing the rule files does
+    not depend on ``NEK_SOURCE_ROOT``.
+
+    Parameters
+    ----------
+    relative_path: str
+        Path relative to ``NEK_SOURCE_ROOT``
+
+    Returns
+    -------
+    callable
+
+    """
+
+    def input_function(wildcards):
+        from .. import get_nek_source_root
+
+        return os.path.join(get_nek_source_root(), relative_path)
+
+    return input_function
+
+
 def set_compiler_verbosity(config, verbosity):
     """Set Fortran compiler warnings verbosity:
 
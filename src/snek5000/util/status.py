@@ -0,0 +1,233 @@
+"""Status of many simulations
+============================
+
+:func:`get_status_many` inspects simulation directories concurrently with a
+thread pool and gathers, for each simulation, its
+:class:`snek5000.util.restart.SimStatus`, the time and the time step of its last
+field file. The command ``snek-status`` prints these reports as a table::
+
+    snek-status                      # all simulations under $FLUIDSIM_PATH
+    snek-status path/to/sims -j 16
+    snek-status path/to/sim path/to/sim/session_01 --json
+
+The parameters of the simulations are not loaded when the session can be
+parsed from the path or read from the file ``SESSION.NAME``, and every
+directory is listed only once.
+
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from . import scan_dir
+from .compress import suffix_compressed
+from .files import get_field_file_header
+
+
+class StatusReport(NamedTuple):
+    """Status of a simulation directory."""
+
+    path: Path
+    #: status code, ``None`` if the status could not be determined
+    code: Optional[int]
+    #: name of the status or error message
+    message: str
+    #: simulation time of the last field file
+    time: Optional[float] = None
+    #: time step of the last field file
+    step: Optional[int] = None
+
+
+def _get_last_field_file(path_session):
+    """Last field file (``<case>0.f?????``) of a session directory."""
+    pattern = "*0.f?????"
+    names = [
+        *scan_dir(path_session, pattern),
+        *(
+            name[: -len(suffix_compressed)]
+            for name in scan_dir(path_session, pattern + suffix_compressed)
+        ),
+    ]
+    # special field files: restart, statistics and 2D slices
+    names = [name for name in names if not name.startswith(("rs6", "sts", "c2D"))]
+    if not names:
+        return None
+
+    name = max(names, key=lambda name: (name[-5:], name))
+    path = Path(path_session) / name
+    if not path.exists():
+        path = path.with_name(name + suffix_compressed)
+    return path
+
+
+def get_status_report(path):
+    """Get the status report of a simulation directory or session directory.
+
+    Returns
+    -------
+    StatusReport
+
+    """
+    from ..output import _make_path_session, _parse_path_run_session_id
+    from .restart import _get_path_session, get_status
+
+    path_run, session_id = _parse_path_run_session_id(path)
+    try:
+        status = get_status(path_run, session_id)
+        if session_id is None:
+            path_session = _get_path_session(path_run)
+        else:
+            path_session = _make_path_session(path_run, session_id)
+
+        path_field = _get_last_field_file(path_session)
+        if path_field is None:
+            time = step = None
+        else:
+            time, step = get_field_file_header(path_field)
+    except Exception as err:
+        return StatusReport(Path(path), None, f"{type(err).__name__}: {err}")
+
+    return StatusReport(Path(path), status.code, status.name, time, step)
+
+
+def get_status_many(paths, max_workers=None):
+    """Get the status of many simulations concurrently.
+
+    Parameters
+    ----------
+    paths: iterable of str or path-like
+        Paths to simulation directories or session directories
+    max_workers: int
+        Number of threads, by default ``min(32, os.cpu_count() + 4)``.
+
+    Returns
+    -------
+    list of StatusReport
+        Reports in the same order as ``paths``
+
+    Examples
+    --------
+    >>> for report in get_status_many(find_simulation_dirs("~/sim_data")):
+    ...     print(report.path, report.code, report.time)
+
+    """
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(get_status_report, paths))
+
+
+def find_simulation_dirs(path, max_depth=2):
+    """Find simulation directories, that is directories containing a file
+    ``params_simul.xml``.
+
+    Parameters
+    ----------
+    path: str or path-like
+        Root directory, which can also be a simulation directory
+    max_depth: int
+        Maximum depth of the search
+
+    Returns
+    -------
+    list of Path
+
+    """
+    path = Path(path).expanduser()
+    contents = scan_dir(path)
+    if "params_simul.xml" in contents:
+        return [path]
+    if max_depth <= 0:
+        return []
+
+    paths = []
+    for name, entry in sorted(contents.items()):
+        if not name.startswith(".") and entry.is_dir():
+            paths.extend(find_simulation_dirs(entry.path, max_depth - 1))
+    return paths
+
+
+def format_table(reports):
+    """Format status reports as a table."""
+    lines = [f"{'code':>4}  {'status':<16} {'time':>12} {'step':>9}  path"]
+    for report in reports:
+        code = "" if report.code is None else report.code
+        time = "" if report.time is None else f"{report.time:.6g}"
+        step = "" if report.step is None else report.step
+        message = report.message if report.code else "ERROR"
+        lines.append(f"{code:>4}  {message:<16} {time:>12} {step:>9}  {report.path}")
+        if report.code is None:
+            lines.append(f"{'':>6}{report.message}")
+    return "\n".join(lines)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog="snek-status",
+        description="Print the status of many simulations.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help=(
+            "simulation directories, session directories or directories "
+            "containing simulations (default: $FLUIDSIM_PATH)"
+        ),
+    )
+    parser.add_argument(
+        "-j", "--max-workers", type=int, default=None, help="number of threads"
+    )
+    parser.add_argument(
+        "-d",
+        "--max-depth",
+        type=int,
+        default=2,
+        help="maximum depth of the search of simulation directories",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    paths_root = args.paths
+    if not paths_root:
+        from fluiddyn.io import FLUIDSIM_PATH
+
+        paths_root = [Path(FLUIDSIM_PATH)]
+
+    paths = []
+    for path in paths_root:
+        if path.name.startswith("session_"):
+            paths.append(path)
+        else:
+            paths.extend(find_simulation_dirs(path, args.max_depth))
+
+    reports = get_status_many(paths, args.max_workers)
+    if args.json:
+        for report in reports:
+            print(json.dumps({**report._asdict(), "path": os.fspath(report.path)}))
+    else:
+        print(format_table(reports))
+
+    if any(report.code is None for report in reports):
+        sys.exit(1)
+
+
+if "sphinx" in sys.modules:
+    from textwrap import indent
+
+    __doc__ += """
+Help message
+------------
+
+.. code-block::
+
+""" + indent(
+        create_parser().format_help(), "    "
+    )
@@ -0,0 +1,173 @@
+"""Timings of the construction of simulations
+============================================
+
+The wall time of every phase of the instantiation of a simulation object
+(``Simul(params)``) is recorded in ``sim.timings``, an instance of
+:class:`Timings`:
+
+.. code-block:: python
+
+    sim = Simul(params)
+    print(sim.timings)
+    sim.timings.report()  # a dictionary which can be saved as JSON
+
+The phases are named hierarchically, for example ``post_init/build_nek5000``.
+
+If the environment variable ``SNEK_PROFILE`` is set to ``1`` (or ``true``),
+the timings are logged and saved in the file ``timings.json`` of the
+simulation directory. Any other value (except ``0`` and ``false``) is used as
+the path of the report. Reports are appended to files with the suffix
+``.jsonl`` (`JSON Lines <https://jsonlines.org>`__), so that performance
+regressions can be tracked over many runs::
+
+    export SNEK_PROFILE=~/snek_timings.jsonl
+
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from .. import logger
+from . import isoformat
+
+
+def get_profile_setting():
+    """Parse the environment variable ``SNEK_PROFILE``.
+
+    Returns
+    -------
+    None, True or Path
+        ``None`` if profiling is disabled, ``True`` to save the timings in the
+        simulation directory, or the path of the report.
+
+    """
+    value = os.getenv("SNEK_PROFILE", "").strip()
+    if value.lower() in ("", "0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on"):
+        return True
+    return Path(value).expanduser()
+
+
+class Timings:
+    """Record the wall time of named phases.
+
+    Phases can be nested: the name of a phase started within another phase is
+    prefixed by the name of the outer phase.
+
+    Examples
+    --------
+    >>> timings = Timings()
+    >>> with timings.phase("post_init"):
+    ...     with timings.phase("copy"):
+    ...         pass
+    >>> list(timings)
+    ['post_init', 'post_init/copy']
+
+    """
+
+    def __init__(self):
+        #: wall time in seconds indexed by phase name, in order of start
+        self.durations = {}
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager measuring the wall time of a phase. If a phase is
+        repeated, the durations are accumulated."""
+        self._stack.append(name)
+        full_name = "/".join(self._stack)
+        self.durations.setdefault(full_name, 0.0)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+            self._stack.pop()
+            self.durations[full_name] += duration
+
+    def __iter__(self):
+        return iter(self.durations)
+
+    def __getitem__(self, name):
+        return self.durations[name]
+
+    def __len__(self):
+        return len(self.durations)
+
+    @property
+    def total(self):
+        """Sum of the durations of the top-level phases."""
+        return sum(
+            duration for name, duration in self.durations.items() if "/" not in name
+        )
+
+    def report(self, **metadata):
+        """Structured report of the timings.
+
+        Parameters
+        ----------
+        metadata:
+            Additional items of the report (for example ``solver`` and
+            ``path_run``).
+
+        Returns
+        -------
+        dict
+
+        """
+        from snek5000 import __version__
+
+        return {
+            "time": isoformat(datetime.now()),
+            "snek5000": __version__,
+            **{key: str(value) for key, value in metadata.items()},
+            "total": self.total,
+            "phases": dict(self.durations),
+        }
+
+    def __str__(self):
+        width = max((len(name) for name in self.durations), default=5)
+        lines = [f"{'phase':<{width}}  {'time (s)':>10}"]
+        for name in self.durations:
+            indent = "  " * name.count("/")
+            label = indent + name.rpartition("/")[2]
+            lines.append(f"{label:<{width}}  {self.durations[name]:10.4f}")
+        lines.append(f"{'total':<{width}}  {self.total:10.4f}")
+        return "\n".join(lines)
+
+    def save(self, path, **metadata):
+        """Save the report (see :meth:`report`). A file with the suffix
+        ``.jsonl`` is appended with one report per line, other files are
+        overwritten.
+
+        """
+        path = Path(path)
+        report = self.report(**metadata)
+        if path.suffix == ".jsonl":
+            with open(path, "a") as file:
+                file.write(json.dumps(report) + "\n")
+        else:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=2)
+        return path
+
+    def log_and_save(self, path_run, **metadata):
+        """Log and save the timings according to ``SNEK_PROFILE`` (see
+        :func:`get_profile_setting`). Does nothing if profiling is disabled."""
+        setting = get_profile_setting()
+        if setting is None:
+            return None
+
+        logger.info(f"Timings of the construction of the simulation:\n{self}")
+        if setting is True:
+            if path_run is None:
+                return None
+            path = Path(path_run) / "timings.json"
+        else:
+            path = setting
+        return self.save(path, path_run=path_run, **metadata)
@@ -356,6 +356,42 @@ phill0.f00001
     return path_run
 
 
+_pres = "PRES gmres  {}   3.1E-06   3.7E-04   1.0E-05   5.5E-02   8.2E-02    F"
+
+
+def create_fake_log_step(it, elapsed, pres_it=5):
+    return (
+        f"Step {it:6d}, t= {0.1 * it:.7E}, DT= 1.0000000E-01, C=  0.400 "
+        f"{elapsed:.4E} 1.0000E-01\n"
+        f"         {it}  {_pres.format(pres_it)}\n"
+        f"         {it}  Fluid done  {0.1 * it:.4E}  1.0000E-01\n"
+    )
+
+
+@pytest.fixture
+def path_sim_running(tmp_path):
+    path_run = tmp_path / "phill_sim"
+    (path_run / "session_00").mkdir(parents=True)
+    (path_run / "params_simul.xml").touch()
+    (path_run / "SESSION.NAME").write_text(f"phill\n{path_run / 'session_00'}/\n")
+    (path_run / "phill.log").write_text(
+        "".join(create_fake_log_step(it, 0.5 * it) for it in range(1, 11))
+    )
+    (path_run / "remaining_clock_time.csv").write_text(
+        "it,equation_times,dt,delta_clock_times,"
+        "remaining_equation_times,remaining_clock_times\n"
+        "0,0.0,0.1,0.0,nan,nan\n"
+        "10,1.0,0.1,5.0,9.0,45.0\n"
+    )
+    (path_run / "session_00" / "phill.his").write_text(
+        "1 !number of monitoring coords\n"
+        " 0.5000000E+00  0.5000000E+00\n"
+        " 0.5000000E+00  1.0E+00  0.0E+00  0.0E+00\n"
+        " 1.0000000E+00  1.0E+00  0.0E+00  0.0E+00\n"
+    )
+    return path_run
+
+
 @pytest.fixture(autouse=True, scope="session")
 def shared_datadir_remove():
     """Removes empty data directory as a result of pytest-datadir"""
@@ -0,0 +1,130 @@
+import sys
+
+import pytest
+from conftest import create_fake_log_step
+
+from snek5000.util.anomalies import (
+    AnomalyDetector,
+    AnomalyWatcher,
+    CFLExceeded,
+    Detector,
+    DtCollapse,
+    RisingPressureIterations,
+    stop_simulation,
+)
+from snek5000.util.monitor import Monitor, SimulationMonitor, format_metrics, main
+
+
+def make_records(key, values):
+    return [
+        {"it": it, "t": 0.1 * it, "dt": 0.1, "CFL": 0.4, "pres_it": 5.0, key: value}
+        for it, value in enumerate(values, 1)
+    ]
+
+
+def test_detectors(tmp_path):
+    detectors = [
+        RisingPressureIterations(window=5, factor=2.0),
+        CFLExceeded(target_cfl=0.5, nb_steps=2),
+        DtCollapse(window=5, ratio=0.1),
+    ]
+    detector = AnomalyDetector(tmp_path, detectors, callbacks=[stop_simulation])
+
+    assert detector.feed(make_records("pres_it", [5] * 10)) == []
+    anomalies = detector.feed(make_records("pres_it", [5] * 5 + [30] * 10))
+    # reported only once
+    assert [anomaly.kind for anomaly in anomalies] == ["rising_pressure_iterations"]
+    assert anomalies[0].it == 7
+    assert (tmp_path / "ioinfo").read_text() == "-1\n"
+
+    anomalies = detector.feed(make_records("CFL", [0.4, 0.7, 0.4, 0.7, 0.7, 0.7]))
+    assert [(anomaly.kind, anomaly.it) for anomaly in anomalies] == [
+        ("cfl_exceeded", 5)
+    ]
+
+    anomalies = detector.feed(make_records("dt", [0.1, 0.1, 1e-3, 1e-3, 0.1]))
+    assert [(anomaly.kind, anomaly.it) for anomaly in anomalies] == [("dt_collapse", 3)]
+    assert len(detector.anomalies) == 3
+
+
+def test_watcher(path_sim_running):
+    detector = AnomalyDetector(
+        path_sim_running, [RisingPressureIterations(window=2)], []
+    )
+    watcher = AnomalyWatcher(path_sim_running, detector, interval=0.01)
+    watcher.start()
+    with open(path_sim_running / "phill.log", "a") as file:
+        file.write(
+            create_fake_log_step(11, 5.5, pres_it=50)
+            + create_fake_log_step(12, 6.0, pres_it=50)
+        )
+    watcher.stop()
+    assert not watcher.is_alive()
+    assert [anomaly.kind for anomaly in detector.anomalies] == [
+        "rising_pressure_iterations"
+    ]
+
+
+def test_monitor_anomalies(path_sim_running, monkeypatch, capsys):
+    monitor = Monitor([path_sim_running], anomalies=True, callbacks=[])
+    monitor.update()
+    with open(path_sim_running / "phill.log", "a") as file:
+        for it in range(11, 61):
+            file.write(
+                create_fake_log_step(it, 0.5 * it, pres_it=5 if it <= 30 else 50)
+            )
+
+    text = format_metrics(monitor.update())
+    assert f'snek_anomalies_total{{path="{path_sim_running}",case="phill"}} 1' in text
+    assert "# TYPE snek_anomalies_total counter" in text
+
+    # past anomalies are not reported when attaching a simulation
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["snek-monitor", str(path_sim_running), "--once", "--on-anomaly", "checkpoint"],
+    )
+    main()
+    assert "snek_anomalies_total{" in capsys.readouterr().out
+    assert not (path_sim_running / "ioinfo").exists()
+
+
+def test_attach_past_anomaly(path_sim_running):
+    path_log = path_sim_running / "phill.log"
+    with open(path_log, "a") as file:
+        for it in range(11, 31):
+            step = create_fake_log_step(it, 0.5 * it)
+            # CFL spike, then recovery
+            file.write(step.replace("0.400", "2.000") if it <= 20 else step)
+
+    def create_detector():
+        detectors = [CFLExceeded(target_cfl=0.5, nb_steps=3)]
+        return AnomalyDetector(path_sim_running, detectors, [stop_simulation])
+
+    sim_monitor = SimulationMonitor(path_sim_running, detector=create_detector())
+    assert len(sim_monitor.update()) == 30
+    watcher = AnomalyWatcher(path_sim_running, create_detector())
+    assert watcher.poll() == []
+    assert sim_monitor.detector.anomalies == watcher.detector.anomalies == []
+    assert not (path_sim_running / "ioinfo").exists()
+
+    # new anomalies are reported
+    with open(path_log, "a") as file:
+        for it in range(31, 34):
+            file.write(create_fake_log_step(it, 0.5 * it).replace("0.400", "2.000"))
+    assert [anomaly.it for anomaly in watcher.poll()] == [33]
+    assert (path_sim_running / "ioinfo").read_text() == "-1\n"
+
+
+def test_abstract_detector():
+    class Incomplete(Detector):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_not_finite():
+    record = {"it": 1, "t": 0.1, "CFL": float("nan"), "dt": 0.0}
+    assert CFLExceeded(target_cfl=0.5).check(record).kind == "cfl_exceeded"
+    assert DtCollapse().check(record).message == "time step is 0.0"
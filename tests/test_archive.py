@@ -1,6 +1,21 @@
 import os
+import tarfile
+from pathlib import Path
+from types import SimpleNamespace
 
-from snek5000.util.archive import archive, clean_simul, tar_name
+import pymech as pm
+import pytest
+from conftest import create_fake_nek_files
+
+from snek5000.output.readers.pymech_ import ReaderPymechArchive
+from snek5000.util.archive import (
+    IndexedArchive,
+    archive,
+    clean_simul,
+    stream_archive,
+    tar_name,
+)
+from snek5000.util.compress import dedupe_mesh, has_mesh
 
 
 def test_name(sim_data):
@@ -20,3 +35,123 @@ def test_compress(sim_data):
 
     os.chdir(str(sim_data))
     clean_simul("phill", "ark.tar.gz")
+
+
+def test_stream_archive(sim_data):
+    zstandard = pytest.importorskip("zstandard")
+
+    contents = sorted(path for path in sim_data.iterdir() if path.is_file())
+    half = len(contents) // 2
+    expected = {path.name: path.read_bytes() for path in contents}
+
+    os.chdir(str(sim_data))
+    tarball = stream_archive(
+        "data/ark.tar.zst",
+        [path.name for path in contents[half:]],
+        items_to_remove=[path.name for path in contents[:half]],
+    )
+
+    assert tarball == Path("data/ark.tar.zst")
+    assert not any(path.exists() for path in contents[:half])
+    assert all(path.exists() for path in contents[half:])
+    assert tarball.stat().st_mode & 0o777 == 0o444
+
+    with open(tarball, "rb") as fp:
+        stream = zstandard.ZstdDecompressor().stream_reader(fp)
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            archived = {
+                tarinfo.name: tar.extractfile(tarinfo).read()
+                for tarinfo in tar
+                if tarinfo.isreg()
+            }
+    assert archived == expected
+
+    # a second archive does not overwrite the first one
+    assert stream_archive("data/ark.tar.zst", ["SIZE"]).name == "ark_00.tar.zst"
+
+
+def test_stream_archive_corrupted(sim_data, mocker):
+    pytest.importorskip("zstandard")
+    os.chdir(str(sim_data))
+    mocker.patch(
+        "snek5000.util.archive._HashingReader.hexdigest",
+        side_effect=["checksum", "corrupted"],
+    )
+    with pytest.raises(IOError):
+        stream_archive("ark.tar.zst", items_to_remove=["SIZE"])
+    assert Path("SIZE").exists()
+
+
+@pytest.fixture
+def sim_fields(tmp_path, monkeypatch):
+    """Fake simulation directory with field files in a session directory."""
+    monkeypatch.chdir(tmp_path)
+    path_session = tmp_path / "session_00"
+    path_session.mkdir()
+    create_fake_nek_files(path_session, "phill", nb_files=3)
+    (tmp_path / "SIZE").write_text("parameter (lx1=2)")
+    return tmp_path
+
+
+def test_stream_archive_seekable(sim_fields):
+    pytest.importorskip("zstandard")
+    path_session = sim_fields / "session_00"
+    expected = {
+        f"session_00/{path.name}": path.read_bytes() for path in path_session.iterdir()
+    }
+
+    tarball = stream_archive(
+        "data/ark.tar.zst", ["SIZE"], items_to_remove=["session_00"], seekable=True
+    )
+    assert not path_session.exists()
+    assert IndexedArchive.path_index(tarball).exists()
+
+    ark = IndexedArchive(tarball)
+    assert ark.names("session_00/*") == sorted(expected)
+    assert "SIZE" in ark
+    for name, data in expected.items():
+        assert ark.read(name) == data
+    assert [ark.members[name]["time"] for name in sorted(expected)] == [2.0, 2.5, 3.0]
+
+    path = ark.extract("session_00/phill0.f00001", sim_fields)
+    assert path.read_bytes() == expected["session_00/phill0.f00001"]
+    path = ark.extract("session_00/phill0.f00001", sim_fields / "tmp", True)
+    assert path == sim_fields / "tmp/session_00/phill0.f00001"
+    assert path.read_bytes() == expected["session_00/phill0.f00001"]
+
+    with pytest.raises(FileNotFoundError):
+        ark.read("phill0.f00001")
+
+
+def test_reader_pymech_archive(sim_fields):
+    pytest.importorskip("zstandard")
+    path_file = sim_fields / "session_00/phill0.f00001"
+    expected = pm.open_dataset(path_file)
+    # the coordinates are restored from the first field file
+    dedupe_mesh(sim_fields / "session_00")
+    assert not has_mesh(path_file)
+    stream_archive("data/ark.tar.zst", items_to_remove=["session_00"], seekable=True)
+
+    output = SimpleNamespace(
+        path_run=sim_fields,
+        path_session=sim_fields / "session_00",
+        name_solver="phill",
+    )
+    reader = ReaderPymechArchive(output)
+
+    assert float(reader.load().time) == 3.0
+    assert reader.load(index=1).equals(expected)
+    assert float(reader.load(index=-3).time) == 2.0
+    assert float(reader.load(t_approx=2.4).time) == 2.5
+    assert float(reader.load(t_approx=2.1).time) == 2.0
+    assert float(reader.load(t_approx=0.0).time) == 2.0
+    assert float(reader.load(t_approx=10.0).time) == 3.0
+    assert reader.get_var("xmesh") is not None
+
+    with pytest.raises(FileNotFoundError):
+        reader.load(prefix="sts")
+    with pytest.raises(FileNotFoundError, match="index=7"):
+        reader.load(index=7)
+
+    pytest.importorskip("dask")
+    assert reader.load(index="all").time.size == 3
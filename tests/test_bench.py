@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from snek5000.util.bench import (
+    Benchmark,
+    compute_efficiency,
+    get_time_per_step,
+    plot_bench,
+)
+
+matplotlib.use("Agg")
+
+
+@pytest.mark.parametrize("weak", [False, True])
+def test_cases(weak):
+    bench = Benchmark("phill", nprocs=[4, 1, 2], orders=[6, 8], weak=weak)
+    cases = bench.get_cases()
+    assert len(cases) == 6
+    assert [case["nproc"] for case in cases[:3]] == [1, 2, 4]
+    assert {case["series"] for case in cases} == {0, 1}
+
+    nx = bench.nelems[0][0]
+    if weak:
+        assert [case["nx"] for case in cases[:3]] == [nx, 2 * nx, 4 * nx]
+    else:
+        assert {case["nx"] for case in cases} == {nx}
+
+    params = bench.create_params(cases[-1])
+    # strong scaling: same SIZE file for the series
+    assert params.oper.nproc_min == (4 if weak else 1)
+    assert params.oper.nproc_max >= 4
+    assert params.oper.elem.order == 8
+    assert params.nek.general.num_steps == bench.num_steps
+    assert params.output.sub_directory == "bench_phill"
+
+
+def test_tight_size():
+    bench = Benchmark("phill", nprocs=[1, 2, 4], tight_size=True)
+    cases = bench.get_cases()
+    assert [bench.create_params(case).oper.nproc_min for case in cases] == [1, 2, 4]
+
+
+def test_run_case_failure(tmp_path):
+    bench = Benchmark("phill", nprocs=[1, 2])
+    create_default_params = bench.Simul.create_default_params
+
+    class Simul:
+        def __init__(self, params):
+            self.params = params
+            self.path_run = tmp_path
+            self.oper = SimpleNamespace(nb_elements=8)
+            # the run with 2 processes fails
+            self.make = SimpleNamespace(exec=lambda rule, nproc: nproc == 1)
+            print_stdout = SimpleNamespace(
+                load=lambda: pd.DataFrame(index=[1, 2]),
+                load_timers=lambda: (None, {"time/timestep": 0.1}),
+            )
+            self.output = SimpleNamespace(print_stdout=print_stdout)
+
+    Simul.create_default_params = staticmethod(create_default_params)
+    bench.Simul = Simul
+
+    ok, failed = (bench.run_case(case) for case in bench.get_cases())
+    assert ok["success"]
+    assert ok["time_per_step"] == 0.1
+    # a failed run does not record a stale time
+    assert not failed["success"]
+    assert np.isnan(failed["time_per_step"])
+
+
+def test_time_per_step():
+    print_stdout = SimpleNamespace(load_timers=lambda: (None, {"time/timestep": 0.025}))
+    output = SimpleNamespace(print_stdout=print_stdout)
+    assert get_time_per_step(SimpleNamespace(output=output)) == 2.5e-2
+
+    df = pd.DataFrame({"clock_times_per_timestep": [1.0, 3.0]})
+    output = SimpleNamespace(
+        print_stdout=SimpleNamespace(load_timers=lambda: (None, {})),
+        remaining_clock_time=SimpleNamespace(load=lambda: df),
+    )
+    assert get_time_per_step(SimpleNamespace(output=output)) == 2.0
+
+
+def test_efficiency(tmp_path):
+    df = pd.DataFrame(
+        dict(
+            series=[0, 0, 0],
+            mode="strong",
+            nproc=[1, 2, 4],
+            order=6,
+            nx=8,
+            ny=8,
+            nz=8,
+            time_per_step_per_point=[1.0, 1.0, 1.25],
+        )
+    )
+    df = compute_efficiency(df)
+    assert df.efficiency.tolist() == [1.0, 1.0, 0.8]
+
+    path_fig = tmp_path / "bench.png"
+    plot_bench(df, path_fig)
+    assert path_fig.exists()
@@ -54,3 +54,4 @@ def test_print_stdout(sim_cbox_executed):
 
     sim.output.print_stdout.plot_nb_iterations()
     sim.output.print_stdout.plot_dt_cfl()
+    sim.output.print_stdout.plot_timings()
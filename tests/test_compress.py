@@ -0,0 +1,180 @@
+import sys
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import pymech as pm
+import pytest
+from conftest import create_fake_nek_files
+from pymech.neksuite.field import read_header
+
+from snek5000.output.base import Output
+from snek5000.output.readers.pymech_ import ReaderPymech
+from snek5000.util.compress import (
+    compress_field_file,
+    decompress_field_file,
+    dedupe_mesh,
+    find_mesh_file,
+    has_mesh,
+    is_compressed,
+    main,
+    readable_field_files,
+    restore_mesh,
+)
+
+pytest.importorskip("zstandard")
+
+
+@pytest.fixture
+def path_session(tmp_path):
+    path_session = tmp_path / "session_00"
+    path_session.mkdir()
+    create_fake_nek_files(path_session, "phill", nb_files=2)
+    for path in path_session.iterdir():
+        # non trivial values to be compressed
+        rng = np.random.default_rng(0)
+        field = pm.readnek(path)
+        for elem in field.elem:
+            elem.vel[...] = rng.normal(size=elem.vel.shape)
+            elem.pres[...] = rng.normal(size=elem.pres.shape)
+        pm.writenek(path, field)
+    return path_session
+
+
+def test_lossless(path_session):
+    path = path_session / "phill0.f00000"
+    result = compress_field_file(path)
+    path_compressed = result["path_output"]
+
+    assert path_compressed.name == "phill0.f00000.nekz"
+    assert is_compressed(path_compressed)
+    assert not is_compressed(path)
+    assert result["ratio"] > 1.05
+    assert read_header(path_compressed) == read_header(path)
+
+    path_decompressed = decompress_field_file(path_compressed, path_session / "dec")
+    assert path_decompressed.read_bytes() == path.read_bytes()
+
+
+def test_lossy(path_session):
+    path = path_session / "phill0.f00000"
+    tolerances = {"pressure": 1e-3, "ux": 1e-4}
+    lossless = compress_field_file(path, path_output=path_session / "lossless")
+    lossy = compress_field_file(path, tolerances)
+    assert lossy["ratio"] > lossless["ratio"]
+
+    original = pm.readnek(path)
+    path_restored = path_session / "restored"
+    restored = pm.readnek(decompress_field_file(lossy["path_output"], path_restored))
+    for elem, elem_restored in zip(original.elem, restored.elem):
+        # the mesh and the variables without tolerance are kept intact
+        assert np.array_equal(elem.pos, elem_restored.pos)
+        assert np.array_equal(elem.vel[1:], elem_restored.vel[1:])
+        assert np.abs(elem.vel[0] - elem_restored.vel[0]).max() <= 1e-4
+        assert np.abs(elem.pres - elem_restored.pres).max() <= 1e-3
+
+    with pytest.raises(ValueError):
+        compress_field_file(path, {"unknown": 1e-3})
+    result = compress_field_file(path, {"unknown": 1e-3}, strict=False)
+    assert result["ratio"] == pytest.approx(lossless["ratio"])
+
+
+def _make_reader(path_session):
+    output = SimpleNamespace(
+        name_solver="phill",
+        path_session=path_session,
+        sim=SimpleNamespace(output=SimpleNamespace(path_session=path_session)),
+    )
+    output.get_field_file = partial(Output.get_field_file, output)
+    return ReaderPymech(output)
+
+
+def test_reader_compressed(path_session):
+    original = pm.open_dataset(path_session / "phill0.f00001")
+    for path in sorted(path_session.iterdir()):
+        compress_field_file(path)
+        path.unlink()
+
+    reader = _make_reader(path_session)
+
+    ds = reader.load()
+    assert ds.equals(original)
+    assert float(reader.load(index=1).time) == float(original.time)
+    assert float(reader.load(t_approx=2.4).time) == 2.5
+
+
+def test_dedupe_mesh(path_session):
+    create_fake_nek_files(path_session, "stsphill", nb_files=2)
+    paths = sorted(path_session.iterdir())
+    sizes = {path: path.stat().st_size for path in paths}
+    datasets = {path: pm.open_dataset(path) for path in paths}
+
+    size_saved = dedupe_mesh(path_session)
+    assert size_saved == sum(sizes[path] - path.stat().st_size for path in paths)
+    assert size_saved > 0
+    # the first file of each series keeps the coordinates
+    assert [has_mesh(path) for path in paths] == [True, False, True, False]
+    assert find_mesh_file(path_session / "phill0.f00001").name == "phill0.f00000"
+    assert dedupe_mesh(path_session) == 0
+
+    path = path_session / "phill0.f00001"
+    (path_session / "restored").mkdir()
+    path_restored = restore_mesh(
+        path, path_session / "phill0.f00000", path_session / "restored" / path.name
+    )
+    assert pm.open_dataset(path_restored).equals(datasets[path])
+
+    # coordinates restored by the reader, also for compressed files
+    compress_field_file(path)
+    path.unlink()
+    reader = _make_reader(path_session)
+    assert reader.load(index=1).equals(datasets[path])
+    stats = reader.load(prefix="sts", index=1)
+    assert stats.equals(datasets[path_session / "stsphill0.f00001"])
+
+
+def test_readable_field_files(path_session, mocker):
+    create_fake_nek_files(path_session, "phill", nb_files=4)
+    dedupe_mesh(path_session)
+    for path in sorted(path_session.iterdir()):
+        compress_field_file(path)
+        path.unlink()
+
+    from snek5000.util import compress
+
+    spy_load = mocker.spy(compress, "_load_field_file")
+    spy_decompress = mocker.spy(compress, "decompress_field_file")
+    paths = sorted(path_session.iterdir())
+    with readable_field_files(paths) as paths_readable:
+        assert all(has_mesh(path) for path in paths_readable)
+    # the shared mesh file is decompressed and read only once
+    assert spy_load.call_count == 1
+    assert spy_decompress.call_count == len(paths) + 1
+
+
+def test_command(path_session, monkeypatch, capsys):
+    # a tolerance for a variable absent from the files does not abort the batch
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "snek-compress",
+            str(path_session),
+            "-t",
+            "pressure=1e-3",
+            "-t",
+            "temperature=1",
+        ],
+    )
+    main()
+    assert "compression ratio" in capsys.readouterr().out
+    assert len(list(path_session.glob("*.nekz"))) == 2
+
+    path = path_session / "phill0.f00000"
+    path.unlink()
+    monkeypatch.setattr(
+        sys, "argv", ["snek-compress", "-d", "--remove", str(path_session)]
+    )
+    main()
+    assert path.exists()
+    assert not list(path_session.glob("*.nekz"))
@@ -1,6 +1,9 @@
 import os
 from pathlib import Path
 
+import pytest
+from conftest import create_fake_nek_files
+
 from snek5000.util import files
 
 
@@ -90,3 +93,74 @@ def test_next_path_relative(tmpdir):
 
     if session_dir.is_absolute():
         raise ValueError("next_path should return a relative path")
+
+
+@pytest.mark.parametrize("link", [None, "hardlink", "reflink"])
+def test_copy_file(tmp_path, link):
+    src = tmp_path / "src.txt"
+    src.write_text("content")
+    dst = tmp_path / "dst.txt"
+    dst.write_text("old content")
+
+    how = files.copy_file(src, dst, link)
+    assert dst.read_text() == "content"
+    if link == "hardlink":
+        assert how == "hardlink"
+        assert dst.samefile(src)
+        assert files.copy_file(src, dst, link) == "unchanged"
+        # copying breaks the hard link without truncating the source
+        assert files.copy_file(src, dst) == "copy"
+        assert not dst.samefile(src)
+        assert src.read_text() == dst.read_text() == "content"
+    else:
+        # reflinks fall back to a copy on filesystems without copy-on-write
+        assert how in ("copy", link)
+
+    with pytest.raises(ValueError):
+        files.copy_file(src, dst, "symlink")
+
+
+def test_list_find_field_files(tmp_path, mocker):
+    import pymech.neksuite.field
+
+    from snek5000.util.compress import suffix_compressed
+
+    # times: 2.0, 2.5, 3.0, 3.5, 4.0
+    create_fake_nek_files(tmp_path, "phill", nb_files=5)
+    path = tmp_path / "phill0.f00002"
+    path.rename(path.with_name(path.name + suffix_compressed))
+    (tmp_path / ("phill0.f00003" + suffix_compressed)).touch()
+    (tmp_path / "phill.log").touch()
+
+    names = [path.name for path in files.list_field_files(tmp_path, "phill")]
+    assert names == [
+        "phill0.f00000",
+        "phill0.f00001",
+        "phill0.f00002" + suffix_compressed,
+        "phill0.f00003",
+        "phill0.f00004",
+    ]
+
+    paths = files.list_field_files(tmp_path, "phill", compressed=False)
+    assert [path.name for path in paths] == names[:2] + names[3:]
+
+    spy = mocker.spy(pymech.neksuite.field, "read_header")
+    for time, name in [
+        (2.9, "phill0.f00001"),
+        (3.1, "phill0.f00003"),
+        (-1.0, "phill0.f00000"),
+        (5.0, "phill0.f00004"),
+    ]:
+        assert files.find_field_file_by_time(paths, time).name == name
+    # the headers are read only once
+    assert spy.call_count <= len(paths)
+    assert files.get_field_file_header(paths[-1]) == (4.0, 0)
+    # modified file: the header is read again
+    field = pymech.readnek(paths[-1])
+    field.time = 5.0
+    pymech.writenek(paths[-1], field)
+    assert files.get_field_file_header(paths[-1]) == (5.0, 0)
+    assert files._read_field_file_header.cache_info().maxsize is not None
+
+    with pytest.raises(FileNotFoundError):
+        files.find_field_file_by_time([], 3.0)
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+#: Modules which would dominate the import time of ``import snek5000``
+HEAVY_MODULES = (
+    "fluiddyn",
+    "fluidsim_core",
+    "matplotlib",
+    "numpy",
+    "pandas",
+    "pymech",
+    "snakemake",
+    "xarray",
+)
+
+
+def _run_python(code):
+    process = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return process
+
+
+@pytest.mark.parametrize("module", ("snek5000", "snek5000.util"))
+def test_no_heavy_imports(module):
+    process = _run_python(
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES} if m in sys.modules))"
+    )
+    assert process.stdout.split() == []
+
+
+def test_lazy_attributes():
+    import snek5000
+
+    assert snek5000.get_status is snek5000.util.restart.get_status
+    assert snek5000.load_for_restart is snek5000.restart.load_for_restart
+    assert snek5000.load_params is snek5000.params.load_params
+    assert "make" in dir(snek5000)
+
+    with pytest.raises(AttributeError):
+        snek5000.does_not_exist
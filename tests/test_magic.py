@@ -12,3 +12,19 @@ except ImportError:
 @pytest.mark.skipif(not ip, reason="Magics cannot be tested if IPython is unavailable")
 def test_snek5000_magic():
     ip.run_line_magic("snek", "kth")
+    ip.run_line_magic("snek", "")
+    ip.run_line_magic("fluidsim", "phill -f")
+    assert ip.user_ns["Simul"].__module__ == "phill.solver"
+
+
+@pytest.mark.skipif(not ip, reason="Magics cannot be tested if IPython is unavailable")
+def test_snek5000_magic_registry(mocker):
+    import fluidsim_core.magic
+
+    from snek5000 import solvers
+
+    spy = mocker.spy(solvers, "import_cls_simul")
+    available_solvers = fluidsim_core.magic.available_solvers
+    ip.run_line_magic("snek", "phill -f")
+    spy.assert_called_once_with("phill")
+    assert fluidsim_core.magic.available_solvers is available_solvers
@@ -1,3 +1,4 @@
+import subprocess
 import sys
 from concurrent.futures import ProcessPoolExecutor as Pool
 from concurrent.futures import as_completed
@@ -5,6 +6,7 @@ from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+from filelock import Timeout
 
 from snek5000.make import _Nek5000Make, snek_make, snek_make_nek
 
@@ -72,3 +74,197 @@ def test_snek_make_nek_clean_nek():
 def test_snek_make_nek_genmap():
     with patch.object(sys, "argv", ["snek-make-nek", "bin/genmap"]):
         snek_make_nek()
+
+
+def test_nek5000_make_cache_core(tmp_path, monkeypatch):
+    nek_source_root = tmp_path / "Nek5000"
+    (nek_source_root / "core").mkdir(parents=True)
+    for name in ("drive1.f", "navier1.f", "byte.c"):
+        (nek_source_root / "core" / name).touch()
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(nek_source_root))
+
+    config = {key: "" for key in ("CC", "FC", "MPICC", "MPIFC", "CFLAGS", "FFLAGS")}
+    config.update({"CASE": "phill", "objects": "frame.o"})
+
+    path_run = tmp_path / "phill_run"
+    (path_run / "obj").mkdir(parents=True)
+    (path_run / "SIZE").write_text("      parameter (lelg=64)\n")
+    for name in ("drive1.o", "navier1.o", "byte.o", "phill.o", "frame.o"):
+        (path_run / "obj" / name).write_text(name)
+
+    nm = _Nek5000Make(cache_core=True)
+    path_cache = nm.cache_core_objects(path_run, config)
+    assert sorted(path.name for path in path_cache.iterdir()) == [
+        "byte.o",
+        "drive1.o",
+        "navier1.o",
+    ]
+
+    path_new_run = tmp_path / "phill_new_run"
+    path_new_run.mkdir()
+    (path_new_run / "SIZE").write_text("      parameter (lelg=64)\n")
+    assert nm.restore_core_objects(path_new_run, config) == 3
+    assert (path_new_run / "obj" / "drive1.o").read_text() == "drive1.o"
+    assert not (path_new_run / "obj" / "phill.o").exists()
+
+    # Different SIZE file or compiler flags: no cache available
+    (path_new_run / "SIZE").write_text("      parameter (lelg=128)\n")
+    assert nm.restore_core_objects(path_new_run, config) == 0
+    (path_new_run / "SIZE").write_text("      parameter (lelg=64)\n")
+    config["FFLAGS"] = "-O3"
+    assert nm.restore_core_objects(path_new_run, config) == 0
+
+
+def test_nek5000_make_cache_core_source(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(tmp_path))
+    (tmp_path / "core").mkdir()
+    (tmp_path / "core" / "drive1.f").write_text("old")
+    path_size = tmp_path / "SIZE"
+    path_size.write_text("      parameter (lelg=64)\n")
+    config = {key: "" for key in ("CC", "FC", "MPICC", "MPIFC", "CFLAGS", "FFLAGS")}
+
+    nm = _Nek5000Make()
+    path_cache = nm.get_path_core_cache(path_size, config)
+    # not a git repository: modification times and sizes of the sources
+    (tmp_path / "core" / "drive1.f").write_text("new source")
+    assert nm.get_path_core_cache(path_size, config) != path_cache
+
+    mocker.patch.object(nm, "get_source_revision", return_value="rev0")
+    path_cache = nm.get_path_core_cache(path_size, config)
+    nm.get_source_revision.return_value = "rev1"
+    assert nm.get_path_core_cache(path_size, config) != path_cache
+
+
+def test_nek5000_make_source_revision(tmp_path, monkeypatch):
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(tmp_path))
+    path_genbox = tmp_path / "tools" / "genbox"
+    path_genbox.mkdir(parents=True)
+    (path_genbox / "genbox.f").write_text("old")
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=a", "-c", "user.email=a@b", *args],
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+
+    git("init")
+    git("add", ".")
+    git("commit", "-m", "init")
+
+    nm = _Nek5000Make()
+    revision = nm.get_source_revision("tools/genbox")
+    assert len(revision) == 40
+    assert nm.get_source_revision("tools/genbox") == revision
+
+    # local modifications (untracked files are ignored)
+    (path_genbox / "genbox.f").write_text("new source")
+    (path_genbox / "genbox.o").write_text("")
+    assert _Nek5000Make().get_source_revision("tools/genbox").startswith(revision + "+")
+    assert _Nek5000Make().get_source_revision("tools/genmap") == ""
+
+
+def test_snek_make_nek_target_manifest(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(tmp_path))
+    config = {key: "" for key in ("CC", "FC", "MPICC", "MPIFC", "CFLAGS", "FFLAGS")}
+    path_config = tmp_path / "config.yml"
+    path_config.write_text("".join(f"{key}: ''\n" for key in config))
+    mocker.patch(
+        "snek5000.output.base.Output.find_configfile", return_value=path_config
+    )
+    mocker.patch("snek5000.output.base.Output.update_snakemake_config")
+
+    def fake_exec(self, *targets, **kwargs):
+        for target in targets:
+            path = self.path_run / target
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        return True
+
+    mocker.patch.object(_Nek5000Make, "exec", fake_exec)
+    with patch.object(sys, "argv", ["snek-make-nek", "bin/genmap"]):
+        snek_make_nek()
+
+    nm = _Nek5000Make()
+    assert set(nm.load_manifest()) == {"bin/genmap"}
+    assert "bin/genmap" not in nm.get_outdated_targets(config)
+
+
+def test_nek5000_make_build_parallel(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(tmp_path))
+    config = {key: "" for key in ("CC", "FC", "MPICC", "MPIFC", "CFLAGS", "FFLAGS")}
+
+    nm = _Nek5000Make()
+    mock_exec = mocker.patch.object(nm, "exec", return_value=True)
+
+    assert nm.build(config, cores=3)
+    mock_exec.assert_called_once_with(
+        *nm.targets, config=config, force_incomplete=True, forcetargets=True, cores=3
+    )
+    assert sorted(path.name for path in nm.path_locks.iterdir()) == [
+        "3rd_party.lock",
+        "tools_genbox.lock",
+        "tools_genmap.lock",
+    ]
+
+    # A target being built by another process blocks the build
+    with nm.get_lock("bin/genmap"):
+        with pytest.raises(Timeout):
+            nm.get_lock("bin/genmap").acquire(timeout=0.01)
+        with nm.get_lock("bin/genbox").acquire(timeout=0.01):
+            pass
+
+
+def test_nek5000_make_manifest(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv("NEK_SOURCE_ROOT", str(tmp_path))
+    config = {
+        "CC": "gcc",
+        "FC": "gfortran",
+        "MPICC": "mpicc",
+        "MPIFC": "mpif77",
+        "CFLAGS": "-march=native",
+        "FFLAGS": "-march=native -mcmodel=medium -std=legacy",
+    }
+
+    nm = _Nek5000Make()
+
+    def fake_exec(*targets, **kwargs):
+        for target in targets:
+            path = nm.path_run / target
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        return True
+
+    mock_exec = mocker.patch.object(nm, "exec", side_effect=fake_exec)
+
+    assert nm.build(config)
+    assert mock_exec.call_args.args == tuple(nm.targets)
+    assert set(nm.load_manifest()) == set(nm.targets)
+
+    # Whitespaces
+    config["FFLAGS"] = " -march=native  -mcmodel=medium -std=legacy "
+    assert not nm.has_to_build(config)
+    assert nm.build(config)
+    assert mock_exec.call_count == 1
+
+    # The order of the flags matters (the last optimization level is used)
+    config["FFLAGS"] = "-march=native -O0 -O3"
+    assert nm.build(config)
+    assert mock_exec.call_count == 2
+    config["FFLAGS"] = "-march=native -O3 -O0"
+    assert nm.has_to_build(config)
+    assert nm.build(config)
+    assert mock_exec.call_count == 3
+
+    # Only the tools depend on CC
+    config["CC"] = "clang"
+    assert nm.build(config)
+    assert mock_exec.call_count == 4
+    assert mock_exec.call_args.args == ("bin/genbox", "bin/genmap")
+
+    # Missing target
+    (nm.path_run / "3rd_party/gslib/lib/libgs.a").unlink()
+    assert nm.build(config)
+    assert mock_exec.call_args.args == ("3rd_party/gslib/lib/libgs.a",)
+    assert not nm.has_to_build(config)
@@ -0,0 +1,97 @@
+import sys
+import time
+from urllib.request import urlopen
+
+import pytest
+from conftest import create_fake_log_step
+
+from snek5000.util.monitor import (
+    FileTail,
+    Monitor,
+    format_metrics,
+    main,
+    start_http_server,
+    write_textfile,
+)
+
+
+def test_file_tail(tmp_path):
+    path = tmp_path / "file.txt"
+    tail = FileTail(path)
+    assert tail.read_lines() == []
+    path.write_text("a\nb")
+    assert tail.read_lines() == ["a"]
+    with open(path, "a") as file:
+        file.write("c\n")
+    assert tail.read_lines() == ["bc"]
+    path.write_text("d\n")
+    assert tail.read_lines() == ["d"]
+
+    # only the end of an existing file, read by chunks
+    path.write_text("line0\nline1\nline2\n")
+    tail = FileTail(path, start_bytes=8, chunk_size=4)
+    assert tail.read_lines() == []
+    assert tail.read_lines() == ["line2"]
+    tail = FileTail(path, start_bytes=12)
+    assert tail.read_lines() == ["line1", "line2"]
+
+
+def test_monitor(path_sim_running):
+    monitor = Monitor([path_sim_running.parent], window=2.0)
+    now = time.time()
+    results = monitor.update(now)
+    assert len(results) == 1
+    sim_monitor, metrics = results.popitem()
+    assert sim_monitor.case == "phill"
+    assert metrics["step"] == 10
+    assert metrics["pressure_iterations"] == 5
+    # rolling window of 2 s of wall time: steps 6 to 10
+    assert metrics["steps_per_second"] == pytest.approx(2.0)
+    assert metrics["simulated_time_per_hour"] == pytest.approx(720.0)
+    assert 40 < metrics["eta_seconds"] <= 45.0
+    assert metrics["history_time"] == 1.0
+
+    with open(path_sim_running / "phill.log", "a") as file:
+        file.write(create_fake_log_step(11, 5.5, pres_it=50))
+    metrics = monitor.update(now)[sim_monitor]
+    assert metrics["step"] == 11
+    assert metrics["pressure_iterations"] == 50
+    assert metrics["pressure_iterations_mean"] == pytest.approx(14.0)
+
+    text = format_metrics({sim_monitor: metrics})
+    assert "# TYPE snek_steps_per_second gauge" in text
+    assert f'snek_step{{path="{path_sim_running}",case="phill"}} 11' in text
+
+    # not running anymore
+    assert monitor.update(now + 7200) == {}
+    assert monitor.simulations == {}
+
+
+def test_monitor_not_running(path_sim_running, mocker):
+    spy = mocker.spy(FileTail, "read_lines")
+    monitor = Monitor([path_sim_running.parent], max_age=60.0)
+    assert monitor.update(time.time() + 3600) == {}
+    # the outputs of simulations which are not running are not read
+    assert spy.call_count == 0
+    assert monitor.simulations == {}
+
+
+def test_outputs(path_sim_running, tmp_path, monkeypatch, capsys):
+    text = format_metrics(Monitor([path_sim_running]).update())
+
+    path_textfile = tmp_path / "snek.prom"
+    write_textfile(path_textfile, text)
+    assert path_textfile.read_text() == text
+
+    server = start_http_server(0)
+    try:
+        server.metrics_text = text
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urlopen(url) as response:
+            assert response.read().decode() == text
+    finally:
+        server.shutdown()
+
+    monkeypatch.setattr(sys, "argv", ["snek-monitor", str(path_sim_running), "--once"])
+    main()
+    assert "snek_step{" in capsys.readouterr().out
@@ -1,5 +1,7 @@
 from io import StringIO
 
+import pytest
+
 
 def test_init(oper):
     print(oper.produce_str_describing_oper())
@@ -51,3 +53,97 @@ def test_sim_path_run(sim):
     params = sim.params
     assert params.oper.Lx == params.oper.Ly == params.oper.Lz == 1.0
     assert sim.oper.produce_str_describing_oper() in sim.name_run
+
+
+def test_size_rounding(oper, monkeypatch):
+    from snek5000.operators import round_size
+
+    assert round_size(729) == 1024
+    assert round_size(729, "exact") == 729
+    assert round_size(729, "multiple_8") == 736
+    for rounding in ("power3", "multiple_0", "multiple_a"):
+        with pytest.raises(ValueError):
+            round_size(729, rounding)
+
+    assert oper.nb_elements == 9**3
+    assert oper.optimize_size() == {
+        "lelg": 729,
+        "lelt": 122,
+        "lelx": 9,
+        "lely": 9,
+        "lelz": 9,
+    }
+    assert oper.optimize_size(nproc=8, rounding="power2")["lelt"] == 128
+
+    memory_power2 = oper.memory_required()
+    monkeypatch.setattr(oper.params.oper.misc, "size_rounding", "exact")
+    assert oper.max_n_seq == 729
+    assert oper.max_n_loc == 122
+    assert oper.max_nx == 9
+    assert oper.memory_required(report=True) < memory_power2
+    assert oper.memory_required(rounding="power2") == memory_power2
+
+
+def test_memory_breakdown():
+    from phill.solver import Simul
+
+    from snek5000.operators import Operators
+
+    params = Simul.create_default_params()
+    params.oper.nx = params.oper.ny = params.oper.nz = 9
+    params.oper.nproc_min = 6
+    oper = Operators(params=params)
+
+    breakdown = oper.memory_breakdown()
+    total = breakdown.pop("total")
+    assert total == sum(breakdown.values())
+    assert total == oper.memory_required(detailed=True)
+    assert breakdown["velocity"] > breakdown["mhd"]
+
+    # memory per rank decreases with the number of ranks of the SIZE file
+    assert oper.memory_breakdown(nproc=12)["total"] < total
+
+    params.oper.max.dim_proj *= 2
+    assert oper.memory_breakdown()["projection"] == 2 * breakdown["projection"]
+
+
+def test_recommend_nproc():
+    from phill.solver import Simul
+
+    from snek5000.operators import Operators
+
+    params = Simul.create_default_params()
+    params.oper.nx = params.oper.ny = params.oper.nz = 12
+    params.oper.nproc_min = 8
+    params.oper.nproc_max = 32
+    oper = Operators(params=params)
+    nb_points = 12**3 * 6**3
+
+    recommendation = oper.recommend_nproc(min_points_per_rank=20_000)
+    assert recommendation.nproc_max == nb_points // 20_000
+    assert recommendation.nproc == recommendation.candidates[-1]
+    assert recommendation.points_per_rank >= 20_000
+
+    recommendation = oper.recommend_nproc(
+        nproc_available=14, memory_per_rank=100 * 1024**2, max_imbalance=1.0
+    )
+    assert recommendation.nproc_max == 14
+    assert recommendation.memory_per_rank <= 100 * 1024**2
+    assert oper.memory_breakdown(nproc=recommendation.nproc_min - 1)["total"] > (
+        100 * 1024**2
+    )
+    for nproc in recommendation.candidates:
+        assert 12**3 % nproc == 0
+    assert recommendation.nproc == 12
+
+    with pytest.raises(ValueError):
+        oper.recommend_nproc(memory_per_rank=1024)
+
+    # the memory requires more ranks than available or than the SIZE file allows
+    nproc_min = oper.recommend_nproc(memory_per_rank=100 * 1024**2).nproc_min
+    assert nproc_min > 4
+    with pytest.raises(ValueError, match="ranks available"):
+        oper.recommend_nproc(nproc_available=4, memory_per_rank=100 * 1024**2)
+    params.oper.nproc_max = nproc_min - 1
+    with pytest.raises(ValueError, match="nproc_max"):
+        oper.recommend_nproc(memory_per_rank=100 * 1024**2)
@@ -0,0 +1,42 @@
+import shutil
+import sys
+from pathlib import Path
+
+from phill.output import OutputPhill
+
+
+def test_output_copy(tmp_path):
+    # copy of the solver package, which is not modified
+    path_package = tmp_path / "phill"
+    shutil.copytree(
+        OutputPhill.get_path_solver_package(),
+        path_package,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    path_mesh = path_package / "phill.re2"
+    path_mesh.write_bytes(b"mesh")
+
+    output = OutputPhill.__new__(OutputPhill)
+    output.package = "phill"
+    output.path_solver_package = path_package
+
+    relative_paths = output.get_relative_paths()
+    assert Path("Snakefile") in relative_paths
+    assert Path("toolbox/frame.f") in relative_paths
+    assert Path("etc/tetralith.yml") in relative_paths
+    assert not any(path.suffix == ".py" for path in relative_paths)
+    assert output.get_paths() == sorted(path_package / path for path in relative_paths)
+
+    path_run = tmp_path / "phill_run"
+    modules = set(sys.modules)
+    output.copy(path_run, link="hardlink", link_min_size=0)
+    # subpackages are not imported
+    assert not {"phill.toolbox", "phill.etc"} & (set(sys.modules) - modules)
+
+    copied = {
+        path.relative_to(path_run) for path in path_run.rglob("*") if path.is_file()
+    }
+    assert copied == relative_paths | {Path("phill.usr")}
+    # only the mesh is hard linked, files rewritten in place by snek5000 are not
+    assert (path_run / "phill.re2").samefile(path_mesh)
+    assert not (path_run / "Snakefile").samefile(path_package / "Snakefile")
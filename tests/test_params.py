@@ -10,7 +10,9 @@ from snek5000.params import (
     _as_python_value,
     _save_par_file,
     _str_par_file,
+    clear_cache,
     complete_params_from_par_file,
+    load_params,
 )
 from snek5000.util import init_params
 
@@ -196,3 +198,106 @@ def test_str_par_file(sim, tmp_path):
     par_str_par_file = _str_par_file(sim.params)
 
     assert par_save_par_file == par_str_par_file
+
+
+def test_load_params_cache(sim_data, mocker):
+    import snek5000.params
+
+    clear_cache()
+    spy = mocker.spy(snek5000.params, "import_cls_simul")
+
+    params = load_params(sim_data)
+    params.oper.nx = -1
+    params2 = load_params(sim_data)
+    assert spy.call_count == 1
+    assert params2.oper.nx != -1
+
+    # modified file
+    (sim_data / "params_simul.xml").unlink()
+    params2._save_as_xml(sim_data / "params_simul.xml")
+    load_params(sim_data)
+    assert spy.call_count == 2
+
+    load_params(sim_data)
+    assert spy.call_count == 2
+
+    clear_cache(sim_data)
+    load_params(sim_data)
+    assert spy.call_count == 3
+
+    load_params(sim_data, use_cache=False)
+    assert spy.call_count == 4
+
+
+def test_clear_cache_symlink(sim_data, tmp_path):
+    from snek5000.params import _cache_params
+    from snek5000.solvers import _cache_short_names
+
+    # shared info_solver.xml and params_simul.xml
+    for name in ("info_solver.xml", "params_simul.xml"):
+        path = sim_data / name
+        path_target = tmp_path / name
+        path.rename(path_target)
+        path.symlink_to(path_target)
+
+    clear_cache()
+    load_params(sim_data)
+    assert len(_cache_short_names) == len(_cache_params) == 1
+
+    clear_cache(sim_data)
+    assert not _cache_short_names
+    assert not _cache_params
+
+
+def test_sync_par_modified_sections(mocker):
+    from snek5000.solvers.base import Simul
+
+    params = Simul.create_default_params()
+    nek = params.nek
+    par = _str_par_file(params)
+
+    spy = mocker.spy(Parameters, "_Parameters__update_par_section")
+    assert _str_par_file(params) == par
+    assert spy.call_count == 0
+
+    spy.reset_mock()
+    nek.velocity.residual_proj = True
+    nek.pressure.preconditioner = "nan"
+    par = _str_par_file(params)
+    assert sorted(call.args[1] for call in spy.call_args_list) == [
+        "PRESSURE",
+        "VELOCITY",
+    ]
+    assert "residualProj = yes" in par
+    # pruned option removed
+    assert "preconditioner" not in par
+
+    nek.velocity._set_internal_attr("_enabled", False)
+    assert "[VELOCITY]" not in _str_par_file(params)
+    nek.velocity._set_internal_attr("_enabled", True)
+    assert "[VELOCITY]" in _str_par_file(params)
+
+    # other options: all the sections are synchronized again
+    spy.reset_mock()
+    nek._sync_par(has_to_prune_literals=False, keep_all_sections=True)
+    assert len(spy.call_args_list) == len(nek._tag_children)
+
+
+def test_default_params_cache():
+    from snek5000.solvers.base import Simul
+
+    clear_cache()
+    params = Simul.create_default_params()
+    params.oper.boundary[0] = "W"
+    params2 = Simul.create_default_params()
+    assert params2 is not params
+    assert params2.oper.boundary[0] == "P"
+
+    # autodoc of the default values
+    general = params2.nek.general
+    assert "code-block" in general._doc
+    assert "numSteps = 1\n" in general._doc
+    assert "_par_file" not in general.__dict__
+    general.num_steps = 99
+    assert "numSteps = 99" not in general._get_formatted_doc()
+    clear_cache()
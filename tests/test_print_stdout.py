@@ -0,0 +1,63 @@
+import matplotlib
+import numpy as np
+import pytest
+
+from snek5000.output.print_stdout import PrintStdOut
+
+matplotlib.use("Agg")
+
+log = """\
+Step      1, t= 7.0514701E-02, DT= 7.0514701E-02, C=  1.398
+             Solving for fluid
+          1  PRES gmres         5   3.1277E-06   3.7775E-04   1.0000E-05   5.5211E-02   8.2769E-02    F
+          1  Fluid done  7.0515E-02  2.2652E-01
+Step      2, t= 1.4102940E-01, DT= 7.0514701E-02, C=  1.398 4.6482E-01 2.2000E-01
+             Solving for fluid
+          2  PRES gmres         6   3.1277E-06   3.7775E-04   1.0000E-05   5.5211E-02   8.2769E-02    F
+          2  Hmholtz VELX       4   2.5189E-08   9.3788E-02   1.0000E-07
+          2  Fluid done  1.4103E-01  2.3652E-01
+"""
+
+statistics = """
+end of time-step loop
+
+runtime statistics:
+ total elapsed time             :   1.066402E+00 sec
+ time/timestep                  :   8.887200E-02 sec
+ dssum time           120   1.2000E-01   4.5000E-02
+ proj time             40   2.0000E-02   7.5000E-03
+"""
+
+
+@pytest.fixture
+def print_stdout(tmp_path):
+    path = tmp_path / "phill.log"
+    path.write_text(log)
+    return PrintStdOut(path_file=path)
+
+
+def test_load(print_stdout):
+    df = print_stdout.load()
+    assert list(df.index) == [1, 2]
+    assert df.pres_it.tolist() == [5, 6]
+    assert df.fluid_etime.tolist() == [0.22652, 0.23652]
+    # the wall times are not printed in older versions of Nek5000
+    assert np.isnan(df.elapsed_step[1])
+    assert df.elapsed_step[2] == 0.22
+
+    timers, summary = print_stdout.load_timers()
+    assert timers.empty
+    assert summary == {}
+
+
+def test_load_timers(print_stdout):
+    with open(print_stdout.path_file, "a") as file:
+        file.write(statistics)
+
+    timers, summary = print_stdout.load_timers()
+    assert timers.index.tolist() == ["dssum", "proj"]
+    assert timers.loc["dssum", "calls"] == 120
+    assert timers.loc["proj", "time"] == 0.02
+    assert summary == {"total elapsed time": 1.066402, "time/timestep": 0.088872}
+
+    print_stdout.plot_timings()
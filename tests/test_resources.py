@@ -1,5 +1,10 @@
+import subprocess
+import sys
 from pathlib import Path
 
+import pytest
+from conftest import create_fake_nek_files
+
 import snek5000
 from snek5000.resources import get_base_template, get_base_templates
 
@@ -21,3 +26,98 @@ def test_base_template():
 
 def test_base_templates():
     assert len(get_base_templates()) == 3
+
+
+def test_rules_without_nek_source_root(tmp_path, monkeypatch, mocker):
+    from snakemake import snakemake
+
+    monkeypatch.delenv("NEK_SOURCE_ROOT", raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    snakefile = tmp_path / "Snakefile"
+    lines = ["from snek5000 import get_snek_resource", ""]
+    for name in ("compiler", "io", "internal"):
+        lines += [
+            f"module {name}:",
+            "    snakefile:",
+            f'        get_snek_resource("{name}.smk")',
+            "    config:",
+            "        config",
+            "",
+            f"use rule * from {name} as {name}_*",
+            "",
+        ]
+    snakefile.write_text("\n".join(lines))
+
+    # Parsing the rules should not require NEK_SOURCE_ROOT nor scan the directory
+    spy_now = mocker.spy(snek5000.util, "now")
+    assert snakemake(str(snakefile), listrules=True, config={"CASE": "phill"})
+    # the name of the log file is computed only when a run is executed
+    spy_now.assert_not_called()
+
+
+def test_rules_light_imports(tmp_path):
+    snakefile = tmp_path / "Snakefile"
+    snakefile.write_text(
+        "\n".join(
+            [
+                "from snek5000 import get_snek_resource",
+                "module io:",
+                "    snakefile:",
+                '        get_snek_resource("io.smk")',
+                "    config:",
+                "        config",
+                "use rule * from io as io_*",
+            ]
+        )
+    )
+    code = (
+        "import sys; from snakemake import snakemake; "
+        f"snakemake({str(snakefile)!r}, listrules=True, config={{'CASE': 'phill'}}); "
+        "print('numpy' in sys.modules)"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # parsing the rules does not import numpy
+    assert process.stdout.splitlines()[-1] == "False"
+
+
+def test_rule_archive_sessions(tmp_path):
+    pytest.importorskip("zstandard")
+
+    # standard layout: the field files are only in the session directories
+    path_run = tmp_path / "phill_run"
+    path_session = path_run / "session_00"
+    path_session.mkdir(parents=True)
+    create_fake_nek_files(path_session, "phill", nb_files=2)
+    for name in ("SESSION.NAME", "params_simul.xml", "SIZE", "phill.par"):
+        (path_run / name).touch()
+
+    snakefile = path_run / "Snakefile"
+    snakefile.write_text(
+        "\n".join(
+            [
+                "from snek5000 import get_snek_resource",
+                "module io:",
+                "    snakefile:",
+                '        get_snek_resource("io.smk")',
+                "    config:",
+                "        config",
+                "use rule * from io as io_*",
+            ]
+        )
+    )
+    code = (
+        "import sys; from snakemake import snakemake; "
+        f"sys.exit(not snakemake({str(snakefile)!r}, targets=['io_archive'], "
+        "config={'CASE': 'phill'}, cores=1, quiet=True))"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=path_run, check=True)
+
+    assert (path_run / "data" / "phill_run.tar.zst").exists()
+    assert not list(path_session.glob("phill0.f*"))
@@ -1,11 +1,17 @@
+import json
+import sys
+
 import pytest
 import xarray as xr
+from conftest import create_fake_nek_files
 from pymech.neksuite.field import read_header
 
 import snek5000
 from snek5000.output import _make_path_session
 from snek5000.params import load_params
 from snek5000.util.restart import SnekRestartError, get_status, load_for_restart
+from snek5000.util.status import find_simulation_dirs, get_status_many
+from snek5000.util.status import main as main_status
 
 
 def test_too_early(sim_data):
@@ -52,6 +58,31 @@ def test_partial_content(sim_data):
     assert get_status(sim_data).code == 206
 
 
+def test_restart_start_from_time(sim_data):
+    (sim_data / ".snakemake").mkdir()
+    path_session = _make_path_session(sim_data, 1)
+    # times: 2.0, 2.5, 3.0, 3.5
+    create_fake_nek_files(path_session, "phill", nb_files=4)
+    (path_session / "phill0.f00004.tmp").touch()
+
+    for kwargs, name in [
+        (dict(use_start_from=-1), "phill0.f00003"),
+        (dict(use_start_from="phill0.f00001"), "phill0.f00001"),
+        (dict(use_start_from_time=2.9), "phill0.f00002"),
+        (dict(use_start_from_time=0.0), "phill0.f00000"),
+        (dict(use_start_from_time=10.0), "phill0.f00003"),
+    ]:
+        params, _ = load_for_restart(sim_data, new_dir_results=True, **kwargs)
+        assert params.nek.general._path_start_from == path_session / name
+        assert params.nek.general.start_from == "init_state.restart"
+
+    with pytest.raises(SnekRestartError, match="mutually exclusive"):
+        load_for_restart(sim_data, use_start_from=-1, use_start_from_time=2.0)
+
+    with pytest.raises(SnekRestartError, match="Cannot index"):
+        load_for_restart(sim_data, use_start_from=10, new_dir_results=True)
+
+
 @pytest.mark.parametrize("prefix_dir", ("phill_", "undefined_solver"))
 def test_restart_error(tmpdir_factory, prefix_dir):
     tmpdir = tmpdir_factory.mktemp(prefix_dir)
@@ -176,3 +207,24 @@ def test_phys_fields(sim_executed):
         pytest.xfail(reason=pymech_issue)
     else:
         assert isinstance(ds, xr.Dataset)
+
+
+def test_get_status_many(sim_data, tmp_path, monkeypatch, capsys):
+    (sim_data / ".snakemake").mkdir()
+    path_session = _make_path_session(sim_data, 0)
+    (sim_data / "SESSION.NAME").write_text(f"phill\n./{path_session.name}\n")
+
+    reports = get_status_many([sim_data, path_session, tmp_path], max_workers=2)
+    assert [report.code for report in reports] == [205, 205, None]
+    assert reports[0].time == reports[1].time == 2.0
+    assert reports[0].step == 0
+    assert "Error" in reports[2].message
+
+    assert sim_data in find_simulation_dirs(sim_data.parent, max_depth=1)
+    assert find_simulation_dirs(tmp_path) == []
+
+    monkeypatch.setattr(sys, "argv", ["snek-status", str(sim_data), "--json"])
+    main_status()
+    report = json.loads(capsys.readouterr().out)
+    assert report["code"] == 205
+    assert report["path"] == str(sim_data)
@@ -1,7 +1,13 @@
 import pytest
+from fluidsim_core import loader
 
 from snek5000 import load_simul
-from snek5000.solvers import available_solvers, import_cls_simul
+from snek5000.solvers import (
+    available_solvers,
+    get_solver_package,
+    import_cls_simul,
+    import_module_solver,
+)
 
 
 def test_entrypoints():
@@ -11,6 +17,27 @@ def test_entrypoints():
     assert "phill" in solvers
 
 
+def test_entrypoints_cache(mocker):
+    available_solvers.cache_clear()
+    spy = mocker.spy(loader, "available_solvers")
+    assert available_solvers() is available_solvers()
+    assert spy.call_count == 1
+
+    # solver modules already imported are not loaded again
+    import snek5000.solvers.kth
+
+    load = mocker.spy(type(available_solvers()["kth"]), "load")
+    assert import_module_solver("kth") is snek5000.solvers.kth
+    assert import_cls_simul("snek5000.solvers.kth") is snek5000.solvers.kth.Simul
+    assert load.call_count == 0
+    assert get_solver_package("kth") == "snek5000.solvers"
+    assert get_solver_package("phill") == "phill"
+    assert spy.call_count == 1
+
+    with pytest.raises(ValueError):
+        import_cls_simul("unknown")
+
+
 def test_init_base():
     from snek5000.solvers.base import Simul
 
@@ -4,6 +4,7 @@ from collections import defaultdict
 
 import pytest
 
+from snek5000.util import last_modified, scan_dir, scantree
 from snek5000.util.smake import (
     append_debug_flags,
     ensure_env,
@@ -50,3 +51,59 @@ def test_debug_flags(warnings):
     assert all("-O0 -g" in config[k] for k in ("CFLAGS", "FFLAGS"))
 
     os.environ["SNEK_DEBUG"] = debug_state
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for index, path_dir in enumerate(("", "a", "a/b", "c")):
+        (tmp_path / path_dir).mkdir(exist_ok=True)
+        path = tmp_path / path_dir / f"file{index}"
+        path.touch()
+        os.utime(path, (index, index))
+    return tmp_path
+
+
+@pytest.mark.parametrize("max_workers", (None, 4))
+def test_scantree(tree, max_workers):
+    names = {entry.name for entry in scantree(tree, max_workers, prefetch_stat=True)}
+    assert names == {"file0", "file1", "file2", "file3"}
+    assert last_modified(tree, max_workers).name == "file3"
+
+
+def test_scan_dir(tree):
+    assert sorted(scan_dir(tree)) == ["a", "c", "file0"]
+    assert list(scan_dir(tree, "file*")) == ["file0"]
+    assert scan_dir(tree / "missing") == {}
+
+
+def test_timings(tmp_path, monkeypatch):
+    import json
+
+    from snek5000.util.timings import Timings
+
+    timings = Timings()
+    for _ in range(2):
+        with timings.phase("post_init"):
+            with timings.phase("copy"):
+                pass
+    with timings.phase("init_oper"):
+        pass
+
+    assert list(timings) == ["post_init", "post_init/copy", "init_oper"]
+    assert timings["post_init/copy"] <= timings["post_init"]
+    assert timings.total == timings["post_init"] + timings["init_oper"]
+    assert "copy" in str(timings)
+
+    monkeypatch.delenv("SNEK_PROFILE", raising=False)
+    assert timings.log_and_save(tmp_path) is None
+
+    monkeypatch.setenv("SNEK_PROFILE", "1")
+    report = json.loads(timings.log_and_save(tmp_path, solver="phill").read_text())
+    assert report["solver"] == "phill"
+    assert report["phases"] == timings.durations
+
+    path_jsonl = tmp_path / "timings.jsonl"
+    monkeypatch.setenv("SNEK_PROFILE", str(path_jsonl))
+    timings.log_and_save(tmp_path)
+    timings.log_and_save(tmp_path)
+    assert len(path_jsonl.read_text().splitlines()) == 2